@@ -1,34 +1,167 @@
-from .gdrive import (
-    init_drive_service,
-    list_files_in_folder,
-    download_file_from_gdrive,
-    download_and_read,
-    read_produk_file,
-    read_stock_file,
-    FOLDER_PENJUALAN,
-    FOLDER_PRODUK,
-    FOLDER_STOCK,
-    FOLDER_HASIL_ANALISIS,
-    FOLDER_PORTAL,
-)
-
-from .analysis import (
-    DAYS_MULTIPLIER,
-    MAX_MULTIPLIER,
-    BULAN_INDONESIA,
-    CITY_PREFIX_MAP,
-    get_days_multiplier,
-    map_nama_dept,
-    map_city,
-    convert_df_to_excel,
-    calculate_daily_wma,
-    classify_abc_log_benchmark,
-    calculate_min_stock,
-    calculate_max_stock,
-    calculate_add_stock,
-    hitung_po_cabang_baru,
-    get_status_stock,
-    melt_stock_by_city,
-    highlight_kategori_abc_log,
-    highlight_status_stock,
-)
+"""
+utils/__init__.py
+Paket utilitas aplikasi Analisis Stock & ABC.
+
+Nama publik di-import secara lazy (saat pertama diakses), sehingga
+`python -m utils.engine` / `utils.benchmark` tidak ikut memuat client Google
+Drive (gdrive, drive_cache, sales_loader, sales_store) maupun engine itu
+sendiri sebelum dijalankan sebagai __main__.
+"""
+
+import importlib
+
+# Submodul → nama yang diekspor
+_EXPORTS = {
+    "gdrive": (
+        "init_drive_service",
+        "drive_credentials",
+        "list_files_in_folder",
+        "download_file_from_gdrive",
+        "download_and_read",
+        "read_produk_file",
+        "read_stock_file",
+        "FOLDER_PENJUALAN",
+        "FOLDER_PRODUK",
+        "FOLDER_STOCK",
+        "FOLDER_HASIL_ANALISIS",
+        "FOLDER_PORTAL",
+    ),
+    "drive_cache": (
+        "read_drive_file_cached",
+        "warm_cache",
+        "evict_lru",
+    ),
+    "sales_loader": (
+        "load_files_parallel",
+        "parse_file_bytes",
+    ),
+    "sales_store": (
+        "refresh_sales_store",
+        "load_manifest",
+        "manifest_version",
+    ),
+    "export": (
+        "EXPORT_FORMATS",
+        "frames_to_xlsx_bytes",
+        "frame_to_csv_gz_bytes",
+        "frame_to_parquet_bytes",
+        "build_export",
+        "export_version",
+        "render_export",
+    ),
+    "analysis": (
+        "DAYS_MULTIPLIER",
+        "MAX_MULTIPLIER",
+        "BULAN_INDONESIA",
+        "CITY_PREFIX_MAP",
+        "get_days_multiplier",
+        "convert_df_to_excel",
+        "calculate_daily_wma",
+        "BULAN_BUCKET_COLS",
+        "bucket_sales_30d",
+        "calculate_wma_from_buckets",
+        "classify_abc_log_benchmark",
+        "calculate_min_stock",
+        "calculate_max_stock",
+        "calculate_add_stock",
+        "hitung_po_cabang_baru",
+        "calculate_suggested_po",
+        "get_status_stock",
+        "calculate_status_stock",
+        "melt_stock_by_city",
+        "highlight_kategori_abc_log",
+        "highlight_status_stock",
+    ),
+    "mapping": (
+        "map_nama_dept",
+        "map_city",
+        "map_platform",
+        "SHOPEE_SET",
+        "TOKOPEDIA_SET",
+        "WEBSITE_SET",
+        "map_sales_dimensions",
+        "SALES_DIMENSION_COLS",
+    ),
+    "preprocess": (
+        "preprocess_sales",
+        "mark_invoice_duplicates",
+        "get_preprocessed_sales",
+        "sales_fingerprint",
+    ),
+    "sales_cube": (
+        "SalesCube",
+        "CUBE_DIMS",
+        "build_sales_cube",
+        "get_sales_cube",
+        "load_sales_cube",
+        "store_sales_cube",
+    ),
+    "engine": (
+        "StageTimer",
+        "StockResult",
+        "prepare_produk_ref",
+        "prepare_stock",
+        "run_stock_analysis",
+        "run_abc_analysis",
+        "build_stock_pivot",
+        "run_pipeline",
+    ),
+    "schema": (
+        "parse_produk_file",
+        "parse_stock_file",
+        "SALES_SCHEMA",
+        "PRODUK_SCHEMA",
+        "STOCK_SCHEMA",
+        "SchemaError",
+        "apply_schema",
+        "apply_sales_schema",
+        "apply_produk_schema",
+        "apply_stock_schema",
+        "frame_memory_mb",
+    ),
+    "result_store": (
+        "ResultHandle",
+        "put_result",
+        "session_handle",
+        "session_view",
+        "enable_copy_on_write",
+    ),
+    "profiling": (
+        "profile_stage",
+        "profiled",
+        "record_stage",
+        "perf_checkpoint",
+        "perf_records",
+        "render_perf_panel",
+    ),
+    "sparse_grid": (
+        "SparseGrid",
+        "GRID_KEYS",
+        "GROUP_KEYS",
+    ),
+    "grid_filter": (
+        "GridFilter",
+        "ITEM_FILTER_COLS",
+    ),
+    "table_view": (
+        "render_paged_table",
+        "table_toggle",
+        "TABLE_PAGE_ROWS",
+    ),
+}
+
+_LAZY_NAMES = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value   # akses berikutnya tidak lewat __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
@@ -10,6 +10,8 @@ from googleapiclient.http import MediaIoBaseUpload
 import io
 import os
 import re
+import json
+import hashlib
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import xgboost as xgb  # Library tambahan untuk XGBoost
@@ -281,95 +283,324 @@ def build_features_xgb(df_daily_all, city, sku, weights, min_date, max_date):
     
     return train_data, latest_feature
 
-# 4 & 5. TRAINING & PREDIKSI HYBRID
+# 3b. FEATURE ENGINEERING BATCH (SEMUA CITY × SKU SEKALIGUS)
+# [PERFORMA] build_features_xgb memfilter seluruh df_daily untuk setiap pasangan dan
+# menjalankan rolling(90).apply(...) sebagai callback Python → O(pasangan × baris).
+# Versi batch membentuk satu matriks dense (hari × pasangan) lalu menghitung lag,
+# rolling mean/std, target, dan WMA 90 hari sebagai operasi array untuk semua seri.
+# Hasilnya sama dengan build_features_xgb per pasangan (urutan baris juga sama).
+XGB_FEATURES = ['SO_WMA_t', 'Demand_t1', 'Demand_t7', 'Demand_t30',
+                'RollingMean_7', 'RollingMean_30', 'RollingStd_30', 'DayOfWeek', 'Month']
+XGB_FEATURE_BATCH = 2000  # jumlah pasangan per batch → membatasi memori matriks
+
+def rolling_weighted_sum(Q, weights):
+    # Σ weights[j] · Q[t-n+1+j] untuk setiap kolom Q (NaN untuk t < n-1).
+    # Bobot dipecah menjadi segmen bernilai konstan → selisih cumsum per segmen
+    # (bobot WMA 0.2/0.3/0.5 hanya 3 segmen).
+    w = np.asarray(weights, dtype=float)
+    n, T = len(w), Q.shape[0]
+    out = np.full(Q.shape, np.nan)
+    if T < n:
+        return out
+    C = np.vstack([np.zeros((1, Q.shape[1])), np.cumsum(Q, axis=0)])
+    bounds = np.flatnonzero(np.diff(w)) + 1
+    acc = np.zeros((T - n + 1, Q.shape[1]))
+    for s, e in zip(np.r_[0, bounds], np.r_[bounds, n]):
+        acc += w[s] * (C[e:T - n + 1 + e] - C[s:T - n + 1 + s])
+    out[n - 1:] = acc
+    return out
+
+def build_features_xgb_batch(df_daily_all, list_sku_city, weights, min_date, max_date, progress_cb=None, train_since=None):
+    # Mengembalikan (X_train, y_train, latest):
+    #   X_train, y_train : numpy array siap fit (urutan pasangan → tanggal)
+    #   latest           : DataFrame fitur hari terakhir per pasangan (City, No. Barang)
+    # train_since: hanya baris training dengan tanggal > train_since (warm-start)
+    full_idx = pd.date_range(start=min_date, end=max_date, freq='D')
+    T = len(full_idx)
+    empty = (np.empty((0, len(XGB_FEATURES))), np.empty(0), pd.DataFrame(columns=['City', 'No. Barang'] + XGB_FEATURES))
+    if T < 60 or len(list_sku_city) == 0:
+        return empty
+
+    # Posisi hari & pasangan untuk setiap baris df_daily. Tanggal di luar kalender
+    # harian dibuang (sama seperti reindex); pasangan tanpa baris sama sekali dilewati.
+    pairs = pd.MultiIndex.from_tuples([tuple(p) for p in list_sku_city], names=['City', 'No. Barang']).unique()
+    daily_keys = pd.MultiIndex.from_frame(df_daily_all[['City', 'No. Barang']])
+    has_data = pairs.isin(daily_keys)
+
+    delta = (df_daily_all['Tgl Faktur'] - full_idx[0]).to_numpy()
+    day = delta // np.timedelta64(1, 'D')
+    pair_pos = pairs.get_indexer(daily_keys)
+    on_grid = (pair_pos >= 0) & (delta % np.timedelta64(1, 'D') == np.timedelta64(0, 'ns')) & (day >= 0) & (day < T)
+    qty = df_daily_all['Kuantitas'].to_numpy(dtype=float)[on_grid]
+    day, pair_pos = day[on_grid].astype(np.int64), pair_pos[on_grid]
+
+    train_days = np.ones(T, dtype=bool) if train_since is None else np.asarray(full_idx > train_since)
+
+    dow   = np.asarray(full_idx.dayofweek, dtype=float)
+    month = np.asarray(full_idx.month, dtype=float)
+
+    X_parts, y_parts, latest_parts = [], [], []
+    for start in range(0, len(pairs), XGB_FEATURE_BATCH):
+        stop = min(start + XGB_FEATURE_BATCH, len(pairs))
+        sel  = (pair_pos >= start) & (pair_pos < stop)
+        Q = np.zeros((T, stop - start))
+        Q[day[sel], pair_pos[sel] - start] = qty[sel]
+        Qdf = pd.DataFrame(Q)
+
+        # Target = log1p(rolling sum 30 hari ke depan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            target = np.log1p(Qdf.rolling(window=30, min_periods=1).sum().shift(-30).to_numpy())
+        feats = {
+            'SO_WMA_t':       rolling_weighted_sum(Q, weights),
+            'Demand_t1':      Qdf.shift(1).to_numpy(),
+            'Demand_t7':      Qdf.shift(7).to_numpy(),
+            'Demand_t30':     Qdf.shift(30).to_numpy(),
+            'RollingMean_7':  Qdf.rolling(window=7).mean().to_numpy(),
+            'RollingMean_30': Qdf.rolling(window=30).mean().to_numpy(),
+            'RollingStd_30':  Qdf.rolling(window=30).std().to_numpy(),
+            'DayOfWeek':      np.broadcast_to(dow[:, None], Q.shape),
+            'Month':          np.broadcast_to(month[:, None], Q.shape),
+        }
+        # (hari, pasangan, fitur) → (pasangan, hari, fitur): urutan baris = pasangan lalu tanggal
+        F = np.stack([feats[f] for f in XGB_FEATURES], axis=-1).transpose(1, 0, 2)
+        target = target.T
+        batch_has = has_data[start:stop]
+
+        train_mask = (~np.isnan(target) & ~np.isnan(F[:, :, 0]) & ~np.isnan(F[:, :, 6])) & batch_has[:, None] & train_days[None, :]
+        X_parts.append(F[train_mask])
+        y_parts.append(target[train_mask])
+
+        latest = pd.DataFrame(F[batch_has, -1, :], columns=XGB_FEATURES)
+        latest.insert(0, 'No. Barang', pairs.get_level_values(1)[start:stop][batch_has])
+        latest.insert(0, 'City', pairs.get_level_values(0)[start:stop][batch_has])
+        latest_parts.append(latest)
+
+        if progress_cb is not None:
+            progress_cb(stop, len(pairs))
+
+    if not X_parts:
+        return empty
+    return np.concatenate(X_parts), np.concatenate(y_parts), pd.concat(latest_parts, ignore_index=True)
+
+# 4. MODEL REGISTRY XGBOOST (persistensi di disk lokal)
+# Setiap model disimpan sebagai <model_id>.ubj (format native XGBoost) + <model_id>.json (manifest).
+# model_id = hash hyperparameter/fitur + fingerprint data training, sehingga rerun pada data
+# yang sama cukup memuat model. Jika hanya ada hari baru, boosting dilanjutkan dari model
+# sebelumnya (warm-start) memakai baris training yang baru mendapat label saja.
+XGB_MODEL_DIR = os.environ.get("XGB_MODEL_DIR", os.path.join(".cache", "xgb_models"))
+XGB_PARAMS = dict(
+    n_estimators=100,
+    learning_rate=0.05,
+    max_depth=4,
+    objective='reg:squarederror',
+    n_jobs=-1
+)
+XGB_INCREMENTAL_ROUNDS = 20   # tree tambahan per warm-start
+XGB_MAX_INCREMENTS = 5        # setelah 5 kali warm-start berturut-turut → retrain penuh
+XGB_KEEP_MODELS = 5           # model tersimpan per kombinasi hyperparameter
+XGB_STATUS_LABELS = {
+    'loaded': 'dimuat dari registry',
+    'incremental': 'warm-start dari model sebelumnya',
+    'trained': 'dilatih ulang penuh',
+}
+XGB_MANIFEST_COLS = ['model_id', 'params_key', 'data_fp', 'pairs_fp', 'min_date', 'max_date',
+                     'n_train', 'mode', 'increments', 'parent', 'created']
+
+def _sha1(*parts):
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else repr(p).encode('utf-8'))
+    return h.hexdigest()
+
+def xgb_params_key(params, weights):
+    # Identitas konfigurasi model: hyperparameter, daftar fitur, bobot WMA, versi xgboost
+    return _sha1(sorted(params.items()), XGB_FEATURES, list(weights), xgb.__version__)[:12]
+
+def xgb_data_fingerprint(df_daily, until=None):
+    # Hash isi df_daily (hasil groupby → urutan baris sudah deterministik),
+    # opsional hanya sampai tanggal `until` untuk mengecek apakah data lama berubah.
+    d = df_daily if until is None else df_daily[df_daily['Tgl Faktur'] <= pd.Timestamp(until)]
+    d = d[['City', 'No. Barang', 'Tgl Faktur', 'Kuantitas']]
+    return _sha1(pd.util.hash_pandas_object(d, index=False).to_numpy().tobytes())
+
+def _xgb_pairs_fingerprint(list_sku_city):
+    pairs = pd.DataFrame([tuple(p) for p in list_sku_city], columns=['City', 'No. Barang']).astype(str)
+    return _sha1(pd.util.hash_pandas_object(pairs, index=False).to_numpy().tobytes())
+
+def _xgb_model_paths(model_id, model_dir=XGB_MODEL_DIR):
+    base = os.path.join(model_dir, model_id)
+    return base + '.ubj', base + '.json'
+
+def list_xgb_models(model_dir=XGB_MODEL_DIR):
+    # Manifest semua model tersimpan, terbaru di atas
+    rows = []
+    if os.path.isdir(model_dir):
+        for name in os.listdir(model_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(model_dir, name), encoding='utf-8') as f:
+                    rows.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    if not rows:
+        return pd.DataFrame(columns=XGB_MANIFEST_COLS)
+    return pd.DataFrame(rows).reindex(columns=XGB_MANIFEST_COLS).sort_values('created', ascending=False, ignore_index=True)
+
+def load_xgb_model(model_id, model_dir=XGB_MODEL_DIR):
+    model_path, meta_path = _xgb_model_paths(model_id, model_dir)
+    if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+        return None
+    model = xgb.XGBRegressor()
+    try:
+        model.load_model(model_path)
+    except Exception:
+        # File model rusak/terpotong → hapus agar dilatih ulang
+        for path in (model_path, meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return None
+    return model
+
+def save_xgb_model(model, meta, model_dir=XGB_MODEL_DIR):
+    os.makedirs(model_dir, exist_ok=True)
+    model_path, meta_path = _xgb_model_paths(meta['model_id'], model_dir)
+    model.save_model(model_path)
+    # Manifest ditulis terakhir (atomic) → manifest ada berarti file model lengkap
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+def prune_xgb_models(keep=XGB_KEEP_MODELS, max_age_days=None, model_dir=XGB_MODEL_DIR):
+    # Sisakan `keep` model terbaru per params_key (dan hapus yang lebih tua dari max_age_days).
+    # Mengembalikan jumlah model yang dihapus.
+    models = list_xgb_models(model_dir)
+    if models.empty:
+        return 0
+    drop = models.groupby('params_key').cumcount() >= keep
+    if max_age_days is not None:
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec='seconds')
+        drop |= models['created'] < cutoff
+    for model_id in models.loc[drop, 'model_id']:
+        for path in _xgb_model_paths(model_id, model_dir):
+            if os.path.exists(path):
+                os.remove(path)
+    return int(drop.sum())
+
+def retrain_xgb_if_stale(df_daily, list_sku_city, weights, params=XGB_PARAMS, model_dir=XGB_MODEL_DIR, progress_cb=None):
+    # Mengembalikan (model, latest_features, meta). meta['status']:
+    #   'loaded'      : data & konfigurasi sama → model dimuat dari disk
+    #   'incremental' : hanya ada hari baru → boosting dilanjutkan dari model sebelumnya
+    #   'trained'     : training penuh
+    #   'empty'       : tidak ada data training (model = None)
+    if df_daily.empty:
+        return None, pd.DataFrame(columns=['City', 'No. Barang'] + XGB_FEATURES), {'status': 'empty'}
+    min_date = df_daily['Tgl Faktur'].min()
+    max_date = df_daily['Tgl Faktur'].max()
+    params_key = xgb_params_key(params, weights)
+    data_fp  = xgb_data_fingerprint(df_daily)
+    pairs_fp = _xgb_pairs_fingerprint(list_sku_city)
+    meta = {
+        'model_id': f"{params_key}_{_sha1(data_fp, pairs_fp)[:16]}",
+        'params_key': params_key, 'data_fp': data_fp, 'pairs_fp': pairs_fp,
+        'min_date': str(min_date.date()), 'max_date': str(max_date.date()),
+    }
+
+    # 1. Model untuk data yang persis sama → cukup bentuk fitur hari terakhir
+    model = load_xgb_model(meta['model_id'], model_dir)
+    if model is not None:
+        _, _, latest = build_features_xgb_batch(df_daily, list_sku_city, weights, min_date, max_date,
+                                                progress_cb=progress_cb, train_since=max_date)
+        return model, latest, {**meta, 'status': 'loaded'}
+
+    # 2. Warm-start: konfigurasi, pasangan SKU × City & awal data sama, data lama
+    #    tidak berubah, hanya ada hari baru. Pasangan baru → histori lengkapnya
+    #    belum pernah dilatih → training penuh.
+    models = list_xgb_models(model_dir)
+    prev = models[
+        (models['params_key'] == params_key)
+        & (models['pairs_fp'] == pairs_fp)
+        & (models['min_date'] == meta['min_date'])
+        & (models['max_date'] < meta['max_date'])
+        & (models['increments'] < XGB_MAX_INCREMENTS)
+    ].sort_values('max_date', ascending=False)
+    base = None
+    if not prev.empty:
+        parent = prev.iloc[0]
+        if xgb_data_fingerprint(df_daily, until=parent['max_date']) == parent['data_fp']:
+            base = load_xgb_model(parent['model_id'], model_dir)
+
+    if base is not None:
+        # Target = penjualan 30 hari ke depan → baris yang baru berlabel: tanggal > max lama - 30 hari
+        since = pd.Timestamp(parent['max_date']) - pd.Timedelta(days=30)
+        X_np, y_np, latest = build_features_xgb_batch(df_daily, list_sku_city, weights, min_date, max_date,
+                                                      progress_cb=progress_cb, train_since=since)
+        model = base
+        if len(X_np):
+            model = xgb.XGBRegressor(**{**params, 'n_estimators': XGB_INCREMENTAL_ROUNDS})
+            model.fit(X_np, y_np, xgb_model=base.get_booster())
+        meta.update(status='incremental', mode='incremental', n_train=int(len(X_np)),
+                    increments=int(parent['increments']) + 1, parent=parent['model_id'])
+    else:
+        # 3. Training penuh
+        X_np, y_np, latest = build_features_xgb_batch(df_daily, list_sku_city, weights, min_date, max_date,
+                                                      progress_cb=progress_cb)
+        if len(X_np) == 0:
+            return None, latest, {**meta, 'status': 'empty'}
+        model = xgb.XGBRegressor(**params)
+        # Gunakan numpy array untuk fit
+        model.fit(X_np, y_np)
+        meta.update(status='trained', mode='full', n_train=int(len(X_np)), increments=0, parent=None)
+
+    meta['created'] = datetime.now().isoformat(timespec='seconds')
+    save_xgb_model(model, {k: v for k, v in meta.items() if k != 'status'}, model_dir)
+    prune_xgb_models(model_dir=model_dir)
+    return model, latest, meta
+
+# 5. TRAINING & PREDIKSI HYBRID
 def predict_hybrid_so(df_penjualan, list_sku_city):
     # Agregasi penjualan harian
     df_daily = df_penjualan.groupby(['City', 'No. Barang', 'Tgl Faktur'])['Kuantitas'].sum().reset_index()
     
-    # Tentukan range tanggal global untuk reindexing
-    min_date = df_daily['Tgl Faktur'].min()
-    max_date = df_daily['Tgl Faktur'].max()
-    
     # Penyiapan bobot WMA (Sum = 30, Skala Bulanan)
     w = [0.2]*30 + [0.3]*30 + [0.5]*30 
     
-    results = []
-    
     # Progress bar
     progress_text = "Menjalankan Algorithm Hybrid_WMA_XGBoost_Forecasting..."
     my_bar = st.progress(0, text=progress_text)
-    total = len(list_sku_city)
-    
-    # Training Global Model
-    all_train_data = []
-    latest_features_map = {}
 
-    for i, (city, sku) in enumerate(list_sku_city):
-        if i % 50 == 0:
-            my_bar.progress(i/total, text=f"{progress_text} (Building Features {i}/{total})")
-            
-        train_df, latest_f = build_features_xgb(df_daily, city, sku, w, min_date, max_date)
-        if not train_df.empty:
-            all_train_data.append(train_df)
-        if latest_f is not None:
-            latest_features_map[(city, sku)] = latest_f
+    def _on_batch(done, total):
+        my_bar.progress(0.8 * done / total, text=f"{progress_text} (Building Features {done}/{total})")
 
-    if not all_train_data:
+    # Training Global Model — dimuat dari registry / warm-start / training penuh
+    model, latest_features, model_meta = retrain_xgb_if_stale(df_daily, list_sku_city, w, progress_cb=_on_batch)
+
+    if model is None:
         my_bar.empty()
         return pd.DataFrame() # Return empty if no training data
 
-    full_train_df = pd.concat(all_train_data)
-    
-    # [FIX] Reset Index sangat penting agar tidak ada index duplikat yang membingungkan XGBoost
-    full_train_df.reset_index(drop=True, inplace=True)
-    
-    # Define Features
-    features = ['SO_WMA_t', 'Demand_t1', 'Demand_t7', 'Demand_t30', 
-                'RollingMean_7', 'RollingMean_30', 'RollingStd_30', 'DayOfWeek', 'Month']
-    
-    X = full_train_df[features]
-    y = full_train_df['target'] 
-    
-    # [FIX] Konversi ke Numpy Array (.values) dan float untuk menghindari error metadata Pandas dan tipe object
-    X_np = X.astype(float).values
-    y_np = y.astype(float).values
-
-    # 4. Train XGBoost
-    model = xgb.XGBRegressor(
-        n_estimators=100,
-        learning_rate=0.05,
-        max_depth=4, 
-        objective='reg:squarederror',
-        n_jobs=-1
-    )
-    
-    # Gunakan numpy array untuk fit
-    model.fit(X_np, y_np)
-    
-    # 5. Predict Hybrid
+    # 5. Predict Hybrid — satu panggilan predict untuk semua pasangan dengan fitur lengkap
     my_bar.progress(0.9, text="Generating Hybrid Forecast...")
-    
-    for (city, sku), feat in latest_features_map.items():
-        # Cek kelengkapan fitur pada data terakhir
-        if feat[features].isnull().values.any():
-            # Fallback ke WMA jika fitur incomplete (misal data baru < 90 hari)
-            so_hybrid = feat['SO_WMA_t'].values[0] if 'SO_WMA_t' in feat else 0
-        else:
-            # Prediksi (Log Space)
-            # Pastikan input prediksi juga float numpy array
-            feat_X = feat[features].astype(float).values
-            pred_log = model.predict(feat_X)[0]
-            # Inverse Transform (Exp)
-            so_hybrid = np.expm1(pred_log)
-            
-        # Pastikan tidak negatif dan handling NaN
-        so_hybrid = max(0, float(so_hybrid))
-        if pd.isna(so_hybrid): so_hybrid = 0
-        
-        results.append({'City': city, 'No. Barang': sku, 'SO Hybrid': so_hybrid})
-    
+
+    feat_X = latest_features[XGB_FEATURES].to_numpy(dtype=float)
+    complete = ~np.isnan(feat_X).any(axis=1)
+    # Fallback ke WMA jika fitur incomplete (misal data baru < 90 hari)
+    so_hybrid = feat_X[:, 0].copy()
+    if complete.any():
+        # Prediksi (Log Space) → Inverse Transform (Exp)
+        so_hybrid[complete] = np.expm1(model.predict(feat_X[complete]))
+
+    # Pastikan tidak negatif dan handling NaN
+    so_hybrid = np.where(np.isnan(so_hybrid), 0.0, np.maximum(0.0, so_hybrid))
+
     my_bar.empty()
-    return pd.DataFrame(results)
+    st.caption(f"Model XGBoost: {XGB_STATUS_LABELS[model_meta['status']]} ({model_meta['model_id']})")
+    return pd.DataFrame({
+        'City': latest_features['City'].to_numpy(),
+        'No. Barang': latest_features['No. Barang'].to_numpy(),
+        'SO Hybrid': so_hybrid,
+    })
 
 # =====================================================================================
 # 			 			 	 	 ROUTING HALAMAN
@@ -6,15 +6,22 @@ Halaman Hasil Analisa ABC — dua metode Log-Benchmark (Mean & WMA).
 import numpy as np
 import pandas as pd
 import streamlit as st
-from io import BytesIO
 from datetime import datetime
 import matplotlib.pyplot as plt
 
 from utils import (
-    map_nama_dept,
-    map_city,
+    get_sales_cube,
+    prepare_produk_ref,
+    run_abc_analysis,
     classify_abc_log_benchmark,
     highlight_kategori_abc_log,
+    render_paged_table,
+    table_toggle,
+    render_export,
+    export_version,
+    profile_stage,
+    put_result,
+    session_handle,
 )
 
 
@@ -30,156 +37,105 @@ def render():
 
 # ── Tab Tabel ──────────────────────────────────────────────────────────────────
 def _render_table_tab():
-    if st.session_state.df_penjualan.empty or st.session_state.produk_ref.empty:
+    h_penjualan = session_handle("df_penjualan")
+    h_produk    = session_handle("produk_ref")
+    if h_penjualan is None or h_produk is None:
         st.warning("⚠️ Harap muat file **Penjualan** dan **Produk Referensi** di halaman **'Input Data'** terlebih dahulu.")
         st.stop()
 
-    # Preprocessing
-    so_df      = st.session_state.df_penjualan.copy()
-    produk_ref = st.session_state.produk_ref.copy()
-
-    for df in [so_df, produk_ref]:
-        if "No. Barang" in df.columns:
-            df["No. Barang"] = df["No. Barang"].astype(str).str.strip()
-
-    so_df.rename(columns={"Qty": "Kuantitas"}, inplace=True, errors="ignore")
-    so_df["Nama Dept"] = so_df.apply(map_nama_dept, axis=1)
-    so_df["City"]      = so_df["Nama Dept"].apply(map_city)
-
-    if "Kategori Barang" in produk_ref.columns:
-        produk_ref["Kategori Barang"] = produk_ref["Kategori Barang"].astype(str).str.strip().str.upper()
-    if "City" in so_df.columns:
-        so_df["City"] = so_df["City"].astype(str).str.strip().str.upper()
-
-    so_df["Tgl Faktur"] = pd.to_datetime(so_df["Tgl Faktur"], dayfirst=True, errors="coerce")
-    so_df.dropna(subset=["Tgl Faktur"], inplace=True)
+    # Cube agregat harian dari artefak penjualan bersama (sekali per versi dataset)
+    cube       = get_sales_cube(h_penjualan.view(), h_penjualan.version)
+    produk_ref = h_produk.derive("prepared", prepare_produk_ref)
 
     # Filter tanggal
     st.header("Filter Rentang Waktu Analisis ABC")
     st.info("Analisis akan didasarkan pada data penjualan 90 hari *sebelum* **Tanggal Akhir** yang dipilih.")
-    min_date = so_df["Tgl Faktur"].min().date()
-    max_date = so_df["Tgl Faktur"].max().date()
+    min_date = cube.min_date.date()
+    max_date = cube.max_date.date()
     end_date_input = st.date_input("Tanggal Akhir", value=max_date, min_value=min_date, max_value=max_date)
 
     if st.button("Jalankan Analisa ABC (2 Metode Log-Benchmark)"):
-        _run_abc_analysis(so_df, produk_ref, end_date_input)
+        _run_abc_analysis(cube, produk_ref, end_date_input)
 
-    if st.session_state.abc_analysis_result is None:
+    h_result = session_handle("abc_analysis_result")
+    if h_result is None:
         return
 
-    result_display = st.session_state.abc_analysis_result.copy()
-    result_display = result_display[result_display["City"] != "OTHERS"]
+    # Grid tanpa OTHERS dibentuk sekali per hasil, bukan di setiap interaksi filter
+    grid = h_result.derive("display", lambda g: g.drop_cities(["OTHERS"]))
 
     # Filter
     st.header("Filter Hasil Analisis")
     col_f1, col_f2 = st.columns(2)
     sel_kat   = col_f1.multiselect("Filter Kategori:",  sorted(produk_ref["Kategori Barang"].dropna().unique().astype(str)), key="abc_cat_filter")
     sel_brand = col_f2.multiselect("Filter Brand:",     sorted(produk_ref["BRAND Barang"].dropna().unique().astype(str)),    key="abc_brand_filter")
-    if sel_kat:   result_display = result_display[result_display["Kategori Barang"].astype(str).isin(sel_kat)]
-    if sel_brand: result_display = result_display[result_display["BRAND Barang"].astype(str).isin(sel_brand)]
+    if sel_kat:   grid = grid.filter_items(lambda d: d["Kategori Barang"].astype(str).isin(sel_kat))
+    if sel_brand: grid = grid.filter_items(lambda d: d["BRAND Barang"].astype(str).isin(sel_brand))
+
+    show_dense = st.checkbox(
+        "Tampilkan juga SKU tanpa penjualan",
+        value=False,
+        key="abc_show_dense",
+        help=f"{grid.n_implicit:,} kombinasi Kota × SKU tanpa penjualan (kategori F). "
+             "Tabel, pivot, dan unduhan akan memuat seluruh grid.",
+    )
 
     KEYS = ["No. Barang", "Kategori Barang", "BRAND Barang", "Nama Barang"]
 
-    # Tabel per kota
+    # Tabel per kota — frame kota dibentuk hanya jika tabelnya ditampilkan
     st.header("Hasil Analisis ABC per Kota")
-    for city in sorted(result_display["City"].unique()):
+    colored = st.checkbox("Warnai Kategori ABC", value=True, key="abc_table_colored",
+                          help="Tanpa warna tabel dirender lebih cepat (format angka di browser).")
+    col_order = [
+        "No. Barang", "BRAND Barang", "Nama Barang", "Kategori Barang",
+        "AVG Mean", "AVG WMA",
+        "Kategori ABC (Log-Benchmark - Mean)", "Kategori ABC (Log-Benchmark - WMA)",
+        "Log (10) Mean", "Avg Log Mean", "Ratio Log Mean",
+        "Log (10) WMA",  "Avg Log WMA",  "Ratio Log WMA",
+    ]
+    highlight = {
+        "Kategori ABC (Log-Benchmark - Mean)": highlight_kategori_abc_log,
+        "Kategori ABC (Log-Benchmark - WMA)":  highlight_kategori_abc_log,
+    } if colored else None
+    city_sizes = grid.city_sizes(dense=show_dense)
+    for city in grid.city_list(dense=show_dense):
         with st.expander(f"🏙️ Lihat Hasil ABC untuk Kota: {city}"):
-            city_df = result_display[result_display["City"] == city]
-            col_order = [
-                "No. Barang", "BRAND Barang", "Nama Barang", "Kategori Barang",
-                "AVG Mean", "AVG WMA",
-                "Kategori ABC (Log-Benchmark - Mean)", "Kategori ABC (Log-Benchmark - WMA)",
-                "Log (10) Mean", "Avg Log Mean", "Ratio Log Mean",
-                "Log (10) WMA",  "Avg Log WMA",  "Ratio Log WMA",
-            ]
-            display_cols = [c for c in col_order if c in city_df.columns]
-            df_show = city_df[display_cols]
-
-            fmt = {}
-            for col in df_show.columns:
-                if col in KEYS or not pd.api.types.is_numeric_dtype(df_show[col]):
-                    continue
-                fmt[col] = "{:.2f}" if any(x in col for x in ["Ratio", "Log", "Avg Log"]) else "{:.0f}"
-
-            style = df_show.style.format(fmt, na_rep="-")
-            if "Kategori ABC (Log-Benchmark - Mean)" in df_show.columns:
-                style = style.apply(lambda x: x.map(highlight_kategori_abc_log), subset=["Kategori ABC (Log-Benchmark - Mean)"])
-            if "Kategori ABC (Log-Benchmark - WMA)" in df_show.columns:
-                style = style.apply(lambda x: x.map(highlight_kategori_abc_log), subset=["Kategori ABC (Log-Benchmark - WMA)"])
-            st.dataframe(style, use_container_width=True)
+            if not table_toggle("Tampilkan tabel", f"abc_show_{city}", int(city_sizes.get(city, 0))):
+                continue
+            with profile_stage(f"render/abc/{city}") as rec:
+                city_df = grid.city_frame(city, dense=show_dense)
+                rec.rows_in = rec.rows_out = len(city_df)
+                display_cols = [c for c in col_order if c in city_df.columns]
+                render_paged_table(city_df[display_cols], key=f"abc_table_{city}", skip=KEYS, highlight=highlight)
 
     # Tabel Pivot Gabungan
     st.header("📊 Tabel Gabungan Seluruh Kota (ABC)")
     with st.spinner("Membuat tabel pivot gabungan..."):
-        _render_pivot_abc(result_display, KEYS, end_date_input)
-
-
-def _run_abc_analysis(so_df, produk_ref, end_date_input):
-    with st.spinner("Melakukan perhitungan analisis ABC..."):
-        end_dt   = pd.to_datetime(end_date_input)
-        start_90 = end_dt - pd.DateOffset(days=89)
-        df_90    = so_df[so_df["Tgl Faktur"].between(start_90, end_dt)]
-
-        if df_90.empty:
-            st.error("Tidak ada data penjualan pada rentang 90 hari yang dipilih.")
-            st.session_state.abc_analysis_result = None
-            return
-
-        def _sales(start, end, col):
-            return (
-                df_90[df_90["Tgl Faktur"].between(start, end)]
-                .groupby(["City", "No. Barang"])["Kuantitas"]
-                .sum().reset_index(name=col)
-            )
-
-        r1_end, r1_start = end_dt, end_dt - pd.DateOffset(days=29)
-        r2_end, r2_start = end_dt - pd.DateOffset(days=30), end_dt - pd.DateOffset(days=59)
-        r3_end, r3_start = end_dt - pd.DateOffset(days=60), end_dt - pd.DateOffset(days=89)
-
-        sales_m1 = _sales(r1_start, r1_end, "Penjualan Bln 1")
-        sales_m2 = _sales(r2_start, r2_end, "Penjualan Bln 2")
-        sales_m3 = _sales(r3_start, r3_end, "Penjualan Bln 3")
-
-        produk_ref.rename(columns={"Keterangan Barang": "Nama Barang", "Nama Kategori Barang": "Kategori Barang"}, inplace=True, errors="ignore")
-        barang_list = produk_ref[["No. Barang", "BRAND Barang", "Kategori Barang", "Nama Barang"]].drop_duplicates()
-        city_list   = so_df["City"].dropna().unique()
-
-        kombinasi = pd.MultiIndex.from_product([city_list, barang_list["No. Barang"]], names=["City", "No. Barang"]).to_frame(index=False)
-        grouped   = pd.merge(kombinasi, barang_list, on="No. Barang", how="left")
-        for sm in [sales_m1, sales_m2, sales_m3]:
-            grouped = pd.merge(grouped, sm, on=["City", "No. Barang"], how="left")
-        grouped.fillna({"Penjualan Bln 1": 0, "Penjualan Bln 2": 0, "Penjualan Bln 3": 0}, inplace=True)
-
-        grouped["AVG Mean"] = (grouped["Penjualan Bln 1"] + grouped["Penjualan Bln 2"] + grouped["Penjualan Bln 3"]) / 3
-        grouped["AVG WMA"]  = np.ceil(
-            grouped["Penjualan Bln 1"] * 0.5
-            + grouped["Penjualan Bln 2"] * 0.3
-            + grouped["Penjualan Bln 3"] * 0.2
+        # Grid dense hanya dibentuk jika diminta
+        result_display = grid.to_dense() if show_dense else grid.active
+        export_id = export_version(
+            h_result.version, sel_kat, sel_brand, show_dense
         )
+        with profile_stage("page/abc/pivot", rows_in=len(result_display)):
+            _render_pivot_abc(result_display, KEYS, end_date_input, export_id)
 
-        res_mean = classify_abc_log_benchmark(grouped.copy(), metric_col="AVG Mean")
-        res_wma  = classify_abc_log_benchmark(grouped.copy(), metric_col="AVG WMA")
 
-        MERGE_KEYS = ["City", "No. Barang", "BRAND Barang", "Kategori Barang", "Nama Barang",
-                      "Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3", "AVG Mean", "AVG WMA"]
-        result_final = res_mean.copy()
-        wma_extra = [c for c in res_wma.columns
-                     if any(x in c for x in ["Log-Benchmark - WMA", "Log (10) WMA", "Avg Log WMA", "Ratio Log WMA"])
-                     and c not in result_final.columns]
-        result_final = pd.merge(result_final, res_wma[["City", "No. Barang"] + wma_extra], on=["City", "No. Barang"], how="left")
+def _run_abc_analysis(cube, produk_ref, end_date_input):
+    with st.spinner("Melakukan perhitungan analisis ABC..."), \
+            profile_stage("page/abc/analisis", rows_in=len(produk_ref)) as rec:
+        result = run_abc_analysis(cube, produk_ref, end_date_input)
+        rec.rows_out = len(result.active) if result is not None else 0
 
-        for col in ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3", "AVG Mean", "AVG WMA"]:
-            if col in result_final.columns:
-                result_final[col] = result_final[col].round(0).astype(int)
-        for col in ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA", "Log (10) Mean", "Avg Log Mean", "Ratio Log Mean"]:
-            if col in result_final.columns:
-                result_final[col] = result_final[col].round(2)
+    if result is None:
+        st.error("Tidak ada data penjualan pada rentang 90 hari yang dipilih.")
+        st.session_state.abc_analysis_result = None
+        return
 
-        st.session_state.abc_analysis_result = result_final.copy()
-        st.success("✅ Analisis ABC (2 Metode Log-Benchmark) berhasil dijalankan!")
+    st.session_state.abc_analysis_result = put_result("abc", result)
+    st.success("✅ Analisis ABC (2 Metode Log-Benchmark) berhasil dijalankan!")
 
 
-def _render_pivot_abc(result_display, KEYS, end_date_input):
+def _render_pivot_abc(result_display, KEYS, end_date_input, export_id=""):
     pivot_values = [
         "Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3", "AVG Mean", "AVG WMA",
         "Kategori ABC (Log-Benchmark - Mean)", "Ratio Log Mean", "Log (10) Mean", "Avg Log Mean",
@@ -202,8 +158,8 @@ def _render_pivot_abc(result_display, KEYS, end_date_input):
             total[col] = total[col].round(0).astype(int)
 
     total["City"] = "ALL"
-    abc_mean_all = classify_abc_log_benchmark(total.copy(), metric_col="AVG Mean")
-    abc_wma_all  = classify_abc_log_benchmark(total.copy(), metric_col="AVG WMA")
+    abc_mean_all = classify_abc_log_benchmark(total, metric_col="AVG Mean")
+    abc_wma_all  = classify_abc_log_benchmark(total, metric_col="AVG WMA")
 
     total_final = total.drop(columns=["City"], errors="ignore")
     for src, kw in [(abc_mean_all, ["Log-Benchmark - Mean", "Log (10) Mean", "Avg Log Mean", "Ratio Log Mean"]),
@@ -233,28 +189,30 @@ def _render_pivot_abc(result_display, KEYS, end_date_input):
     for c in float_cols: col_cfg[c] = st.column_config.NumberColumn(format="%.2f")
     st.dataframe(df_style, column_config=col_cfg, use_container_width=True)
 
-    # Download
+    # Download — file hanya dibentuk saat diminta
     st.header("💾 Unduh Hasil Analisis ABC")
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df_style.to_excel(writer, sheet_name="All Cities Pivot", index=False)
-        for city in sorted(result_display["City"].unique()):
-            result_display[result_display["City"] == city].to_excel(writer, sheet_name=city[:31], index=False)
-    st.download_button(
-        "📥 Unduh Hasil Analisis ABC (Excel)",
-        data=output.getvalue(),
-        file_name=f"Hasil_Analisis_ABC_{end_date_input}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    render_export(
+        key="abc_export",
+        version=export_id,
+        build_sheets=lambda: {
+            "All Cities Pivot": df_style,
+            **{city: city_df for city, city_df in result_display.groupby("City", sort=True)},
+        },
+        build_table=lambda: result_display,
+        file_stem=f"Hasil_Analisis_ABC_{end_date_input}",
+        label="📥 Unduh Hasil Analisis ABC",
     )
 
 
 # ── Tab Dashboard ──────────────────────────────────────────────────────────────
 def _render_dashboard_tab():
-    if st.session_state.abc_analysis_result is None:
+    h_result = session_handle("abc_analysis_result")
+    if h_result is None:
         st.info("Tidak ada data untuk ditampilkan. Jalankan analisis terlebih dahulu.")
         return
 
-    result = st.session_state.abc_analysis_result.copy()
+    grid   = h_result.view()
+    result = grid.active
     metode = st.selectbox("Pilih Metode ABC untuk Dashboard:", ("Log-Benchmark - WMA", "Log-Benchmark - Mean"))
 
     if metode == "Log-Benchmark - WMA":
@@ -262,7 +220,7 @@ def _render_dashboard_tab():
     else:
         kat_col, metric_col = "Kategori ABC (Log-Benchmark - Mean)", "AVG Mean"
 
-    if result.empty:
+    if grid.empty:
         st.info("Tidak ada data untuk ditampilkan.")
         return
 
@@ -273,6 +231,8 @@ def _render_dashboard_tab():
     for label in LABELS:
         if label not in summary.index:
             summary.loc[label] = [0, 0]
+    # Baris implisit (tanpa penjualan) = kelas F dengan metrik 0
+    summary.loc["F", "count"] += grid.n_implicit
     summary = summary.reindex(LABELS).fillna(0)
     total_sum = summary["sum"].sum()
     summary["avg_unit"] = np.where(summary["count"] > 0, summary["sum"] / summary["count"], 0)
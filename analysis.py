@@ -7,7 +7,9 @@ import math
 import numpy as np
 import pandas as pd
 import streamlit as st
-from io import BytesIO
+
+from .export import frames_to_xlsx_bytes
+from .profiling import profiled
 
 
 # ── Konstanta Multiplier ───────────────────────────────────────────────────────
@@ -54,37 +56,14 @@ def get_days_multiplier(kategori: str) -> float:
     return DAYS_MULTIPLIER.get(kategori, 1.0)
 
 
-def map_nama_dept(row) -> str:
-    dept = str(row.get("Dept.", "")).strip().upper()
-    pelanggan = str(row.get("Nama Pelanggan", "")).strip().upper()
-    if dept == "A":
-        if pelanggan in ["A - CASH", "AIRPAY INTERNATIONAL INDONESIA", "TOKOPEDIA"]:
-            return "A - ITC"
-        return "A - RETAIL"
-    mapping = {
-        "B": "B - JKT", "C": "C - PUSAT", "D": "D - SMG",
-        "E": "E - JOG", "F": "F - MLG", "G": "G - PROJECT",
-        "H": "H - BALI", "X": "X",
-    }
-    return mapping.get(dept, "X")
-
-
-def map_city(nama_dept: str) -> str:
-    if nama_dept in ["A - ITC", "A - RETAIL", "C - PUSAT", "G - PROJECT"]:
-        return "Surabaya"
-    city_map = {
-        "B - JKT": "Jakarta", "D - SMG": "Semarang",
-        "E - JOG": "Jogja",   "F - MLG": "Malang", "H - BALI": "Bali",
-    }
-    return city_map.get(nama_dept, "Others")
-
-
-@st.cache_data
+@profiled("export/xlsx")
 def convert_df_to_excel(df: pd.DataFrame) -> bytes:
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Sheet1")
-    return output.getvalue()
+    """
+    DataFrame → bytes xlsx (workbook write-only, streaming per chunk).
+    Tidak lagi memakai st.cache_data (hashing seluruh frame di setiap rerun);
+    untuk tombol unduh gunakan export.render_export yang di-cache per versi.
+    """
+    return frames_to_xlsx_bytes({"Sheet1": df})
 
 
 # ── WMA ────────────────────────────────────────────────────────────────────────
@@ -108,19 +87,74 @@ def calculate_daily_wma(group: pd.DataFrame, end_date) -> float:
     return math.ceil(wma)
 
 
+BULAN_BUCKET_COLS = ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3"]
+
+
+@profiled("analysis/bucket_30d")
+def bucket_sales_30d(df: pd.DataFrame, end_date, keys=("City", "No. Barang")) -> pd.DataFrame:
+    """
+    Jumlahkan Kuantitas ke tiga bucket 30 hari untuk SEMUA grup dalam satu pass.
+    Bucket ditentukan dari selisih waktu terhadap end_date (0–29 hari → Bln 1,
+    30–59 → Bln 2, 60–89 → Bln 3), identik dengan rentang `between` pada
+    calculate_daily_wma. Grup tanpa penjualan di suatu bucket bernilai 0.
+    """
+    keys = list(keys)
+    end_date = pd.to_datetime(end_date)
+    delta = end_date - df["Tgl Faktur"]
+    day = pd.Timedelta(days=1)
+    bucket = np.select(
+        [
+            (delta >= 0 * day) & (delta <= 29 * day),
+            (delta >= 30 * day) & (delta <= 59 * day),
+            (delta >= 60 * day) & (delta <= 89 * day),
+        ],
+        [1, 2, 3],
+        default=0,
+    )
+
+    # Bucket 0 ikut di-group agar grup tanpa penjualan di 3 bucket tetap muncul
+    pivot = (
+        df[keys + ["Kuantitas"]]
+        .assign(_bucket=bucket)
+        .groupby(keys + ["_bucket"], observed=True)["Kuantitas"]
+        .sum()
+        .unstack("_bucket", fill_value=0)
+        .reindex(columns=[1, 2, 3], fill_value=0)
+    )
+    pivot.columns = BULAN_BUCKET_COLS
+    return pivot.reset_index()
+
+
+def calculate_wma_from_buckets(df_buckets: pd.DataFrame) -> pd.Series:
+    """Hitung WMA (di-ceil) dari kolom Penjualan Bln 1/2/3 secara vectorized."""
+    wma = (
+        df_buckets["Penjualan Bln 1"] * 0.5
+        + df_buckets["Penjualan Bln 2"] * 0.3
+        + df_buckets["Penjualan Bln 3"] * 0.2
+    )
+    return np.ceil(wma)
+
+
 # ── ABC Log-Benchmark ──────────────────────────────────────────────────────────
+ABC_LOG_LABELS     = ["A", "B", "C", "D", "E"]
+ABC_LOG_THRESHOLDS = [2, 1.5, 1, 0.5]   # ratio > threshold → label, sisanya E
+
+
+@profiled("analysis/abc_log")
 def classify_abc_log_benchmark(df_grouped: pd.DataFrame, metric_col: str) -> pd.DataFrame:
     """
     Klasifikasi ABC menggunakan metode Log-Benchmark.
 
     FIX pembagian nol: ratio sekarang menggunakan np.where agar tidak
     menghasilkan inf ketika avg_log_col == 0 (fillna(0) tidak handle inf).
-    """
-    df = df_grouped.copy()
 
-    if "Kategori Barang" not in df.columns:
+    FIX performa: sepenuhnya vectorized — benchmark per City × Kategori Barang
+    lewat groupby-transform (tanpa merge), kategori lewat np.select (tanpa
+    apply(axis=1)). df_grouped tidak dimodifikasi; index dipertahankan.
+    """
+    if "Kategori Barang" not in df_grouped.columns:
         st.warning("Kolom 'Kategori Barang' tidak ada untuk metode benchmark.")
-        return df
+        return df_grouped.copy()
 
     clean_metric   = metric_col.replace("SO ", "").replace("AVG ", "")
     log_col        = f"Log (10) {clean_metric}"
@@ -128,52 +162,44 @@ def classify_abc_log_benchmark(df_grouped: pd.DataFrame, metric_col: str) -> pd.
     ratio_col      = f"Ratio Log {clean_metric}"
     kategori_col   = f"Kategori ABC (Log-Benchmark - {clean_metric})"
 
+    metric = pd.to_numeric(df_grouped[metric_col], errors="coerce").to_numpy(dtype=float)
+
     # 1. Bulatkan metrik (sinkron dengan Excel)
-    df["_rounded"] = df[metric_col].apply(np.round)
+    rounded = np.round(metric)
 
     # 2. Log individu (minimum input = 1 agar log tidak negatif)
-    df["_log_input"] = np.maximum(1, df["_rounded"]).astype(float)
-    df[log_col] = np.where(df[metric_col] > 0, np.log10(df["_log_input"]), np.nan)
+    with np.errstate(invalid="ignore"):
+        log_val = np.where(metric > 0, np.log10(np.fmax(1.0, rounded)), np.nan)
 
     # 3. Rata-rata log per City × Kategori Barang (hanya rounded >= 1)
-    valid = df[df["_rounded"] >= 1]
-    avg_ref = (
-        valid.groupby(["City", "Kategori Barang"])[log_col]
-        .mean()
-        .reset_index()
-        .rename(columns={log_col: avg_log_col})
+    valid_log = pd.Series(np.where(rounded >= 1, log_val, np.nan), index=df_grouped.index)
+    avg_log = (
+        valid_log.groupby([df_grouped["City"], df_grouped["Kategori Barang"]], observed=True)
+        .transform("mean")
+        .fillna(0)
+        .to_numpy()
     )
 
-    df.drop(columns=[avg_log_col], errors="ignore", inplace=True)
-    df = pd.merge(df, avg_ref, on=["City", "Kategori Barang"], how="left")
-    df[avg_log_col] = df[avg_log_col].fillna(0)
-
-    # 4. Rasio — FIX: gunakan np.where agar avg=0 → ratio=0 (bukan inf)
-    df[ratio_col] = np.where(
-        df[avg_log_col] != 0,
-        df[log_col] / df[avg_log_col],
-        0,
-    ).astype(float)
-
-    # 5. Kategorisasi
-    df[kategori_col] = df.apply(_apply_category_log, axis=1,
-                                 args=(metric_col, ratio_col))
-
-    df.drop(columns=["_rounded", "_log_input"], errors="ignore", inplace=True)
+    # 4. Rasio — FIX: avg=0 → ratio=0 (bukan inf)
+    nonzero = avg_log != 0
+    ratio = np.zeros(len(metric), dtype=float)
+    np.divide(log_val, avg_log, out=ratio, where=nonzero)
+
+    # 5. Kategorisasi: F untuk metrik <= 0 / NaN, lalu ambang ratio A–E
+    kategori = np.select(
+        [~(metric > 0)] + [ratio > t for t in ABC_LOG_THRESHOLDS],
+        ["F"] + ABC_LOG_LABELS[:-1],
+        default=ABC_LOG_LABELS[-1],
+    ).astype(object)
+
+    df = df_grouped.drop(columns=[avg_log_col], errors="ignore")
+    df[log_col]      = log_val
+    df[avg_log_col]  = avg_log
+    df[ratio_col]    = ratio
+    df[kategori_col] = kategori
     return df
 
 
-def _apply_category_log(row, metric_col: str, ratio_col: str) -> str:
-    if row[metric_col] <= 0 or pd.isna(row[metric_col]):
-        return "F"
-    ratio = row[ratio_col]
-    if ratio > 2:   return "A"
-    if ratio > 1.5: return "B"
-    if ratio > 1:   return "C"
-    if ratio > 0.5: return "D"
-    return "E"
-
-
 # ── Min & Max Stock (Vectorized) ───────────────────────────────────────────────
 def calculate_min_stock(df: pd.DataFrame, kategori_col: str, so_col: str) -> pd.Series:
     """
@@ -234,6 +260,52 @@ def hitung_po_cabang_baru(stock_surabaya, stock_cabang, stock_total,
         return 0
 
 
+@profiled("analysis/suggested_po")
+def calculate_suggested_po(df: pd.DataFrame,
+                           stock_sby_col: str = "Stock Surabaya",
+                           stock_col: str = "Stock Cabang",
+                           stock_total_col: str = "Stock Total",
+                           total_add_col: str = "Total Add Stock All",
+                           so_col: str = "SO WMA",
+                           add_stock_col: str = "Add Stock") -> pd.Series:
+    """
+    Versi vectorized dari hitung_po_cabang_baru (cabang logika identik).
+    NaN float mengikuti perbandingan skalar (selalu False). Baris dengan
+    nilai non-angka (None, pd.NA, teks) → 0, setara fallback TypeError;
+    baris yang di versi skalar gagal round(NaN) juga → 0.
+    Pembulatan np.rint = round() Python (half-to-even).
+    """
+    cols = [stock_sby_col, stock_col, stock_total_col, total_add_col, so_col, add_stock_col]
+    vals, bad = zip(*(_float_values(df[c]) for c in cols))
+    stock_sby, stock_cabang, stock_total, total_add, so_cabang, add_stock = vals
+
+    perlu_po = (stock_total < total_add) & (stock_cabang < so_cabang)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ideal_po = np.rint((stock_cabang + add_stock) / stock_total * stock_sby - stock_cabang)
+
+    po = np.select(
+        [np.logical_or.reduce(bad) | (stock_sby < add_stock), perlu_po & (stock_total > 0), perlu_po],
+        [0, np.maximum(0, ideal_po), 0],
+        default=np.rint(add_stock),
+    )
+    return pd.Series(np.nan_to_num(po, nan=0).astype(np.int64), index=df.index)
+
+
+def _float_values(s: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (nilai float, mask non-angka). NaN float tetap NaN (bukan non-angka);
+    None / pd.NA / teks pada kolom object atau nullable → non-angka.
+    """
+    if pd.api.types.is_numeric_dtype(s):
+        if pd.api.types.is_extension_array_dtype(s.dtype):      # Int64/Float64: pd.NA
+            return s.to_numpy(dtype=float, na_value=np.nan), s.isna().to_numpy()
+        return s.to_numpy(dtype=float), np.zeros(len(s), dtype=bool)
+    ok = s.map(lambda x: isinstance(x, (int, float, np.number)) and x is not pd.NA)
+    bad = ~ok.to_numpy(dtype=bool, na_value=False)
+    values = pd.to_numeric(s.astype(object).where(~bad), errors="coerce").to_numpy(dtype=float)
+    return values, bad
+
+
 # ── Status Stock ───────────────────────────────────────────────────────────────
 def get_status_stock(row) -> str:
     kategori = row.get("Kategori ABC (Log-Benchmark - WMA)", "")
@@ -245,7 +317,28 @@ def get_status_stock(row) -> str:
     return "-"
 
 
+@profiled("analysis/status_stock")
+def calculate_status_stock(df: pd.DataFrame,
+                           kategori_col: str = "Kategori ABC (Log-Benchmark - WMA)",
+                           stock_col: str = "Stock Cabang",
+                           min_stock_col: str = "Min Stock",
+                           max_stock_col: str = "Max Stock") -> pd.Series:
+    """Versi vectorized dari get_status_stock (urutan cabang identik)."""
+    stock     = pd.to_numeric(df[stock_col], errors="coerce").to_numpy(dtype=float)
+    min_stock = pd.to_numeric(df[min_stock_col], errors="coerce").to_numpy(dtype=float)
+    max_stock = pd.to_numeric(df[max_stock_col], errors="coerce").to_numpy(dtype=float)
+    is_f = (df[kategori_col] == "F").to_numpy() if kategori_col in df.columns else np.zeros(len(df), bool)
+
+    status = np.select(
+        [is_f & (stock > 2), is_f, stock > max_stock, stock < min_stock, stock >= min_stock],
+        ["Overstock F", "Balance", "Overstock", "Understock", "Balance"],
+        default="-",
+    )
+    return pd.Series(status.astype(object), index=df.index)
+
+
 # ── Stock Cabang Melt ──────────────────────────────────────────────────────────
+@profiled("analysis/melt_stock")
 def melt_stock_by_city(stock_df_raw: pd.DataFrame) -> pd.DataFrame:
     """Ubah kolom-kolom gudang menjadi format panjang (City, Stock)."""
     stok_cols = [c for c in stock_df_raw.columns if c not in ["No. Barang", "Keterangan Barang"]]
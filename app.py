@@ -19,6 +19,11 @@ import streamlit as st
 # ── Konfigurasi Halaman ────────────────────────────────────────────────────────
 st.set_page_config(layout="wide", page_title="Analisis Stock & ABC")
 
+# Dataset di session state dibagi sebagai view copy-on-write (utils/result_store.py)
+from utils.result_store import enable_copy_on_write
+
+enable_copy_on_write()
+
 # ── Sidebar ────────────────────────────────────────────────────────────────────
 st.sidebar.image(
     "https://eq-cdn.equiti-me.com/website/images/What_does_a_stock_split_mean.2e16d0ba.fill-1600x900.jpg",
@@ -35,19 +40,26 @@ st.sidebar.markdown("---")
 
 # ── Inisialisasi Session State ─────────────────────────────────────────────────
 _defaults = {
-    "df_penjualan":         __import__("pandas").DataFrame(),
-    "produk_ref":           __import__("pandas").DataFrame(),
-    "df_stock":             __import__("pandas").DataFrame(),
+    # Dataset & hasil disimpan sebagai ResultHandle (utils/result_store.py)
+    "df_penjualan":         None,
+    "produk_ref":           None,
+    "df_stock":             None,
     "stock_filename":       "",
     "stock_analysis_result": None,
     "abc_analysis_result":  None,
     "bulan_columns_stock":  [],
     "df_portal_analyzed":   __import__("pandas").DataFrame(),
+    "penjualan_version":    "",
 }
 for key, default in _defaults.items():
     if key not in st.session_state:
         st.session_state[key] = default
 
+# ── Profiling (panel Performance di sidebar) ───────────────────────────────────
+from utils.profiling import perf_checkpoint, profile_stage, render_perf_panel
+
+perf_mark = perf_checkpoint()
+
 # ── Koneksi Google Drive (dilakukan sekali di sini) ────────────────────────────
 from utils.gdrive import init_drive_service
 
@@ -58,21 +70,26 @@ if not DRIVE_AVAILABLE:
         st.warning("Koneksi Google Drive tidak tersedia. Harap periksa kredensial.")
 
 # ── Routing Halaman ────────────────────────────────────────────────────────────
-if page == "Input Data":
-    if not DRIVE_AVAILABLE:
-        st.warning("Tidak dapat melanjutkan karena koneksi ke Google Drive gagal.")
-        st.stop()
-    from pages.input_data import render
-    render(drive_service)
-
-elif page == "Hasil Analisa Stock":
-    from pages.stock_analysis import render
-    render()
-
-elif page == "Hasil Analisa ABC":
-    from pages.abc_analysis import render
-    render()
-
-elif page == "Hasil Analisis Margin":
-    st.title("💰 Hasil Analisis Margin (Placeholder)")
-    st.info("Halaman ini adalah placeholder untuk analisis margin yang akan dikembangkan selanjutnya.")
+# Panel Performance dirender di akhir (juga saat halaman memanggil st.stop())
+try:
+    with profile_stage(f"page/{page}"):
+        if page == "Input Data":
+            if not DRIVE_AVAILABLE:
+                st.warning("Tidak dapat melanjutkan karena koneksi ke Google Drive gagal.")
+                st.stop()
+            from pages.input_data import render
+            render(drive_service)
+
+        elif page == "Hasil Analisa Stock":
+            from pages.stock_analysis import render
+            render()
+
+        elif page == "Hasil Analisa ABC":
+            from pages.abc_analysis import render
+            render()
+
+        elif page == "Hasil Analisis Margin":
+            st.title("💰 Hasil Analisis Margin (Placeholder)")
+            st.info("Halaman ini adalah placeholder untuk analisis margin yang akan dikembangkan selanjutnya.")
+finally:
+    render_perf_panel(since=perf_mark)
@@ -0,0 +1,280 @@
+"""
+utils/benchmark.py
+Benchmark pipeline analisis dengan data sintetis.
+
+Generator membuat data dengan skema yang sama seperti hasil baca file asli:
+    penjualan : export penjualan (No. Faktur, Tgl Faktur, Nama Pelanggan, Dept., ...)
+    produk    : read_produk_file  (PRODUK_COLUMNS)
+    stock     : read_stock_file   (STOCK_HEADER, kolom per gudang)
+Jumlah SKU, kota, hari, dan faktur dapat diatur. Popularitas SKU mengikuti
+distribusi Zipf dan stok sebagian besar nol, seperti data asli.
+
+Data mentah lebih dulu melewati skema ingestion (utils.schema), seperti di
+aplikasi. Setiap tahap diukur durasi dan puncak memorinya (tracemalloc). Hasil ditambahkan
+ke file riwayat JSON dan dibandingkan dengan run sebelumnya berparameter sama,
+sehingga regresi antar versi terlihat.
+
+    python -m utils.benchmark --skus 5000 --invoices 50000 --scale 1 2 4
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from .analysis import CITY_PREFIX_MAP, calculate_wma_from_buckets, classify_abc_log_benchmark, melt_stock_by_city
+from .engine import (
+    build_stock_pivot,
+    prepare_produk_ref,
+    prepare_stock,
+    run_abc_analysis,
+    run_stock_analysis,
+)
+from .export import EXPORT_FORMATS, build_export
+from .preprocess import mark_invoice_duplicates, preprocess_sales
+from .sales_cube import build_sales_cube
+from .schema import (
+    PRODUK_COLUMNS,
+    STOCK_HEADER,
+    apply_produk_schema,
+    apply_sales_schema,
+    apply_stock_schema,
+    frame_memory_mb,
+)
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+HISTORY_FILE         = os.environ.get("BENCHMARK_HISTORY", "benchmark_history.json")
+REGRESSION_RATIO     = 1.25   # lebih lambat ≥ 25% …
+REGRESSION_MIN_DELTA = 0.05   # … dan ≥ 50 ms → ditandai regresi
+PIVOT_KEYS           = ["No. Barang", "Kategori Barang", "BRAND Barang", "Nama Barang"]
+
+# Dept. → kota (lihat nama_dept_from / map_city); urutan = kota yang dipakai
+_CITY_DEPTS = [("SURABAYA", ["A", "C", "G"]), ("JAKARTA", ["B"]), ("SEMARANG", ["D"]),
+               ("JOGJA", ["E"]), ("MALANG", ["F"]), ("BALI", ["H"])]
+_PELANGGAN  = ["A - CASH", "TOKOPEDIA", "AIRPAY.ID", "D - SHOPEE", "B - CASH",
+               "PT MAJU JAYA", "CV SINAR", "TOKO KOMPUTER", "UMUM"]
+_BRANDS     = ["ASUS", "MSI", "LOGITECH", "GIGABYTE", "KINGSTON", "SAMSUNG", "ADATA", "REXUS"]
+_KATEGORI   = ["MOUSE", "KEYBOARD", "VGA", "RAM", "SSD", "MONITOR", "HEADSET", "PSU"]
+
+
+# ── Generator ──────────────────────────────────────────────────────────────────
+def make_synthetic_data(n_skus: int = 2000, n_cities: int = 6, n_days: int = 180,
+                        n_invoices: int = 20000, end_date="2024-06-30", dup_rate: float = 0.01,
+                        seed: int = 0) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """(penjualan, produk_ref, df_stock) sintetis dengan skema file asli."""
+    rng = np.random.default_rng(seed)
+    n_cities = max(1, min(n_cities, len(_CITY_DEPTS)))
+    skus = np.array([f"SKU-{i:06d}" for i in range(n_skus)], dtype=object)
+
+    # Penjualan: 1–5 baris per faktur, SKU populer (Zipf), sebagian kecil duplikat
+    lines_per_inv = rng.integers(1, 6, n_invoices)
+    n_lines = int(lines_per_inv.sum())
+    inv_idx = np.repeat(np.arange(n_invoices), lines_per_inv)
+    depts   = [d for _, ds in _CITY_DEPTS[:n_cities] for d in ds]
+    inv_day = rng.integers(0, n_days, n_invoices)
+    sku_pos = np.minimum(rng.zipf(1.3, n_lines) - 1, n_skus - 1)
+    sku_pos = rng.permutation(n_skus)[sku_pos]
+
+    penjualan = pd.DataFrame({
+        "No. Faktur":     np.char.add("INV/", inv_idx.astype(str)).astype(object),
+        "Tgl Faktur":     pd.Timestamp(end_date) - pd.to_timedelta(inv_day[inv_idx], unit="D"),
+        "Nama Pelanggan": rng.choice(np.array(_PELANGGAN, dtype=object), n_invoices)[inv_idx],
+        "Dept.":          rng.choice(np.array(depts, dtype=object), n_invoices)[inv_idx],
+        "No. Barang":     skus[sku_pos],
+        "Kuantitas":      rng.integers(1, 10, n_lines),
+    })
+    n_dup = int(n_lines * dup_rate)
+    if n_dup:
+        penjualan = pd.concat([penjualan, penjualan.sample(n_dup, random_state=seed)], ignore_index=True)
+
+    produk_ref = pd.DataFrame({
+        PRODUK_COLUMNS[0]: skus,
+        PRODUK_COLUMNS[1]: rng.choice(_BRANDS, n_skus),
+        PRODUK_COLUMNS[2]: rng.choice(_KATEGORI, n_skus),
+        PRODUK_COLUMNS[3]: [f"PRODUK {s}" for s in skus],
+    })
+
+    # Stock: hanya gudang kota terpilih yang terisi, ±5% SKU punya stok per gudang
+    city_cols = {c for city, _ in _CITY_DEPTS[:n_cities] for c in CITY_PREFIX_MAP[city]}
+    df_stock = pd.DataFrame({"No. Barang": skus, "Keterangan Barang": produk_ref[PRODUK_COLUMNS[3]]})
+    for col in STOCK_HEADER[2:]:
+        has = (rng.random(n_skus) < 0.05) & (col in city_cols)
+        df_stock[col] = np.where(has, rng.integers(1, 50, n_skus), 0)
+    return penjualan, produk_ref, df_stock
+
+
+# ── Pengukuran ─────────────────────────────────────────────────────────────────
+def _measure(stages: dict, name: str, fn, memory: bool = True):
+    """
+    Jalankan fn() dan catat durasi (detik) ke stages[name]. tracemalloc
+    memperlambat kode Python murni (mis. openpyxl) berkali lipat, sehingga
+    puncak alokasi (MB) diukur pada eksekusi kedua yang terpisah.
+    """
+    t0 = time.perf_counter()
+    out = fn()
+    stages[name] = {"seconds": round(time.perf_counter() - t0, 4), "peak_mb": None}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stages[name]["peak_mb"] = round(peak / 2**20, 2)
+    return out
+
+
+def run_benchmark(n_skus: int = 2000, n_cities: int = 6, n_days: int = 180, n_invoices: int = 20000,
+                  export_format: str = "xlsx", seed: int = 0, memory: bool = True) -> dict:
+    """Satu run benchmark penuh. Mengembalikan record siap disimpan ke riwayat."""
+    params = {"skus": n_skus, "cities": n_cities, "days": n_days,
+              "invoices": n_invoices, "format": export_format, "seed": seed}
+    penjualan_obj, produk_obj, stock_obj = make_synthetic_data(n_skus, n_cities, n_days, n_invoices, seed=seed)
+    end_date = penjualan_obj["Tgl Faktur"].max()
+
+    stages = {}
+    penjualan_raw, produk_raw, stock_raw = _measure(stages, "schema", lambda: (
+        apply_sales_schema(penjualan_obj), apply_produk_schema(produk_obj), apply_stock_schema(stock_obj),
+    ), memory)
+    dedup_input = penjualan_raw.assign(**{"No. Barang": penjualan_raw["No. Barang"].astype(str).str.strip()})
+    _measure(stages, "dedup", lambda: mark_invoice_duplicates(dedup_input), memory)
+    penjualan, _ = _measure(stages, "preprocess", lambda: preprocess_sales(penjualan_raw), memory)
+    cube         = _measure(stages, "cube", lambda: build_sales_cube(penjualan), memory)
+
+    def _wma():
+        buckets = cube.window_buckets(end_date)
+        buckets["AVG WMA"] = calculate_wma_from_buckets(buckets)
+        return buckets
+    buckets = _measure(stages, "wma", _wma, memory)
+    _measure(stages, "log_benchmark", lambda: classify_abc_log_benchmark(buckets, metric_col="AVG WMA"), memory)
+    _measure(stages, "melt_stock", lambda: melt_stock_by_city(stock_raw), memory)
+
+    produk_ref = prepare_produk_ref(produk_raw)
+    df_stock   = prepare_stock(stock_raw)
+    stock = _measure(stages, "stock_analysis", lambda: run_stock_analysis(cube, produk_ref, df_stock, end_date), memory)
+    _measure(stages, "abc_analysis", lambda: run_abc_analysis(cube, produk_ref, end_date), memory)
+    _measure(stages, "pivot", lambda: build_stock_pivot(stock.grid.active, stock.bulan_columns, PIVOT_KEYS), memory)
+    export_bytes = _measure(stages, "export", lambda: build_export(export_format, {"Sheet1": stock.grid.active}), memory)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "version":   _code_version(),
+        "python":    platform.python_version(),
+        "pandas":    pd.__version__,
+        "numpy":     np.__version__,
+        "params":    params,
+        "rows":      {"penjualan": len(penjualan_raw), "stock_active": len(stock.grid.active),
+                      "stock_dense": stock.grid.n_dense, "export_bytes": len(export_bytes)},
+        "memory_mb": {"penjualan_raw": frame_memory_mb(penjualan_obj), "penjualan": frame_memory_mb(penjualan_raw)},
+        "stages":    stages,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 4),
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+
+def _code_version() -> str:
+    """Commit git pendek (+ penanda perubahan lokal) untuk membandingkan versi."""
+    try:
+        here = os.path.dirname(os.path.abspath(__file__))
+        rev = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=here,
+                             capture_output=True, text=True, timeout=10).stdout.strip()
+        return rev or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def _max_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+# ── Riwayat ────────────────────────────────────────────────────────────────────
+def load_history(path: str = HISTORY_FILE) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_history(record: dict, path: str = HISTORY_FILE) -> None:
+    history = load_history(path) + [record]
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def compare_with_previous(record: dict, history: list) -> pd.DataFrame:
+    """
+    Bandingkan per tahap dengan run terakhir berparameter sama.
+    Kolom: Tahap, Detik, Sebelumnya, Rasio, Peak MB, Regresi.
+    """
+    prev = next((r for r in reversed(history) if r["params"] == record["params"]), None)
+    rows = []
+    for stage, m in record["stages"].items():
+        before = prev["stages"].get(stage, {}).get("seconds") if prev else None
+        ratio  = m["seconds"] / before if before else None
+        rows.append({
+            "Tahap":      stage,
+            "Detik":      m["seconds"],
+            "Sebelumnya": before,
+            "Rasio":      round(ratio, 2) if ratio else None,
+            "Peak MB":    m["peak_mb"],
+            "Regresi":    bool(ratio and ratio >= REGRESSION_RATIO
+                               and m["seconds"] - before >= REGRESSION_MIN_DELTA),
+        })
+    return pd.DataFrame(rows).astype({"Sebelumnya": float, "Rasio": float, "Peak MB": float})
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline analisis Stock & ABC dengan data sintetis.")
+    parser.add_argument("--skus", type=int, default=2000)
+    parser.add_argument("--cities", type=int, default=6, help=f"Jumlah kota (maks. {len(_CITY_DEPTS)}).")
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--invoices", type=int, default=20000)
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0],
+                        help="Faktor pengali SKU & faktur, mis. --scale 1 2 4 untuk melihat skalabilitas.")
+    parser.add_argument("--format", default="xlsx", choices=[ext for ext, _ in EXPORT_FORMATS.values()])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--no-memory", action="store_true", help="Lewati pengukuran puncak memori (lebih cepat).")
+    parser.add_argument("--no-save", action="store_true", help="Jangan tulis ke file riwayat.")
+    args = parser.parse_args(argv)
+
+    regressed = False
+    for factor in args.scale:
+        record = run_benchmark(int(args.skus * factor), args.cities, args.days,
+                               int(args.invoices * factor), args.format, args.seed, not args.no_memory)
+        history = load_history(args.history)
+        report  = compare_with_previous(record, history)
+        regressed |= bool(report["Regresi"].any())
+
+        p = record["params"]
+        print(f"\n== {p['skus']:,} SKU × {p['cities']} kota, {p['days']} hari, {p['invoices']:,} faktur "
+              f"({record['rows']['penjualan']:,} baris) — {record['version']}")
+        print(report.to_string(index=False, na_rep="-"))
+        mem = record["memory_mb"]
+        print(f"Total {record['total_seconds']:.2f}s, max RSS {record['max_rss_mb']} MB, "
+              f"penjualan {mem['penjualan_raw']} → {mem['penjualan']} MB setelah skema")
+        if not args.no_save:
+            append_history(record, args.history)
+
+    if regressed:
+        print("\n⚠️  Regresi terdeteksi dibanding run sebelumnya (lihat kolom Regresi).")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+utils/drive_cache.py
+Cache lokal (Parquet) untuk file penjualan hasil parse dari Google Drive.
+
+Setiap file disimpan sebagai Parquet dengan key = Drive id + modifiedTime +
+md5Checksum (+ argumen read). File yang tidak berubah dibaca langsung dari disk
+tanpa download ulang dan tanpa `read_excel`. Ukuran cache dibatasi dengan
+eviction LRU (berdasarkan waktu akses terakhir file cache).
+
+Warm cache (isi cache untuk seluruh folder penjualan):
+    python -m utils.drive_cache warm --credentials credentials.json
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+
+from .gdrive import download_and_read, DRIVE_FILE_FIELDS, FOLDER_PENJUALAN
+from .schema import cache_safe_frame
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+CACHE_DIR       = os.environ.get("DRIVE_CACHE_DIR", os.path.join(".cache", "drive"))
+CACHE_MAX_BYTES = int(os.environ.get("DRIVE_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+
+# ── Key & Path ─────────────────────────────────────────────────────────────────
+def cache_key(file_meta: dict, **read_kwargs) -> str | None:
+    """
+    Bangun key cache dari metadata Drive. Mengembalikan None jika metadata
+    tidak cukup untuk mendeteksi perubahan file (tanpa modifiedTime).
+    """
+    if not file_meta.get("modifiedTime"):
+        return None
+    parts = [
+        file_meta["id"],
+        file_meta["modifiedTime"],
+        file_meta.get("md5Checksum", ""),
+        repr(sorted(read_kwargs.items())),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str, cache_dir: str = CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"{key}.parquet")
+
+
+# ── Load / Store ───────────────────────────────────────────────────────────────
+def load_cached_frame(key: str, cache_dir: str = CACHE_DIR) -> pd.DataFrame | None:
+    """Baca DataFrame dari cache; waktu akses diperbarui untuk LRU."""
+    path = _cache_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # File cache rusak/terpotong → anggap miss dan hapus
+        _safe_remove(path)
+        return None
+    os.utime(path, None)
+    return df
+
+
+def store_cached_frame(key: str, df: pd.DataFrame, cache_dir: str = CACHE_DIR,
+                       max_bytes: int = CACHE_MAX_BYTES) -> bool:
+    """
+    Simpan DataFrame sebagai Parquet (atomic via file sementara unik), lalu
+    jalankan eviction LRU. Mengembalikan False jika frame tidak bisa disimpan
+    tanpa mengubah hasil preprocessing (lihat cache_safe_frame).
+    """
+    safe = cache_safe_frame(df)
+    if safe is None:
+        return False
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        safe.to_parquet(tmp, index=False)
+        os.replace(tmp, _cache_path(key, cache_dir))
+    except Exception:
+        _safe_remove(tmp)
+        return False
+    evict_lru(max_bytes, cache_dir)
+    return True
+
+
+def _safe_remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ── Eviction LRU ───────────────────────────────────────────────────────────────
+def evict_lru(max_bytes: int = CACHE_MAX_BYTES, cache_dir: str = CACHE_DIR) -> int:
+    """Hapus file cache yang paling lama tidak diakses hingga total <= max_bytes."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".parquet"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total   = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _safe_remove(path)
+        total   -= size
+        removed += 1
+    return removed
+
+
+# ── Read Helper ────────────────────────────────────────────────────────────────
+def read_drive_file_cached(_drive_service, file_meta: dict, **kwargs) -> pd.DataFrame:
+    """
+    Seperti download_and_read, tetapi memakai cache Parquet lokal jika file
+    Drive belum berubah (id + modifiedTime + md5Checksum sama).
+    """
+    key = cache_key(file_meta, **kwargs)
+    if key is not None:
+        cached = load_cached_frame(key)
+        if cached is not None:
+            return cached
+
+    df = download_and_read(_drive_service, file_meta["id"], file_meta["name"], **kwargs)
+    if key is not None and not df.empty:
+        store_cached_frame(key, df)
+    return df
+
+
+# ── CLI: Warm Cache ────────────────────────────────────────────────────────────
+def _build_cli_service(credentials_path: str):
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+    from .gdrive import SCOPES
+
+    credentials = service_account.Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+    return build("drive", "v3", credentials=credentials)
+
+
+def _list_folder(drive_service, folder_id: str) -> list:
+    query = f"'{folder_id}' in parents and mimeType != 'application/vnd.google-apps.folder'"
+    resp  = drive_service.files().list(q=query, fields=DRIVE_FILE_FIELDS).execute()
+    return resp.get("files", [])
+
+
+def warm_cache(drive_service, folder_id: str = FOLDER_PENJUALAN) -> dict:
+    """Isi cache untuk semua file di folder. Mengembalikan ringkasan hit/miss."""
+    summary = {"hit": 0, "miss": 0, "skip": 0}
+    for f in _list_folder(drive_service, folder_id):
+        key = cache_key(f)
+        if key is None:
+            summary["skip"] += 1
+            continue
+        if os.path.exists(_cache_path(key)):
+            os.utime(_cache_path(key), None)
+            summary["hit"] += 1
+            continue
+        t0 = time.perf_counter()
+        df = download_and_read(drive_service, f["id"], f["name"])
+        if not df.empty and store_cached_frame(key, df):
+            summary["miss"] += 1
+            print(f"  cached {f['name']} ({len(df)} baris, {time.perf_counter() - t0:.1f}s)")
+        else:
+            summary["skip"] += 1
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Kelola cache Parquet file Google Drive.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_warm = sub.add_parser("warm", help="Isi cache untuk seluruh folder penjualan.")
+    p_warm.add_argument("--credentials", default="credentials.json")
+    p_warm.add_argument("--folder", default=FOLDER_PENJUALAN)
+
+    sub.add_parser("evict", help="Jalankan eviction LRU sesuai batas ukuran.")
+
+    args = parser.parse_args(argv)
+    if args.command == "warm":
+        summary = warm_cache(_build_cli_service(args.credentials), args.folder)
+        print(f"Selesai: {summary['miss']} file baru, {summary['hit']} sudah ada, {summary['skip']} dilewati.")
+    elif args.command == "evict":
+        print(f"{evict_lru()} file cache dihapus.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
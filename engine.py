@@ -0,0 +1,514 @@
+"""
+utils/engine.py
+Engine analisis Stock & ABC tanpa Streamlit + CLI batch.
+
+Halaman Streamlit hanya memanggil run_stock_analysis / run_abc_analysis lalu
+menyimpan hasilnya di session_state, sehingga logika yang sama bisa
+dijadwalkan di server (mis. cron malam hari) dan diukur throughput-nya.
+Setiap tahap dicatat oleh StageTimer (dan diteruskan ke panel Performance).
+
+Contoh:
+    python -m utils.engine \
+        --penjualan data/penjualan/*.xlsx \
+        --produk data/produk.xlsx --stock "data/STOCK 30062024.xlsx" \
+        --out hasil/ --format parquet
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+
+from .analysis import (
+    BULAN_INDONESIA,
+    BULAN_BUCKET_COLS,
+    DAYS_MULTIPLIER,
+    calculate_wma_from_buckets,
+    classify_abc_log_benchmark,
+    calculate_min_stock,
+    calculate_max_stock,
+    calculate_add_stock,
+    calculate_suggested_po,
+    calculate_status_stock,
+    melt_stock_by_city,
+)
+from .export import EXPORT_FORMATS, build_export
+from .preprocess import preprocess_sales
+from .profiling import record_stage
+from .schema import (
+    apply_produk_schema,
+    apply_sales_schema,
+    apply_stock_schema,
+    parse_produk_file,
+    parse_stock_file,
+)
+from .sales_cube import SalesCube, build_sales_cube
+from .sparse_grid import SparseGrid
+
+
+# ── Timer ──────────────────────────────────────────────────────────────────────
+@dataclass
+class StageTimer:
+    """
+    Catat durasi per tahap: lap(nama) = waktu sejak lap sebelumnya.
+    Setiap lap juga dicatat ke utils.profiling (panel Performance / log).
+    """
+    timings: list = field(default_factory=list)
+    _last:   float = field(default_factory=time.perf_counter)
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.timings.append((stage, elapsed))
+        record_stage(stage, elapsed)
+        self._last = now
+        return elapsed
+
+    def report(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.timings, columns=["Tahap", "Detik"])
+        return df.groupby("Tahap", sort=False, as_index=False)["Detik"].sum()
+
+
+@dataclass(frozen=True)
+class StockResult:
+    grid:          SparseGrid
+    bulan_columns: list
+
+
+# ── Persiapan Input ────────────────────────────────────────────────────────────
+def prepare_produk_ref(produk_ref: pd.DataFrame) -> pd.DataFrame:
+    """No. Barang di-strip, nama kolom diseragamkan, Kategori Barang upper-case."""
+    produk_ref = produk_ref.rename(
+        columns={"Keterangan Barang": "Nama Barang", "Nama Kategori Barang": "Kategori Barang"}
+    )
+    if "No. Barang" in produk_ref.columns:
+        produk_ref["No. Barang"] = produk_ref["No. Barang"].astype(str).str.strip()
+    if "Kategori Barang" in produk_ref.columns:
+        produk_ref["Kategori Barang"] = produk_ref["Kategori Barang"].astype(str).str.strip().str.upper()
+    return produk_ref
+
+
+def prepare_stock(df_stock: pd.DataFrame) -> pd.DataFrame:
+    df_stock = df_stock.copy()
+    if "No. Barang" in df_stock.columns:
+        df_stock["No. Barang"] = df_stock["No. Barang"].astype(str).str.strip()
+    return df_stock
+
+
+def _fill_zero(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    fillna(0) per tipe kolom: numerik → 0, teks → "0". Kolom string Arrow
+    (PRODUK_SCHEMA: BRAND/Nama Barang) menolak nilai int, sedangkan frame
+    object lama menampilkan BRAND/Nama kosong sebagai 0.
+    """
+    fill = {}
+    for col in df.columns[df.isna().any().to_numpy()]:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s):
+            fill[col] = 0
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            continue
+        else:
+            fill[col] = 0 if s.dtype == object else "0"
+    return df.fillna(fill) if fill else df
+
+
+# ── Analisis Stock ─────────────────────────────────────────────────────────────
+def run_stock_analysis(cube: SalesCube, produk_ref: pd.DataFrame, df_stock: pd.DataFrame,
+                       end_date, timer: StageTimer | None = None) -> StockResult | None:
+    """
+    Analisis stok 90 hari ke belakang dari end_date. produk_ref & df_stock
+    sudah melalui prepare_produk_ref / prepare_stock. Mengembalikan None jika
+    tidak ada penjualan dalam rentang 90 hari.
+    """
+    timer = timer or StageTimer()
+    timer.start()
+    end_date_dt = pd.to_datetime(end_date)
+    wma_start   = end_date_dt - pd.DateOffset(days=89)
+    if not cube.has_sales(wma_start, end_date_dt):
+        return None
+
+    # Bucket 30 hari (Bln 1/2/3) untuk semua City × Barang dalam satu pass
+    buckets = cube.window_buckets(end_date_dt)
+    buckets.insert(2, "AVG WMA", calculate_wma_from_buckets(buckets))
+
+    # Total 90 hari = jumlah tiga bucket (grup sama dengan buckets)
+    total_90 = buckets[["City", "No. Barang"]].copy()
+    total_90["AVG Mean"] = buckets[BULAN_BUCKET_COLS].sum(axis=1) / 3
+
+    timer.lap("stock/bucket")
+
+    # Grid sparse City × Barang: hanya kombinasi dengan penjualan 90 hari
+    # atau stok ≠ 0. Baris nol lainnya diturunkan oleh SparseGrid.
+    barang_list  = produk_ref[["No. Barang", "Kategori Barang", "BRAND Barang", "Nama Barang"]].drop_duplicates()
+    city_list    = cube.uniques("City")
+    stock_df_raw = df_stock.rename(columns=lambda x: x.strip())
+    stock_melted = melt_stock_by_city(stock_df_raw)
+
+    pair_frames = [buckets[["City", "No. Barang"]]]
+    if not stock_melted.empty:
+        pair_frames.append(stock_melted.loc[stock_melted["Stock"] != 0, ["City", "No. Barang"]])
+    kombinasi = pd.concat(pair_frames, ignore_index=True).astype(str).drop_duplicates()
+    kombinasi = kombinasi[
+        kombinasi["City"].isin(city_list) & kombinasi["No. Barang"].isin(barang_list["No. Barang"])
+    ]
+    full_data = pd.merge(kombinasi, barang_list, on="No. Barang", how="left")
+
+    for df_merge in [buckets, total_90]:
+        full_data = pd.merge(full_data, df_merge, on=["City", "No. Barang"], how="left")
+
+    # Kolom bulanan
+    monthly = cube.monthly_sums(wma_start, end_date_dt)
+    full_data = pd.merge(full_data, monthly, on=["City", "No. Barang"], how="left")
+    full_data = _fill_zero(full_data)
+
+    # Rename kolom Period → nama bulan Indonesia
+    period_cols = sorted([c for c in full_data.columns if isinstance(c, pd.Period)])
+    rename_map  = {c: f"{BULAN_INDONESIA[c.month]} {c.year}" for c in period_cols}
+    full_data.rename(columns=rename_map, inplace=True)
+    bulan_columns_renamed = [rename_map[c] for c in period_cols]
+
+    full_data.rename(columns={"AVG WMA": "SO WMA", "AVG Mean": "SO Mean"}, inplace=True)
+    full_data["SO Total"] = full_data["SO WMA"]
+
+    timer.lap("stock/grid")
+
+    # ── ABC Log-Benchmark ──────────────────────────────────────────────────
+    log_df = classify_abc_log_benchmark(full_data, metric_col="SO WMA")
+    log_cols_to_merge = [
+        "City", "No. Barang",
+        "Kategori ABC (Log-Benchmark - WMA)", "Ratio Log WMA", "Log (10) WMA", "Avg Log WMA",
+    ]
+    full_data = pd.merge(full_data, log_df[log_cols_to_merge], on=["City", "No. Barang"], how="left")
+
+    timer.lap("stock/abc_log")
+
+    # ── Min & Max Stock (Vectorized — FIX performa) ────────────────────────
+    KAT_COL = "Kategori ABC (Log-Benchmark - WMA)"
+    full_data["Min Stock"] = calculate_min_stock(full_data, KAT_COL, "SO WMA")
+    full_data["Max Stock"] = calculate_max_stock(full_data, KAT_COL, "SO WMA")
+
+    # ── Stock Cabang ───────────────────────────────────────────────────────
+    full_data = pd.merge(
+        full_data, stock_melted, on=["City", "No. Barang"], how="left"
+    ).rename(columns={"Stock": "Stock Cabang"})
+    full_data["Stock Cabang"] = full_data["Stock Cabang"].fillna(0)
+
+    full_data["Status Stock"] = calculate_status_stock(full_data, KAT_COL)
+
+    # ── Add Stock (Vectorized — FIX performa) ─────────────────────────────
+    full_data["Add Stock"] = calculate_add_stock(full_data, KAT_COL, "Min Stock", "Stock Cabang")
+
+    # Merge data pendukung
+    stock_sby   = stock_melted[stock_melted["City"] == "SURABAYA"][["No. Barang", "Stock"]].rename(columns={"Stock": "Stock Surabaya"})
+    stock_total = stock_melted.groupby("No. Barang")["Stock"].sum().reset_index().rename(columns={"Stock": "Stock Total"})
+    total_req   = full_data.groupby("No. Barang")["Add Stock"].sum().reset_index(name="Total Add Stock All")
+
+    full_data = full_data.merge(stock_sby,   on="No. Barang", how="left")
+    full_data = full_data.merge(stock_total, on="No. Barang", how="left")
+    full_data = full_data.merge(total_req,   on="No. Barang", how="left")
+    full_data = _fill_zero(full_data)
+
+    # ── Suggested PO ──────────────────────────────────────────────────────
+    full_data["Suggested PO"] = calculate_suggested_po(full_data, so_col="SO WMA")
+
+    timer.lap("stock/stock_po")
+
+    # ── Pembulatan ─────────────────────────────────────────────────────────
+    int_cols = [
+        "Stock Cabang", "Min Stock", "Max Stock", "Add Stock",
+        "Total Add Stock All", "Suggested PO", "Stock Surabaya", "Stock Total",
+        "SO WMA", "SO Mean", "Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3",
+    ] + bulan_columns_renamed
+    for col in int_cols:
+        if col in full_data.columns:
+            full_data[col] = full_data[col].round(0).astype(int)
+
+    for col in ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA"]:
+        if col in full_data.columns:
+            full_data[col] = full_data[col].round(2)
+
+    # Nilai baris implisit (tanpa penjualan & stok): kategori F, Max Stock 1,
+    # Avg Log per City × Kategori, stok Surabaya/total per SKU, sisanya 0.
+    fill = {c: 0 for c in full_data.columns if pd.api.types.is_numeric_dtype(full_data[c])}
+    fill.update({KAT_COL: "F", "Max Stock": 1, "Status Stock": "Balance"})
+    group_fill = full_data.groupby(["City", "Kategori Barang"])[["Avg Log WMA"]].first()
+    sku_fill = (
+        stock_total.merge(stock_sby, on="No. Barang", how="left")
+        .merge(total_req, on="No. Barang", how="left")
+        .fillna(0)
+        .drop_duplicates("No. Barang")
+        .set_index("No. Barang")
+        .round(0)
+        .astype(int)
+    )
+    timer.lap("stock/finalize")
+
+    return StockResult(
+        grid=SparseGrid(
+            active=full_data,
+            cities=list(city_list),
+            items=_fill_zero(barang_list),
+            fill=fill,
+            group_fill=group_fill,
+            sku_fill=sku_fill,
+        ),
+        bulan_columns=bulan_columns_renamed,
+    )
+
+
+# ── Analisis ABC ───────────────────────────────────────────────────────────────
+def run_abc_analysis(cube: SalesCube, produk_ref: pd.DataFrame, end_date,
+                     timer: StageTimer | None = None) -> SparseGrid | None:
+    """
+    ABC Log-Benchmark (Mean & WMA) 90 hari ke belakang dari end_date.
+    Mengembalikan None jika tidak ada penjualan dalam rentang 90 hari.
+    """
+    timer = timer or StageTimer()
+    timer.start()
+    end_dt   = pd.to_datetime(end_date)
+    start_90 = end_dt - pd.DateOffset(days=89)
+    if not cube.has_sales(start_90, end_dt):
+        return None
+
+    buckets = cube.window_buckets(end_dt)
+
+    barang_list = produk_ref[["No. Barang", "BRAND Barang", "Kategori Barang", "Nama Barang"]].drop_duplicates()
+    city_list   = cube.uniques("City")
+
+    timer.lap("abc/bucket")
+
+    # Grid sparse: hanya City × Barang yang punya penjualan 90 hari
+    kombinasi = buckets[["City", "No. Barang"]].astype(str)
+    kombinasi = kombinasi[
+        kombinasi["City"].isin(city_list) & kombinasi["No. Barang"].isin(barang_list["No. Barang"])
+    ]
+    grouped   = pd.merge(kombinasi, barang_list, on="No. Barang", how="left")
+    grouped = pd.merge(grouped, buckets, on=["City", "No. Barang"], how="left")
+    grouped.fillna({"Penjualan Bln 1": 0, "Penjualan Bln 2": 0, "Penjualan Bln 3": 0}, inplace=True)
+
+    grouped["AVG Mean"] = (grouped["Penjualan Bln 1"] + grouped["Penjualan Bln 2"] + grouped["Penjualan Bln 3"]) / 3
+    grouped["AVG WMA"]  = calculate_wma_from_buckets(grouped)
+
+    timer.lap("abc/grid")
+
+    res_mean = classify_abc_log_benchmark(grouped, metric_col="AVG Mean")
+    res_wma  = classify_abc_log_benchmark(grouped, metric_col="AVG WMA")
+
+    result_final = res_mean
+    wma_extra = [c for c in res_wma.columns
+                 if any(x in c for x in ["Log-Benchmark - WMA", "Log (10) WMA", "Avg Log WMA", "Ratio Log WMA"])
+                 and c not in result_final.columns]
+    result_final = pd.merge(result_final, res_wma[["City", "No. Barang"] + wma_extra], on=["City", "No. Barang"], how="left")
+
+    timer.lap("abc/abc_log")
+
+    # Baris implisit (tanpa penjualan): Log NaN, kategori F. Avg Log per
+    # City × Kategori; Ratio = NaN jika Avg Log ≠ 0, selain itu 0
+    # (dihitung sebelum pembulatan, sama seperti grid dense).
+    group_fill = result_final.groupby(["City", "Kategori Barang"])[["Avg Log Mean", "Avg Log WMA"]].first()
+    for m in ["Mean", "WMA"]:
+        group_fill[f"Ratio Log {m}"] = np.where(group_fill[f"Avg Log {m}"] != 0, np.nan, 0.0)
+
+    for col in ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3", "AVG Mean", "AVG WMA"]:
+        if col in result_final.columns:
+            result_final[col] = result_final[col].round(0).astype(int)
+    for col in ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA", "Log (10) Mean", "Avg Log Mean", "Ratio Log Mean"]:
+        if col in result_final.columns:
+            result_final[col] = result_final[col].round(2)
+        if col in group_fill.columns:
+            group_fill[col] = group_fill[col].round(2)
+
+    fill = {c: 0 for c in ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3", "AVG Mean", "AVG WMA",
+                           "Avg Log Mean", "Ratio Log Mean", "Avg Log WMA", "Ratio Log WMA"]}
+    fill.update({
+        "Log (10) Mean": np.nan, "Log (10) WMA": np.nan,
+        "Kategori ABC (Log-Benchmark - Mean)": "F", "Kategori ABC (Log-Benchmark - WMA)": "F",
+    })
+    timer.lap("abc/finalize")
+
+    return SparseGrid(
+        active=result_final,
+        cities=list(city_list),
+        items=barang_list,
+        fill=fill,
+        group_fill=group_fill,
+    )
+
+
+# ── Pivot Gabungan ─────────────────────────────────────────────────────────────
+def build_stock_pivot(result: pd.DataFrame, bulan_cols: list, keys: list) -> pd.DataFrame:
+    """
+    Tabel gabungan seluruh kota: metrik per kota sebagai kolom "<Kota>_<Metrik>"
+    + ringkasan All_* (stok, SO, kategori ABC gabungan, add stock, restock).
+    """
+    pivot_cols = (
+        bulan_cols
+        + ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3"]
+        + ["SO WMA", "SO Mean", "SO Total"]
+        + ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA", "Kategori ABC (Log-Benchmark - WMA)"]
+        + ["Min Stock", "Max Stock", "Stock Cabang", "Status Stock", "Add Stock", "Suggested PO"]
+    )
+    pivot_cols_existing = [c for c in pivot_cols if c in result.columns]
+    pivot = result.pivot_table(index=keys, columns="City", values=pivot_cols_existing, aggfunc="first")
+    pivot.columns = [f"{lv1}_{lv0}" for lv0, lv1 in pivot.columns]
+    pivot.reset_index(inplace=True)
+
+    cities = sorted(result["City"].unique())
+    metric_order = pivot_cols
+    ordered = [f"{city}_{m}" for city in cities for m in metric_order]
+    existing_ordered = [c for c in ordered if c in pivot.columns]
+
+    # ALL summary
+    total_agg = result.groupby(keys).agg(
+        All_Stock=("Stock Cabang", "sum"),
+        All_SO=("SO WMA", "sum"),
+        All_Suggested_PO=("Suggested PO", "sum"),
+    ).reset_index()
+
+    all_abc_input = result.groupby(keys, as_index=False).agg({"SO WMA": "sum"})
+    all_abc_input.rename(columns={"SO WMA": "Total Kuantitas"}, inplace=True)
+    all_abc_input["City"] = "ALL"
+    all_classified = classify_abc_log_benchmark(all_abc_input, metric_col="Total Kuantitas")
+    all_classified.rename(columns={
+        "Log (10) Total Kuantitas":                         "All_Log",
+        "Avg Log Total Kuantitas":                          "All_Avg Log",
+        "Ratio Log Total Kuantitas":                        "All_Ratio",
+        "Kategori ABC (Log-Benchmark - Total Kuantitas)":   "All_Kategori ABC All",
+    }, inplace=True)
+
+    total_agg = pd.merge(total_agg, all_classified[keys + ["All_Kategori ABC All"]], on=keys, how="left")
+
+    # All_Add_Stock vectorized (setara apply(axis=1) lama): F → 0,
+    # selainnya max(0, ceil(SO × multiplier) − stock); dtype mengikuti All_Stock
+    kategori_all = total_agg["All_Kategori ABC All"]
+    mult_all     = kategori_all.map(DAYS_MULTIPLIER).fillna(1.0)
+    add_all = np.where(
+        kategori_all == "F",
+        0,
+        np.maximum(0, np.ceil(total_agg["All_SO"] * mult_all) - total_agg["All_Stock"]),
+    )
+    total_agg["All_Add_Stock"]     = pd.Series(add_all, index=total_agg.index).astype(total_agg["All_Stock"].dtype)
+    total_agg["All_Restock 1 Bulan"] = np.where(total_agg["All_Stock"] < total_agg["All_SO"], "PO", "NO")
+
+    pivot = pd.merge(pivot, total_agg, on=keys, how="left")
+    pivot = pd.merge(pivot, all_classified[keys + ["All_Log", "All_Avg Log", "All_Ratio"]], on=keys, how="left")
+
+    final_summary = ["All_Stock", "All_SO", "All_Add_Stock", "All_Suggested_PO",
+                     "All_Log", "All_Avg Log", "All_Ratio", "All_Kategori ABC All", "All_Restock 1 Bulan"]
+    final_cols = keys + existing_ordered + final_summary
+    return pivot[[c for c in final_cols if c in pivot.columns]].copy()
+
+
+# ── Pipeline ───────────────────────────────────────────────────────────────────
+def run_pipeline(penjualan_raw: pd.DataFrame, produk_ref: pd.DataFrame, df_stock: pd.DataFrame,
+                 end_date=None, timer: StageTimer | None = None) -> dict:
+    """
+    Preprocess → cube → analisis Stock + ABC. end_date default = tanggal
+    penjualan terakhir. Mengembalikan {"end_date", "stock", "abc"}.
+    """
+    timer = timer or StageTimer()
+    timer.start()
+    penjualan, _ = preprocess_sales(penjualan_raw)
+    timer.lap("preprocess")
+    cube = build_sales_cube(penjualan)
+    timer.lap("cube")
+    if cube.empty:
+        raise ValueError("Data penjualan tidak memiliki Tgl Faktur yang valid.")
+
+    end_date   = pd.Timestamp(end_date) if end_date is not None else cube.max_date
+    produk_ref = prepare_produk_ref(produk_ref)
+    df_stock   = prepare_stock(df_stock)
+    timer.lap("prepare")
+    return {
+        "end_date": end_date,
+        "stock":    run_stock_analysis(cube, produk_ref, df_stock, end_date, timer),
+        "abc":      run_abc_analysis(cube, produk_ref, end_date, timer),
+    }
+
+
+# ── I/O Lokal ──────────────────────────────────────────────────────────────────
+def read_sales_files(paths: list) -> pd.DataFrame:
+    """Gabungkan file penjualan lokal (Excel/CSV/Parquet) lalu terapkan SALES_SCHEMA."""
+    dfs = []
+    for path in paths:
+        if path.endswith(".parquet"):
+            dfs.append(pd.read_parquet(path))
+        elif path.endswith(".csv"):
+            dfs.append(pd.read_csv(path))
+        else:
+            dfs.append(pd.read_excel(path))
+    return apply_sales_schema(pd.concat(dfs, ignore_index=True)) if dfs else pd.DataFrame()
+
+
+def _read_reference(path: str, parse_export, apply_schema) -> pd.DataFrame:
+    """
+    File tabel biasa (Parquet/CSV) dibaca apa adanya lalu diberi skema; Excel
+    diparse sesuai format export (parse_* sudah menerapkan skema).
+    """
+    if path.endswith(".parquet"):
+        return apply_schema(pd.read_parquet(path))
+    if path.endswith(".csv"):
+        return apply_schema(pd.read_csv(path))
+    return parse_export(path)
+
+
+def write_results(results: dict, out_dir: str, ext: str = "parquet", dense: bool = False) -> list:
+    """Tulis hasil Stock & ABC ke out_dir. Mengembalikan daftar path file."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name in ["stock", "abc"]:
+        result = results.get(name)
+        if result is None:
+            continue
+        grid = result.grid if isinstance(result, StockResult) else result
+        df = grid.to_dense() if dense else grid.active
+        path = os.path.join(out_dir, f"analisis_{name}_{results['end_date']:%Y%m%d}.{ext}")
+        with open(path, "wb") as f:
+            f.write(build_export(ext, {"Sheet1": df}))
+        paths.append(path)
+    return paths
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Jalankan analisis Stock & ABC tanpa Streamlit.")
+    parser.add_argument("--penjualan", nargs="+", required=True, help="File penjualan (Excel/CSV/Parquet).")
+    parser.add_argument("--produk", required=True, help="File produk referensi (export Excel atau tabel Parquet/CSV).")
+    parser.add_argument("--stock", required=True, help="File stock (export Excel atau tabel Parquet/CSV).")
+    parser.add_argument("--end-date", default=None, help="Tanggal akhir YYYY-MM-DD (default: penjualan terakhir).")
+    parser.add_argument("--out", default="hasil_analisis")
+    parser.add_argument("--format", default="parquet", choices=[ext for ext, _ in EXPORT_FORMATS.values()])
+    parser.add_argument("--dense", action="store_true", help="Tulis grid City × SKU lengkap (termasuk baris nol).")
+    args = parser.parse_args(argv)
+
+    timer = StageTimer()
+    penjualan_raw = read_sales_files(args.penjualan)
+    produk_ref    = _read_reference(args.produk, parse_produk_file, apply_produk_schema)
+    df_stock      = _read_reference(args.stock, parse_stock_file, apply_stock_schema)
+    timer.lap("load")
+
+    results = run_pipeline(penjualan_raw, produk_ref, df_stock, args.end_date, timer)
+    timer.start()
+    paths = write_results(results, args.out, args.format, args.dense)
+    timer.lap("write")
+
+    for name in ["stock", "abc"]:
+        if results[name] is None:
+            print(f"{name}: tidak ada penjualan dalam 90 hari sampai {results['end_date']:%Y-%m-%d}.")
+    for path in paths:
+        print(f"  ditulis {path}")
+    report = timer.report()
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print(f"Total {report['Detik'].sum():.2f}s untuk {len(penjualan_raw):,} baris penjualan.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+utils/export.py
+Ekspor hasil analisis (Excel / CSV.gz / Parquet) tanpa membebani setiap rerun.
+
+- Excel ditulis dengan workbook openpyxl write-only: baris dialirkan per chunk,
+  sehingga memori tidak bertambah dengan ukuran workbook (tanpa ExcelWriter +
+  model sel penuh di memori).
+- Bytes dibentuk hanya setelah tombol "Siapkan File" diklik, lalu disimpan di
+  session per (versi hasil, format). Versi berasal dari id hasil analisis +
+  filter, bukan dari hashing isi DataFrame seperti st.cache_data.
+"""
+
+import hashlib
+from io import BytesIO
+import pandas as pd
+import streamlit as st
+from openpyxl import Workbook
+
+from .schema import arrow_safe_frame
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+EXPORT_CHUNK_ROWS = 20_000
+
+EXPORT_FORMATS = {
+    "Excel (.xlsx)":  ("xlsx",    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV (.csv.gz)":  ("csv.gz",  "application/gzip"),
+    "Parquet":        ("parquet", "application/octet-stream"),
+}
+
+
+# ── Writer ─────────────────────────────────────────────────────────────────────
+def _iter_rows(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Baris sebagai tuple nilai Python; NaN/NaT → None (sel kosong)."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        yield from chunk.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def frames_to_xlsx_bytes(sheets: dict) -> bytes:
+    """Tulis {nama sheet: DataFrame} ke xlsx dengan workbook write-only."""
+    wb = Workbook(write_only=True)
+    for name, df in sheets.items():
+        ws = wb.create_sheet(title=str(name)[:31])
+        ws.append([str(c) for c in df.columns])
+        for row in _iter_rows(df):
+            ws.append(row)
+    if not sheets:
+        wb.create_sheet(title="Sheet1")
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def frame_to_csv_gz_bytes(df: pd.DataFrame) -> bytes:
+    output = BytesIO()
+    df.to_csv(output, index=False, chunksize=EXPORT_CHUNK_ROWS,
+              compression={"method": "gzip", "compresslevel": 6})
+    return output.getvalue()
+
+
+def frame_to_parquet_bytes(df: pd.DataFrame) -> bytes:
+    output = BytesIO()
+    try:
+        df.to_parquet(output, index=False)
+    except Exception:
+        # Kolom bertipe campuran (mis. No. Barang angka vs teks)
+        output = BytesIO()
+        arrow_safe_frame(df).to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def build_export(ext: str, sheets: dict, table: pd.DataFrame | None = None) -> bytes:
+    """
+    Bentuk bytes ekspor. Excel memakai semua `sheets`; format datar (csv.gz,
+    parquet) memakai `table`, atau sheet pertama jika `table` tidak diberikan.
+    """
+    if ext == "xlsx":
+        return frames_to_xlsx_bytes(sheets)
+    flat = table if table is not None else next(iter(sheets.values()), pd.DataFrame())
+    if ext == "csv.gz":
+        return frame_to_csv_gz_bytes(flat)
+    if ext == "parquet":
+        return frame_to_parquet_bytes(flat)
+    raise ValueError(f"Format ekspor tidak dikenal: {ext}")
+
+
+# ── Versi & UI ─────────────────────────────────────────────────────────────────
+def export_version(*parts) -> str:
+    """Identitas ekspor dari id hasil + state filter (murah, tanpa hashing data)."""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def render_export(key: str, version: str, build_sheets, file_stem: str,
+                  label: str = "📥 Unduh", build_table=None):
+    """
+    Pilih format → "Siapkan File" → download_button.
+
+    build_sheets() → {nama sheet: DataFrame} dan build_table() → DataFrame
+    hanya dipanggil saat tombol diklik. Hasil disimpan di session_state[key]
+    dan dipakai ulang selama versi & format sama.
+    """
+    fmt_label = st.radio("Format:", list(EXPORT_FORMATS), key=f"{key}_fmt", horizontal=True)
+    ext, mime = EXPORT_FORMATS[fmt_label]
+    cache_id  = (version, ext)
+
+    ready = st.session_state.get(key)
+    if ready is None or ready[0] != cache_id:
+        if not st.button("⚙️ Siapkan File", key=f"{key}_prepare"):
+            return
+        with st.spinner("Menyiapkan file unduhan..."):
+            sheets = build_sheets()
+            table  = build_table() if build_table is not None else None
+            ready  = (cache_id, build_export(ext, sheets, table))
+        st.session_state[key] = ready
+
+    st.download_button(
+        label,
+        data=ready[1],
+        file_name=f"{file_stem}.{ext}",
+        mime=mime,
+        key=f"{key}_download",
+    )
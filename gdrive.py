@@ -4,6 +4,7 @@ Semua fungsi koneksi dan operasi Google Drive.
 """
 
 import os
+import threading
 import time
 import streamlit as st
 import pandas as pd
@@ -12,6 +13,9 @@ from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 
+from .profiling import profiled
+from .schema import parse_produk_file, parse_stock_file
+
 # ── Konstanta Folder ID ────────────────────────────────────────────────────────
 FOLDER_PENJUALAN      = "1Okgw8qHVM8HyBwnTUFHbmYkNKqCcswNZ"
 FOLDER_PRODUK         = "1UdGbFzZ2Wv83YZLNwdU-rgY-LXlczsFv"
@@ -21,13 +25,23 @@ FOLDER_PORTAL         = "1GOKVWugUMqN9aOWYCeFlKj-qTr2dA7_u"
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
+# modifiedTime & md5Checksum dipakai sebagai key cache lokal (lihat drive_cache.py)
+DRIVE_FILE_FIELDS = "files(id, name, modifiedTime, md5Checksum)"
+
+
+# Kredensial service account terakhir dari init_drive_service; dipakai worker
+# thread untuk membangun service sendiri (lihat _thread_drive_service)
+_drive_credentials = None
+
 
 # ── Inisialisasi Koneksi ───────────────────────────────────────────────────────
 def init_drive_service():
     """
     Inisialisasi Google Drive service dari secrets atau file credentials.json.
     Mengembalikan (drive_service, True) jika berhasil, (None, False) jika gagal.
+    Kredensial disimpan di modul (drive_credentials) untuk worker thread.
     """
+    global _drive_credentials
     try:
         if "gcp_service_account" in st.secrets:
             credentials = service_account.Credentials.from_service_account_info(
@@ -44,6 +58,7 @@ def init_drive_service():
             return None, False
 
         service = build("drive", "v3", credentials=credentials)
+        _drive_credentials = credentials
         return service, True
 
     except Exception as e:
@@ -71,14 +86,27 @@ def list_files_in_folder(_drive_service, folder_id: str) -> list:
     try:
         def _list():
             query = f"'{folder_id}' in parents and mimeType != 'application/vnd.google-apps.folder'"
-            resp = _drive_service.files().list(q=query, fields="files(id, name)").execute()
+            resp = _drive_service.files().list(q=query, fields=DRIVE_FILE_FIELDS).execute()
             return resp.get("files", [])
         return _with_backoff(_list)
     except Exception:
         return []
 
 
+def _download_to_buffer(drive_service, file_id: str) -> BytesIO:
+    """Download satu file ke BytesIO (tanpa cache, tanpa retry)."""
+    request = drive_service.files().get_media(fileId=file_id)
+    fh = BytesIO()
+    downloader = MediaIoBaseDownload(fh, request)
+    done = False
+    while not done:
+        _, done = downloader.next_chunk()
+    fh.seek(0)
+    return fh
+
+
 @st.cache_data(ttl=600)
+@profiled("drive/download")
 def download_file_from_gdrive(_drive_service, file_id: str) -> BytesIO | None:
     """
     Download file dari Google Drive ke BytesIO.
@@ -86,22 +114,51 @@ def download_file_from_gdrive(_drive_service, file_id: str) -> BytesIO | None:
          (tidak lagi bergantung pada global scope) agar cache aman.
     """
     try:
-        def _download():
-            request = _drive_service.files().get_media(fileId=file_id)
-            fh = BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                _, done = downloader.next_chunk()
-            fh.seek(0)
-            return fh
-        return _with_backoff(_download)
+        return _with_backoff(lambda: _download_to_buffer(_drive_service, file_id))
     except Exception as e:
         st.error(f"Gagal mengunduh file {file_id}. Error: {e}")
         return None
 
 
+# ── Download dari Worker Thread ────────────────────────────────────────────────
+_thread_local = threading.local()
+
+
+def drive_credentials():
+    """Kredensial service account dari init_drive_service (None jika belum terhubung)."""
+    return _drive_credentials
+
+
+def _thread_drive_service(credentials):
+    """
+    httplib2 (transport googleapiclient) tidak thread-safe, jadi setiap worker
+    thread memakai service sendiri yang dibangun dari kredensial yang sama.
+    """
+    if credentials is None:
+        raise RuntimeError("Google Drive belum terhubung (init_drive_service).")
+    service = getattr(_thread_local, "drive_service", None)
+    if service is None or getattr(_thread_local, "credentials", None) is not credentials:
+        service = build("drive", "v3", credentials=credentials, cache_discovery=False)
+        _thread_local.drive_service = service
+        _thread_local.credentials   = credentials
+    return service
+
+
+@profiled("drive/download_bytes")
+def download_bytes(_drive_service, file_id: str, retries: int = 5, credentials=None) -> bytes:
+    """
+    Download file sebagai bytes dari worker thread, dengan exponential backoff.
+    Berbeda dengan download_file_from_gdrive: tidak memakai st.cache_data dan
+    melempar exception setelah retry habis (ditangani pemanggil).
+    credentials default = drive_credentials(); _drive_service hanya dipakai
+    pemanggil di thread utama (service tidak dibagi antar thread).
+    """
+    service = _thread_drive_service(credentials if credentials is not None else drive_credentials())
+    return _with_backoff(lambda: _download_to_buffer(service, file_id).getvalue(), retries=retries)
+
+
 # ── Read Helper ────────────────────────────────────────────────────────────────
+@profiled("drive/read_file")
 def download_and_read(_drive_service, file_id: str, file_name: str, **kwargs) -> pd.DataFrame:
     """Download lalu baca sebagai DataFrame (CSV atau Excel)."""
     fh = download_file_from_gdrive(_drive_service, file_id)
@@ -117,9 +174,7 @@ def read_produk_file(_drive_service, file_id: str) -> pd.DataFrame:
     fh = download_file_from_gdrive(_drive_service, file_id)
     if fh is None:
         return pd.DataFrame()
-    df = pd.read_excel(fh, sheet_name="Sheet1 (2)", skiprows=6, usecols=[0, 1, 2, 3])
-    df.columns = ["No. Barang", "BRAND Barang", "Kategori Barang", "Nama Barang"]
-    return df
+    return parse_produk_file(fh)
 
 
 def read_stock_file(_drive_service, file_id: str) -> pd.DataFrame:
@@ -127,13 +182,4 @@ def read_stock_file(_drive_service, file_id: str) -> pd.DataFrame:
     fh = download_file_from_gdrive(_drive_service, file_id)
     if fh is None:
         return pd.DataFrame()
-    df = pd.read_excel(fh, sheet_name="Sheet1", skiprows=9, header=None)
-    header = [
-        "No. Barang", "Keterangan Barang",
-        "A - ITC", "AT - TRANSIT ITC", "B", "BT - TRANSIT JKT",
-        "C", "C6", "CT - TRANSIT PUSAT", "D - SMG", "DT - TRANSIT SMG",
-        "E - JOG", "ET - TRANSIT JOG", "F - MLG", "FT - TRANSIT MLG",
-        "H - BALI", "HT - TRANSIT BALI", "X", "Y - SBY", "Y3 - Display Y", "YT - TRANSIT Y",
-    ]
-    df.columns = header[: len(df.columns)]
-    return df
+    return parse_stock_file(fh)
@@ -0,0 +1,149 @@
+"""
+utils/grid_filter.py
+Filter engine untuk hasil SparseGrid di halaman hasil analisis.
+
+Dibangun SEKALI per hasil analisis (ResultHandle.derive):
+    - partisi per kota: posisi baris aktif per kota, sudah dalam urutan tampil
+      (urutan SparseGrid.city_frame), sehingga tabel per kota tidak perlu
+      memotong & mengurutkan ulang seluruh hasil;
+    - indeks per dimensi filter: kode integer per baris (aktif & items) +
+      daftar nilai. Pilihan filter diubah menjadi bitmap nilai terpilih lalu
+      di-lookup per baris (lut[codes]) — tanpa .astype(str).isin di setiap rerun.
+Hasil turunan per tuple filter (grid terfilter, frame per kota, pivot, opsi
+filter) disimpan di cache LRU kecil, sehingga mengganti filter bolak-balik
+tidak menghitung ulang pivot_table dan log-benchmark "ALL".
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+
+from .sparse_grid import SparseGrid
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+ITEM_FILTER_COLS = ("Kategori Barang", "BRAND Barang", "Nama Barang")
+FILTER_CACHE_SIZE = 16
+
+
+def _freeze(selection) -> tuple:
+    """Pilihan multiselect → tuple terurut (kunci cache)."""
+    return tuple(sorted(map(str, selection or ())))
+
+
+class GridFilter:
+    def __init__(self, grid: SparseGrid, item_cols=ITEM_FILTER_COLS, cache_size: int = FILTER_CACHE_SIZE):
+        self.grid = grid
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+        # Indeks dimensi produk: kode bersama untuk baris aktif dan items
+        active, items = grid.active, grid.items
+        self._codes, self._values = {}, {}
+        for col in item_cols:
+            if col not in active.columns or col not in items.columns:
+                continue
+            both = pd.concat([active[col], items[col]], ignore_index=True)
+            codes, values = pd.factorize(both.astype(str).where(both.notna()), use_na_sentinel=True)
+            self._codes[col] = (codes[: len(active)], codes[len(active):])
+            self._values[col] = pd.Index(values)
+
+        # Partisi per kota dalam urutan tampil (sama dengan grid.city_frame)
+        order = grid._sorted(active.assign(_pos=np.arange(len(active))))["_pos"].to_numpy()
+        city_of = active["City"].to_numpy()[order]
+        self._partitions = {city: order[city_of == city] for city in pd.unique(city_of)}
+
+    # ── Cache ──────────────────────────────────────────────────────────────────
+    def memo(self, key, fn):
+        """Nilai fn() per key (LRU, FILTER_CACHE_SIZE entri)."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = fn()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    # ── Filter Produk ──────────────────────────────────────────────────────────
+    def options(self, col: str) -> list:
+        """Nilai filter produk (terurut, tanpa NaN) — dari items, sama dengan opsi lama."""
+        if col not in self._values:
+            return []
+        _, item_codes = self._codes[col]
+        present = np.unique(item_codes[item_codes >= 0])
+        return sorted(self._values[col][present])
+
+    def _masks(self, selections: dict) -> tuple[np.ndarray, np.ndarray]:
+        """Mask (baris aktif, items) untuk pilihan {kolom: nilai terpilih}."""
+        m_active = np.ones(len(self.grid.active), dtype=bool)
+        m_items  = np.ones(len(self.grid.items), dtype=bool)
+        for col, chosen in selections.items():
+            if not chosen or col not in self._values:
+                continue
+            idx = self._values[col].get_indexer(list(chosen))
+            lut = np.zeros(len(self._values[col]) + 1, dtype=bool)   # slot terakhir = NaN (kode -1)
+            lut[idx[idx >= 0]] = True
+            a_codes, i_codes = self._codes[col]
+            m_active &= lut[a_codes]
+            m_items  &= lut[i_codes]
+        return m_active, m_items
+
+    def select(self, **selections) -> SparseGrid:
+        """Grid dengan filter produk, mis. select(**{"Kategori Barang": [...]}) (di-cache)."""
+        key = self._key(selections)
+
+        def _build():
+            if not any(key):
+                return self.grid
+            m_active, m_items = self._masks(dict(zip(self._values, key)))
+            return replace(self.grid, active=self.grid.active[m_active], items=self.grid.items[m_items])
+        return self.memo(("grid", key), _build)
+
+    def _key(self, selections: dict) -> tuple:
+        return tuple(_freeze(selections.get(col)) for col in self._values)
+
+    def cached(self, name: str, selections: dict, fn, extra: tuple = ()):
+        """fn() di-cache per (name, filter produk, extra), mis. pivot atau opsi filter ABC."""
+        return self.memo((name, self._key(selections), extra), fn)
+
+    # ── Tabel per Kota ─────────────────────────────────────────────────────────
+    def city_frames(self, selections: dict, row_filters: dict, dense: bool = False) -> dict:
+        """
+        {kota: frame} untuk tabel per kota (urutan kota = city_list). Filter baris
+        row_filters {kolom: nilai} diterapkan setelah filter produk, seperti
+        filter ABC/Status di halaman.
+        """
+        key = ("cities", self._key(selections),
+               tuple((c, _freeze(v)) for c, v in sorted(row_filters.items())), dense)
+        return self.memo(key, lambda: self._city_frames(selections, row_filters, dense))
+
+    def _city_frames(self, selections: dict, row_filters: dict, dense: bool) -> dict:
+        grid = self.select(**selections)
+        if dense:
+            frames = {city: grid.city_frame(city, dense=True) for city in grid.city_list(dense=True)}
+            for col, chosen in row_filters.items():
+                if chosen:
+                    frames = {c: f[f[col].isin(chosen)] for c, f in frames.items()}
+            return frames
+
+        active = self.grid.active
+        m_active, _ = self._masks(dict(zip(self._values, self._key(selections))))
+        m_rows = m_active.copy()
+        for col, chosen in row_filters.items():
+            if chosen:
+                m_rows &= active[col].isin(chosen).to_numpy()
+        frames = {}
+        for city in sorted(self._partitions):
+            pos = self._partitions[city]
+            pos = pos[m_active[pos]]
+            if not len(pos):
+                continue   # kota tanpa baris setelah filter produk → tidak ditampilkan
+            # index = posisi dalam frame kota terfilter produk (sama seperti city_frame)
+            frame = active.iloc[pos].reset_index(drop=True)
+            frames[city] = frame[m_rows[pos]]
+        return frames
@@ -7,9 +7,20 @@ import streamlit as st
 from utils import (
     list_files_in_folder,
     download_and_read,
+    load_files_parallel,
+    refresh_sales_store,
+    manifest_version,
     read_produk_file,
     read_stock_file,
-    convert_df_to_excel,
+    render_export,
+    export_version,
+    profile_stage,
+    apply_sales_schema,
+    frame_memory_mb,
+    SchemaError,
+    put_result,
+    session_handle,
+    session_view,
     FOLDER_PENJUALAN,
     FOLDER_PRODUK,
     FOLDER_STOCK,
@@ -17,6 +28,31 @@ from utils import (
 )
 
 
+def _typed_sales(df):
+    """Terapkan SALES_SCHEMA saat ingestion; kolom wajib hilang → error, data lama dipertahankan."""
+    try:
+        return apply_sales_schema(df)
+    except SchemaError as e:
+        st.error(str(e))
+        st.stop()
+
+
+def _file_version(file_meta: dict) -> str:
+    return f"{file_meta['id']}:{file_meta.get('modifiedTime', '')}"
+
+
+def _loaded_sales_version() -> str | None:
+    """Versi manifest data penjualan yang sedang dipegang sesi ini."""
+    if session_handle("df_penjualan") is None:
+        return None
+    return st.session_state.get("penjualan_version") or None
+
+
+def _is_loaded(key: str, file_meta: dict) -> bool:
+    handle = session_handle(key)
+    return handle is not None and handle.version == _file_version(file_meta)
+
+
 def render(drive_service):
     st.title("📥 Input Data")
     st.markdown("Muat atau muat ulang data yang diperlukan dari Google Drive.")
@@ -26,31 +62,78 @@ def render(drive_service):
     with st.spinner("Mencari file penjualan di Google Drive..."):
         penjualan_files = list_files_in_folder(drive_service, FOLDER_PENJUALAN)
 
+    incremental = st.checkbox(
+        "Mode inkremental (hanya muat file baru/berubah)", value=True,
+        help="Memakai store penjualan lokal; file yang tidak berubah sejak muat terakhir tidak diproses ulang.",
+    )
+
     if st.button("Muat / Muat Ulang Data Penjualan"):
         if penjualan_files:
-            with st.spinner("Menggabungkan semua file penjualan..."):
-                dfs = [
-                    download_and_read(drive_service, f["id"], f["name"])
-                    for f in penjualan_files
-                ]
-                dfs = [d for d in dfs if not d.empty]
-                if dfs:
-                    import pandas as pd
-                    st.session_state.df_penjualan = pd.concat(dfs, ignore_index=True)
-                    st.success("Data penjualan berhasil dimuat ulang.")
+            progress = st.progress(0.0, text="Memuat file penjualan...")
+
+            def _on_progress(done, total, file_name, source):
+                label = {"cache": "cache", "drive": "Drive", "error": "gagal"}[source]
+                progress.progress(done / total, text=f"[{done}/{total}] {file_name} ({label})")
+
+            if incremental:
+                with profile_stage("input/penjualan_store") as rec:
+                    df_all, summary = refresh_sales_store(
+                        drive_service, penjualan_files, progress_cb=_on_progress,
+                        loaded_version=_loaded_sales_version(),
+                    )
+                    rec.rows_out = len(df_all) if df_all is not None else None
+                progress.empty()
+                for _, name, err in summary["errors"]:
+                    st.error(f"Gagal memuat file {name}. Error: {err}")
+                if df_all is None:
+                    # Store tidak berubah → frame bertipe di sesi tetap dipakai
+                    st.success(f"Data penjualan sudah terbaru ({summary['unchanged']} file tidak berubah).")
+                elif not df_all.empty:
+                    st.session_state.df_penjualan     = put_result("penjualan", _typed_sales(df_all))
+                    st.session_state.penjualan_version = summary["version"]
+                    st.success(
+                        f"Data penjualan diperbarui: {summary['added']} file baru, "
+                        f"{summary['changed']} berubah, {summary['removed']} dihapus, "
+                        f"{summary['unchanged']} tidak berubah."
+                    )
                 else:
                     st.error("Gagal memuat data penjualan. Periksa koneksi atau file.")
+            else:
+                with profile_stage("input/penjualan_parallel") as rec:
+                    dfs, errors = load_files_parallel(drive_service, penjualan_files, progress_cb=_on_progress)
+                    rec.rows_out = sum(len(d) for d in dfs)
+                progress.empty()
+                for _, name, err in errors:
+                    st.error(f"Gagal memuat file {name}. Error: {err}")
+                failed = {fid for fid, _, _ in errors}
+
+                with st.spinner("Menggabungkan semua file penjualan..."):
+                    dfs = [d for d in dfs if not d.empty]
+                    if dfs:
+                        import pandas as pd
+                        st.session_state.df_penjualan     = put_result(
+                            "penjualan", _typed_sales(pd.concat(dfs, ignore_index=True))
+                        )
+                        st.session_state.penjualan_version = manifest_version(
+                            {f["id"]: f for f in penjualan_files if f["id"] not in failed}
+                        )
+                        st.success("Data penjualan berhasil dimuat ulang.")
+                    else:
+                        st.error("Gagal memuat data penjualan. Periksa koneksi atau file.")
         else:
             st.warning("⚠️ Tidak ada file penjualan ditemukan di folder Google Drive.")
 
-    if not st.session_state.df_penjualan.empty:
+    df_penjualan = session_view("df_penjualan")
+    if df_penjualan is not None:
         st.success("✅ Data penjualan telah dimuat.")
-        st.dataframe(st.session_state.df_penjualan)
-        st.download_button(
-            label="📥 Unduh Data Penjualan Gabungan (Excel)",
-            data=convert_df_to_excel(st.session_state.df_penjualan),
-            file_name="data_penjualan_gabungan.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        st.caption(f"{len(df_penjualan):,} baris · {frame_memory_mb(df_penjualan)} MB di memori")
+        st.dataframe(df_penjualan)
+        render_export(
+            key="penjualan_gabungan_export",
+            version=export_version("penjualan_gabungan", st.session_state.penjualan_version, len(df_penjualan)),
+            build_sheets=lambda: {"Sheet1": df_penjualan},
+            file_stem="data_penjualan_gabungan",
+            label="📥 Unduh Data Penjualan Gabungan",
         )
 
     # ── 2. Produk Referensi ────────────────────────────────────────────────────
@@ -63,17 +146,19 @@ def render(drive_service):
         options=[None] + produk_files,
         format_func=lambda x: x["name"] if x else "Pilih file",
     )
-    if selected_produk:
+    # File yang sama (id + modifiedTime) tidak di-parse ulang di setiap rerun
+    if selected_produk and not _is_loaded("produk_ref", selected_produk):
         with st.spinner(f"Memuat file {selected_produk['name']}..."):
             df_temp = read_produk_file(drive_service, selected_produk["id"])
             if not df_temp.empty:
-                st.session_state.produk_ref = df_temp
+                st.session_state.produk_ref = put_result("produk", df_temp, _file_version(selected_produk))
                 st.success(f"File '{selected_produk['name']}' berhasil dimuat.")
             else:
                 st.error(f"Gagal memuat file '{selected_produk['name']}'.")
 
-    if not st.session_state.produk_ref.empty:
-        st.dataframe(st.session_state.produk_ref.head())
+    produk_ref = session_view("produk_ref")
+    if produk_ref is not None:
+        st.dataframe(produk_ref.head())
 
     # ── 3. Data Stock ──────────────────────────────────────────────────────────
     st.header("3. Data Stock")
@@ -85,18 +170,19 @@ def render(drive_service):
         options=[None] + stock_files,
         format_func=lambda x: x["name"] if x else "Pilih file",
     )
-    if selected_stock:
+    if selected_stock and not _is_loaded("df_stock", selected_stock):
         with st.spinner(f"Memuat file {selected_stock['name']}..."):
             df_temp = read_stock_file(drive_service, selected_stock["id"])
             if not df_temp.empty:
-                st.session_state.df_stock = df_temp
+                st.session_state.df_stock = put_result("stock", df_temp, _file_version(selected_stock))
                 st.session_state.stock_filename = selected_stock["name"]
                 st.success(f"File stock '{selected_stock['name']}' berhasil dimuat.")
             else:
                 st.error(f"Gagal memuat file stock '{selected_stock['name']}'.")
 
-    if not st.session_state.df_stock.empty:
-        st.dataframe(st.session_state.df_stock.head())
+    df_stock = session_view("df_stock")
+    if df_stock is not None:
+        st.dataframe(df_stock.head())
 
     # ── 4. Data Portal (Margin) ────────────────────────────────────────────────
     st.header("4. Data Portal (Margin)")
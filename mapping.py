@@ -0,0 +1,121 @@
+"""
+utils/mapping.py
+Mapping Dept./Pelanggan → Nama Dept, City, Platform secara vectorized.
+
+Pengganti `df.apply(map_nama_dept, axis=1)` + `.apply(map_city)` +
+`df.apply(map_platform, axis=1)`. Nilai Dept. dan Nama Pelanggan di-factorize
+menjadi kode integer, aturan mapping hanya dievaluasi sekali per pasangan unik
+(Dept., Pelanggan), lalu hasilnya disebar ke semua baris lewat lookup array.
+Aturan yang dipakai adalah fungsi yang sama dengan versi per-baris, sehingga
+hasilnya identik.
+
+Modul ini hanya bergantung pada numpy/pandas (tanpa import relatif), sehingga
+halaman lama juga bisa memakainya sebagai modul top-level (`import mapping`).
+"""
+
+import numpy as np
+import pandas as pd
+
+# ── Aturan Mapping ─────────────────────────────────────────────────────────────
+def map_nama_dept(row) -> str:
+    dept = str(row.get("Dept.", "")).strip().upper()
+    pelanggan = str(row.get("Nama Pelanggan", "")).strip().upper()
+    return nama_dept_from(dept, pelanggan)
+
+
+def nama_dept_from(dept: str, pelanggan: str) -> str:
+    """Inti map_nama_dept; input sudah dinormalisasi (strip + upper)."""
+    if dept == "A":
+        if pelanggan in ["A - CASH", "AIRPAY INTERNATIONAL INDONESIA", "TOKOPEDIA"]:
+            return "A - ITC"
+        return "A - RETAIL"
+    mapping = {
+        "B": "B - JKT", "C": "C - PUSAT", "D": "D - SMG",
+        "E": "E - JOG", "F": "F - MLG", "G": "G - PROJECT",
+        "H": "H - BALI", "X": "X",
+    }
+    return mapping.get(dept, "X")
+
+
+def map_city(nama_dept: str) -> str:
+    if nama_dept in ["A - ITC", "A - RETAIL", "C - PUSAT", "G - PROJECT"]:
+        return "Surabaya"
+    city_map = {
+        "B - JKT": "Jakarta", "D - SMG": "Semarang",
+        "E - JOG": "Jogja",   "F - MLG": "Malang", "H - BALI": "Bali",
+    }
+    return city_map.get(nama_dept, "Others")
+
+
+SHOPEE_SET = {
+    "AIRPAY INTERNATIONAL INDONESIA", "AIRPAY.ID", "AIRPAY - WD",
+    "D - SHOPEE", "F - SHOPEE", "E - SHOPEE", "H - SHOPEE",
+}
+TOKOPEDIA_SET = {"TOKOPEDIA", "TOKOPEDIA.ID"}
+WEBSITE_SET   = {"A - CASH", "D - CASH", "H - CASH", "E - CASH", "F - CASH", "B - CASH"}
+
+
+def map_platform(row) -> str:
+    return platform_from(str(row.get("Nama Pelanggan", "")).strip().upper())
+
+
+def platform_from(pelanggan: str) -> str:
+    """Inti map_platform; input sudah dinormalisasi (strip + upper)."""
+    if pelanggan in SHOPEE_SET:    return "Shopee"
+    if pelanggan in TOKOPEDIA_SET: return "Tokopedia"
+    if pelanggan in WEBSITE_SET:   return "Website"
+    return "Offline"
+
+
+# ── Mapping Vectorized ─────────────────────────────────────────────────────────
+SALES_DIMENSION_COLS = ("Nama Dept", "City", "Platform")
+
+# Memo lintas pemanggilan: (dept, pelanggan) ternormalisasi → (Nama Dept, City, Platform)
+_PAIR_MEMO: dict[tuple[str, str], tuple[str, str, str]] = {}
+
+
+def _map_pair(dept: str, pelanggan: str) -> tuple[str, str, str]:
+    key = (dept, pelanggan)
+    hit = _PAIR_MEMO.get(key)
+    if hit is None:
+        nama_dept = nama_dept_from(dept, pelanggan)
+        hit = (nama_dept, map_city(nama_dept), platform_from(pelanggan))
+        _PAIR_MEMO[key] = hit
+    return hit
+
+
+def _factorize_normalized(df: pd.DataFrame, col: str) -> tuple[np.ndarray, list]:
+    """Kode integer per baris + nilai unik yang sudah di-str().strip().upper()."""
+    if col not in df.columns:
+        # Sama dengan row.get(col, "") pada versi per-baris
+        return np.zeros(len(df), dtype=np.intp), [""]
+    codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+    return codes, [str(v).strip().upper() for v in uniques]
+
+
+def map_sales_dimensions(df: pd.DataFrame, columns=SALES_DIMENSION_COLS) -> pd.DataFrame:
+    """
+    Hitung kolom Nama Dept / City / Platform untuk seluruh baris penjualan.
+    Mengembalikan DataFrame (index sama dengan df) berisi kolom `columns`.
+    """
+    columns = list(columns)
+    if df.empty:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in columns}, index=df.index)
+
+    dept_codes, dept_vals = _factorize_normalized(df, "Dept.")
+    pel_codes,  pel_vals  = _factorize_normalized(df, "Nama Pelanggan")
+
+    # Kode pasangan unik → evaluasi aturan hanya sekali per pasangan
+    pair_codes = dept_codes.astype(np.int64) * len(pel_vals) + pel_codes
+    pair_idx, pair_uniques = pd.factorize(pair_codes)
+    mapped = [
+        _map_pair(dept_vals[p // len(pel_vals)], pel_vals[p % len(pel_vals)])
+        for p in pair_uniques
+    ]
+
+    out = {}
+    for pos, col in enumerate(SALES_DIMENSION_COLS):
+        if col in columns:
+            lookup = np.array([m[pos] for m in mapped], dtype=object)
+            out[col] = lookup[pair_idx]
+    return pd.DataFrame(out, index=df.index)[columns]
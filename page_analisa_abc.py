@@ -4,6 +4,7 @@ import numpy as np
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import utils # Impor file utilitas Anda
+from mapping import map_sales_dimensions
 
 # --- FUNGSI SPESIFIK UNTUK ANALISA ABC ---
 
@@ -207,9 +208,7 @@ def render_page():
             st.info("Info: Kolom 'Harga Sat' terdeteksi, namun tidak digunakan dalam analisis ABC ini.")
         
         # --- Preprocessing Data ---
-        so_df['Nama Dept'] = so_df.apply(utils.map_nama_dept, axis=1)
-        so_df['City'] = so_df['Nama Dept'].apply(utils.map_city)
-        so_df['Platform'] = so_df.apply(utils.map_platform, axis=1)
+        so_df[['Nama Dept', 'City', 'Platform']] = map_sales_dimensions(so_df)
         so_df['Tgl Faktur'] = pd.to_datetime(so_df['Tgl Faktur'], dayfirst=True, errors='coerce')
         so_df.dropna(subset=['Tgl Faktur'], inplace=True)
         
@@ -0,0 +1,105 @@
+"""
+utils/preprocess.py
+Preprocessing kanonik data penjualan — dijalankan SEKALI per versi dataset.
+
+Sebelumnya halaman Stock dan ABC masing-masing meng-copy df_penjualan lalu
+mengulang strip No. Barang, dedup Faktur + Barang, mapping dept/city,
+upper-case, dan pd.to_datetime (dengan aturan dayfirst yang berbeda).
+Sekarang keduanya memakai artefak yang sama, di-cache per content hash via
+st.cache_resource (tanpa copy/pickle saat diakses).
+
+Kolom hasil bertipe:
+    No. Barang, City → category
+    Tgl Faktur       → datetime64 (dayfirst=True, baris tanpa tanggal dibuang)
+    Kuantitas        → numerik
+Artefak dipakai bersama oleh semua halaman → JANGAN dimodifikasi in-place.
+"""
+
+import hashlib
+import pandas as pd
+import streamlit as st
+
+from .mapping import map_sales_dimensions
+from .profiling import profiled
+from .schema import parse_sales_dates
+
+
+# ── Fingerprint ────────────────────────────────────────────────────────────────
+def sales_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash DataFrame (nilai + nama kolom), dihitung vectorized."""
+    h = hashlib.sha1()
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _session_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint df_penjualan di session, di-memo per objek agar rerun Streamlit
+    tidak meng-hash ulang jutaan baris selama data tidak dimuat ulang.
+    """
+    memo_key = (id(df), len(df), st.session_state.get("penjualan_version", ""))
+    memo = st.session_state.get("_penjualan_fingerprint")
+    if memo is None or memo[0] != memo_key:
+        memo = (memo_key, sales_fingerprint(df))
+        st.session_state["_penjualan_fingerprint"] = memo
+    return memo[1]
+
+
+# ── Preprocessing ──────────────────────────────────────────────────────────────
+@profiled("preprocess/dedup")
+def mark_invoice_duplicates(penjualan: pd.DataFrame) -> pd.Series:
+    """
+    Bentuk kolom "Faktur + Barang" (in-place, No. Faktur di-strip) dan kembalikan
+    mask baris duplikat; kemunculan pertama dipertahankan. No. Barang diharapkan
+    sudah di-strip.
+    """
+    if "No. Faktur" not in penjualan.columns or "No. Barang" not in penjualan.columns:
+        return pd.Series(False, index=penjualan.index)
+    penjualan["No. Faktur"]      = penjualan["No. Faktur"].astype(str).str.strip()
+    penjualan["Faktur + Barang"] = penjualan["No. Faktur"] + penjualan["No. Barang"]
+    return penjualan.duplicated(subset=["Faktur + Barang"], keep="first")
+
+
+@profiled("preprocess")
+def preprocess_sales(df_raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Preprocessing kanonik. Mengembalikan (penjualan, duplikat_dihapus).
+    Fungsi murni (tanpa Streamlit) — dipakai juga oleh engine headless.
+    """
+    penjualan = df_raw.rename(columns={"Qty": "Kuantitas"})
+
+    if "No. Barang" in penjualan.columns:
+        penjualan["No. Barang"] = penjualan["No. Barang"].astype(str).str.strip()
+
+    # Deduplikasi faktur (atas semua baris, sebelum filter tanggal)
+    dup_mask = mark_invoice_duplicates(penjualan)
+    deleted  = penjualan[dup_mask]
+
+    penjualan["Tgl Faktur"] = parse_sales_dates(penjualan["Tgl Faktur"])
+    penjualan = penjualan.loc[~dup_mask & penjualan["Tgl Faktur"].notna()].copy()
+
+    penjualan[["Nama Dept", "City"]] = map_sales_dimensions(penjualan, columns=["Nama Dept", "City"])
+    penjualan["City"] = penjualan["City"].str.strip().str.upper()
+
+    if "Kuantitas" in penjualan.columns:
+        penjualan["Kuantitas"] = pd.to_numeric(penjualan["Kuantitas"], errors="coerce")
+
+    for col in ["City", "No. Barang"]:
+        if col in penjualan.columns:
+            penjualan[col] = penjualan[col].astype("category")
+
+    return penjualan, deleted
+
+
+@st.cache_resource(max_entries=4, show_spinner="Memproses data penjualan...")
+def _preprocess_sales_cached(fingerprint: str, _df_raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    return preprocess_sales(_df_raw)
+
+
+def get_preprocessed_sales(df_raw: pd.DataFrame, fingerprint: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Artefak penjualan ter-preprocess untuk df_penjualan (cache per content hash).
+    fingerprint = versi ResultHandle jika sudah diketahui (tanpa hash ulang).
+    """
+    return _preprocess_sales_cached(fingerprint or _session_fingerprint(df_raw), df_raw)
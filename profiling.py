@@ -0,0 +1,268 @@
+"""
+utils/profiling.py
+Instrumentasi ringan per tahap: durasi, baris masuk/keluar, delta memori.
+
+    with profile_stage("stock/pivot", rows_in=len(df)) as rec:
+        pivot = build_stock_pivot(...)
+        rec.rows_out = len(pivot)
+
+    @profiled("excel/stock")          # baris diambil dari argumen/hasil DataFrame
+    def parse_stock_file(fh): ...
+
+Tahap boleh bertingkat (depth dicatat per thread). StageTimer (engine) juga
+meneruskan lap-nya ke sini lewat record_stage. Record disimpan di ring buffer
+proses (PERF_MAX_RECORDS) sehingga aman dipanggil dari worker thread, lalu
+ditampilkan di panel "Performance" sidebar. Opsional: setiap record ditambahkan
+ke file JSON Lines (PERF_LOG_FILE) untuk analisis tren.
+
+Buffer dipakai bersama semua sesi, tetapi setiap record membawa id sesi
+Streamlit yang membuatnya (None di luar skrip Streamlit / worker thread).
+Panel hanya menampilkan record sesinya sendiri; toggle log dan Reset
+disimpan di st.session_state sehingga tidak memengaruhi sesi lain.
+PERF_LOG=1 mengaktifkan log untuk seluruh proses (termasuk worker thread).
+
+Delta memori = selisih RSS proses (bukan tracemalloc, agar overhead tetap
+kecil); pandas/numpy tidak selalu mengembalikan memori ke OS, jadi angka
+negatif/nol berarti memori dipakai ulang, bukan tidak ada alokasi.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+PERF_LOG_FILE    = os.environ.get("PERF_LOG_FILE", os.path.join(".cache", "perf_log.jsonl"))
+PERF_MAX_RECORDS = 500
+PERF_LOG_KEY     = "perf_log_on"      # st.session_state: log per sesi
+PERF_RESET_KEY   = "perf_reset_seq"   # st.session_state: checkpoint Reset per sesi
+
+_records    = deque(maxlen=PERF_MAX_RECORDS)
+_lock       = threading.Lock()
+_local      = threading.local()
+_seq        = 0
+_log_path   = PERF_LOG_FILE if os.environ.get("PERF_LOG", "") == "1" else None
+_PAGE_BYTES = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class StageRecord:
+    stage:        str
+    started:      str            # waktu mulai (ISO)
+    seconds:      float = 0.0
+    rows_in:      int | None = None
+    rows_out:     int | None = None
+    mem_delta_mb: float | None = None
+    depth:        int = 0
+    thread:       str = ""
+    seq:          int = 0        # urutan mulai (untuk tampilan bertingkat)
+    session:      str | None = None  # id sesi Streamlit pembuat record
+
+
+# ── Pengukuran ─────────────────────────────────────────────────────────────────
+def _rss_mb() -> float | None:
+    """RSS proses saat ini (MB); None jika tidak tersedia (mis. Windows tanpa psutil)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_BYTES / 2**20
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except Exception:
+        return None
+
+
+def _n_rows(obj) -> int | None:
+    """Jumlah baris DataFrame/Series/array; tuple → elemen pertama, SparseGrid → baris aktif."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(obj)
+    if isinstance(obj, tuple) and obj:
+        return _n_rows(obj[0])
+    for attr in ("grid", "active"):
+        inner = getattr(obj, attr, None)
+        if inner is not None:
+            return _n_rows(inner)
+    return None
+
+
+def _next_seq() -> int:
+    global _seq
+    with _lock:
+        _seq += 1
+        return _seq
+
+
+def _session_id() -> str | None:
+    """Id sesi Streamlit thread ini; None di luar skrip (CLI, worker thread)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+def _session_wants_log(session: str | None) -> bool:
+    """Toggle log sesi pembuat record (hanya terbaca dari thread skrip sesi tsb)."""
+    if session is None:
+        return False
+    try:
+        return bool(st.session_state.get(PERF_LOG_KEY, False))
+    except Exception:
+        return False
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _store(rec: StageRecord) -> None:
+    with _lock:
+        _records.append(rec)
+        path = _log_path
+    if path is None and _session_wants_log(rec.session):
+        path = PERF_LOG_FILE
+    if path:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(rec)) + "\n")
+        except OSError:
+            pass  # log hanya pelengkap → jangan ganggu analisis
+
+
+@contextmanager
+def profile_stage(stage: str, rows_in: int | None = None):
+    """Ukur satu tahap. Record di-yield agar pemanggil bisa mengisi rows_out."""
+    stack = _stack()
+    rec = StageRecord(
+        stage=stage, started=datetime.now().isoformat(timespec="milliseconds"),
+        rows_in=rows_in, depth=len(stack), thread=threading.current_thread().name, seq=_next_seq(),
+        session=_session_id(),
+    )
+    mem0 = _rss_mb()
+    t0 = time.perf_counter()
+    stack.append(stage)
+    try:
+        yield rec
+    finally:
+        stack.pop()
+        rec.seconds = round(time.perf_counter() - t0, 4)
+        mem1 = _rss_mb()
+        if mem0 is not None and mem1 is not None:
+            rec.mem_delta_mb = round(mem1 - mem0, 1)
+        _store(rec)
+
+
+def profiled(stage: str | None = None):
+    """
+    Dekorator profile_stage. rows_in = baris argumen DataFrame pertama,
+    rows_out = baris hasil. Pasang DI BAWAH @st.cache_data agar hanya
+    eksekusi sungguhan (cache miss) yang tercatat.
+    """
+    def decorator(fn):
+        name = stage or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            rows_in = next((_n_rows(a) for a in (*args, *kwargs.values())
+                            if isinstance(a, (pd.DataFrame, pd.Series))), None)
+            with profile_stage(name, rows_in) as rec:
+                out = fn(*args, **kwargs)
+                rec.rows_out = _n_rows(out)
+            return out
+        return wrapper
+    return decorator
+
+
+def record_stage(stage: str, seconds: float, rows_out: int | None = None) -> None:
+    """Catat tahap yang sudah diukur di tempat lain (mis. lap StageTimer)."""
+    now = datetime.now()
+    _store(StageRecord(
+        stage=stage,
+        started=(now - pd.Timedelta(seconds=seconds)).isoformat(timespec="milliseconds"),
+        seconds=round(seconds, 4), rows_out=rows_out, depth=len(_stack()),
+        thread=threading.current_thread().name, seq=_next_seq(), session=_session_id(),
+    ))
+
+
+# ── Akses Record ───────────────────────────────────────────────────────────────
+def perf_checkpoint() -> int:
+    """Nomor urut terakhir; record dengan seq > checkpoint dibuat setelahnya."""
+    with _lock:
+        return _seq
+
+
+def perf_records(since: int = 0, session: str | None = None) -> pd.DataFrame:
+    """
+    Record (seq > since) urut waktu mulai, kolom: Tahap, Detik, Baris
+    Masuk/Keluar, Δ Memori MB. session → hanya record sesi tersebut (plus
+    record tanpa sesi, mis. dari worker thread).
+    """
+    with _lock:
+        recs = [asdict(r) for r in _records
+                if r.seq > since and (session is None or r.session in (session, None))]
+    cols = ["Tahap", "Detik", "Baris Masuk", "Baris Keluar", "Δ Memori MB", "Thread", "Mulai"]
+    if not recs:
+        return pd.DataFrame(columns=cols)
+    df = pd.DataFrame(recs).sort_values("seq", kind="stable")
+    df["stage"] = ["· " * d + s for d, s in zip(df["depth"], df["stage"])]
+    return (
+        df.rename(columns={"stage": "Tahap", "seconds": "Detik", "rows_in": "Baris Masuk",
+                           "rows_out": "Baris Keluar", "mem_delta_mb": "Δ Memori MB",
+                           "thread": "Thread", "started": "Mulai"})[cols]
+        .reset_index(drop=True)
+    )
+
+
+def clear_perf_records() -> None:
+    """Kosongkan buffer seluruh proses (CLI/test; panel memakai Reset per sesi)."""
+    with _lock:
+        _records.clear()
+
+
+def set_perf_log(path: str | None) -> None:
+    """Aktifkan (path) / matikan (None) log untuk seluruh proses, seperti PERF_LOG=1."""
+    global _log_path
+    with _lock:
+        _log_path = path
+
+
+# ── Panel Sidebar ──────────────────────────────────────────────────────────────
+def render_perf_panel(since: int = 0) -> None:
+    """
+    Panel "Performance" di sidebar: tahap sesi ini dari run skrip ini
+    (seq > since) atau sejak Reset terakhir sesi ini.
+    """
+    session = _session_id()
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        scope = st.radio("Tampilkan", ["Run ini", "Semua"], horizontal=True, key="perf_scope")
+        reset_seq = st.session_state.get(PERF_RESET_KEY, 0)
+        df = perf_records(max(since, reset_seq) if scope == "Run ini" else reset_seq, session)
+        if df.empty:
+            st.caption("Belum ada tahap yang tercatat.")
+        else:
+            top = df.loc[~df["Tahap"].str.startswith("·"), "Detik"].sum()
+            st.caption(f"{len(df)} tahap · total tingkat atas {top:.2f} detik")
+            st.dataframe(df.drop(columns=["Thread", "Mulai"]), hide_index=True, use_container_width=True)
+
+        if _log_path is not None:
+            st.caption(f"Log aktif untuk seluruh proses (PERF_LOG) → {_log_path}")
+        else:
+            st.checkbox("Simpan ke log file", key=PERF_LOG_KEY,
+                        help=f"Tambahkan setiap tahap sesi ini ke {PERF_LOG_FILE} (JSON Lines).")
+        if st.button("Reset", key="perf_reset"):
+            st.session_state[PERF_RESET_KEY] = perf_checkpoint()
+            st.rerun()
@@ -0,0 +1,118 @@
+"""
+utils/result_store.py
+Store dataset & hasil analisis: disimpan SEKALI, immutable, berversi.
+
+Session state tidak memegang DataFrame langsung, melainkan ResultHandle
+(kind, version, nilai). Versi dataset penjualan = content hash, produk/stock =
+id file + modifiedTime, hasil analisis = uuid per run. Handle dengan versi sama
+berbagi satu objek lewat registry proses (weakref): beberapa sesi yang memuat
+data identik tidak menyimpan salinan masing-masing, dan objek dibebaskan
+begitu tidak ada handle yang memegangnya.
+
+Halaman membaca lewat view(): salinan dangkal copy-on-write — tidak menyalin
+data, dan penulisan oleh halaman hanya mengubah view-nya sendiri. Turunan
+deterministik yang mahal (produk siap pakai, grid tanpa OTHERS) dihitung sekali
+per versi lewat derive(), bukan di setiap interaksi widget.
+
+Copy-on-write pandas harus aktif (default di pandas 3; app.py memanggil
+enable_copy_on_write() untuk pandas 2).
+"""
+
+import threading
+import uuid
+import weakref
+from dataclasses import dataclass, field, replace
+import pandas as pd
+import streamlit as st
+
+from .preprocess import sales_fingerprint
+from .sparse_grid import SparseGrid
+
+_REGISTRY = weakref.WeakValueDictionary()   # (kind, version[, turunan]) → nilai
+_LOCK     = threading.Lock()
+
+
+def enable_copy_on_write() -> None:
+    """Aktifkan copy-on-write pandas 2 (pandas 3 selalu CoW)."""
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def _view(value):
+    """Salinan dangkal: objek baru, data dipakai bersama (CoW)."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, SparseGrid):
+        return replace(value, active=_view(value.active), items=_view(value.items), fill=dict(value.fill))
+    return value
+
+
+def _intern(key: tuple, value):
+    """Nilai kanonik untuk key: pakai yang sudah ada di registry jika masih hidup."""
+    with _LOCK:
+        existing = _REGISTRY.get(key)
+        if existing is not None:
+            return existing
+        try:
+            _REGISTRY[key] = value
+        except TypeError:
+            pass  # tuple/list tidak mendukung weakref → tidak dibagi antar sesi
+        return value
+
+
+# ── Handle ─────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True, eq=False)
+class ResultHandle:
+    kind:     str
+    version:  str
+    _value:   object = field(repr=False)
+    _derived: dict   = field(default_factory=dict, repr=False)
+
+    @property
+    def rows(self) -> int:
+        value = self._value
+        if isinstance(value, SparseGrid):
+            return len(value.active)
+        return len(value) if hasattr(value, "__len__") else 0
+
+    def view(self):
+        """View read-only (copy-on-write) dari nilai yang tersimpan."""
+        return _view(self._value)
+
+    def derive(self, name: str, fn):
+        """
+        fn(view) dihitung sekali per (kind, version, name) lalu disimpan di
+        handle; hasilnya juga dikembalikan sebagai view.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            key = (self.kind, self.version, name)
+            with _LOCK:
+                value = _REGISTRY.get(key)
+            if value is None:
+                value = fn(self.view())   # di luar lock: sesi lain tidak ikut menunggu
+            value = _intern(key, value)
+            self._derived[name] = value
+        return _view(value)
+
+
+def put_result(kind: str, value, version: str | None = None) -> ResultHandle:
+    """
+    Simpan nilai (DataFrame / SparseGrid / lainnya) sebagai handle immutable.
+    version default: content hash untuk DataFrame, uuid untuk lainnya.
+    """
+    if version is None:
+        version = sales_fingerprint(value) if isinstance(value, pd.DataFrame) else uuid.uuid4().hex
+    return ResultHandle(kind, version, _intern((kind, version), value))
+
+
+# ── Akses dari Session State ───────────────────────────────────────────────────
+def session_handle(key: str) -> ResultHandle | None:
+    value = st.session_state.get(key)
+    return value if isinstance(value, ResultHandle) else None
+
+
+def session_view(key: str, default=None):
+    """View nilai handle di st.session_state[key]; default jika belum ada."""
+    handle = session_handle(key)
+    return handle.view() if handle is not None else default
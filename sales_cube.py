@@ -0,0 +1,266 @@
+"""
+utils/sales_cube.py
+Cube agregat penjualan harian per (City, No. Barang, Platform, tanggal).
+
+Dibangun SEKALI per versi dataset dari artefak preprocess: baris faktur
+dijumlahkan per hari dan dimensi, lalu disimpan sebagai array integer ringkas
+(kode hari int32 + kode kategori int32 per dimensi + kuantitas) yang terurut
+per hari. Query jendela waktu (bucket 30/60/90 hari, kolom bulanan, Tanggal
+Akhir apa pun) cukup memotong array dengan searchsorted lalu bincount —
+tanpa memindai ulang data penjualan mentah.
+
+Cube juga disimpan ke disk (.npz) per content hash, sehingga restart aplikasi
+tidak perlu membangun ulang. Tanggal dihitung per hari kalender (jam diabaikan).
+"""
+
+import os
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .analysis import BULAN_BUCKET_COLS
+from .mapping import map_sales_dimensions
+from .preprocess import get_preprocessed_sales, _session_fingerprint
+from .profiling import profiled
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+CUBE_DIMS       = ("City", "No. Barang", "Platform")
+CUBE_KEYS       = ("City", "No. Barang")
+CUBE_DIR        = os.environ.get("SALES_CUBE_DIR", os.path.join(".cache", "sales_cube"))
+CUBE_KEEP_FILES = 4
+_CUBE_FORMAT    = 1
+_DAY            = np.timedelta64(1, "D")
+
+
+@dataclass(frozen=True)
+class SalesCube:
+    origin: pd.Timestamp    # tanggal untuk kode hari 0
+    day:    np.ndarray      # int32, terurut naik
+    codes:  dict            # dimensi → kode int32 (-1 = kosong)
+    labels: dict            # dimensi → pd.Index kategori
+    order:  dict            # dimensi → kode dalam urutan kemunculan pertama
+    qty:    np.ndarray      # float64, jumlah Kuantitas per sel
+
+    # ── Ringkasan ──────────────────────────────────────────────────────────────
+    @property
+    def empty(self) -> bool:
+        return len(self.day) == 0
+
+    @property
+    def min_date(self) -> pd.Timestamp:
+        return self.origin + pd.Timedelta(days=int(self.day[0])) if len(self.day) else pd.NaT
+
+    @property
+    def max_date(self) -> pd.Timestamp:
+        return self.origin + pd.Timedelta(days=int(self.day[-1])) if len(self.day) else pd.NaT
+
+    def uniques(self, dim: str) -> np.ndarray:
+        """Nilai dimensi (str) dalam urutan kemunculan, setara df[dim].dropna().unique()."""
+        return np.asarray(self.labels[dim][self.order[dim]]).astype(str)
+
+    def has_sales(self, start, end) -> bool:
+        lo, hi = self._day_bounds(start, end)
+        return hi > lo
+
+    # ── Query jendela ──────────────────────────────────────────────────────────
+    def range_sums(self, ranges: dict, keys=CUBE_KEYS) -> pd.DataFrame:
+        """
+        Jumlah Kuantitas per grup `keys` untuk setiap rentang tanggal inklusif
+        {nama kolom: (start, end)}. Grup yang punya baris di salah satu rentang
+        muncul (urut kode kategori, sama dengan groupby observed=True); rentang
+        tanpa penjualan bernilai 0.
+        """
+        keys = list(keys)
+        bounds = {name: self._day_bounds(s, e) for name, (s, e) in ranges.items()}
+        lo = min((b[0] for b in bounds.values()), default=0)
+        hi = max((b[1] for b in bounds.values()), default=0)
+
+        pos = np.arange(lo, max(lo, hi))
+        in_range = {name: (pos >= b[0]) & (pos < b[1]) for name, b in bounds.items()}
+        sel = np.zeros(len(pos), dtype=bool)
+        for m in in_range.values():
+            sel |= m
+        for k in keys:
+            sel &= self.codes[k][lo:max(lo, hi)] >= 0
+
+        rows = pos[sel]
+        group, out = self._group(rows, keys)
+        qty = self.qty[rows]
+        for name, m in in_range.items():
+            out[name] = np.bincount(group, weights=qty * m[sel], minlength=len(out))
+        return out
+
+    def window_buckets(self, end_date, keys=CUBE_KEYS) -> pd.DataFrame:
+        """Setara bucket_sales_30d(penjualan 90 hari, end_date): Penjualan Bln 1/2/3."""
+        end = pd.Timestamp(end_date)
+        return self.range_sums(
+            {
+                col: (end - pd.Timedelta(days=30 * i + 29), end - pd.Timedelta(days=30 * i))
+                for i, col in enumerate(BULAN_BUCKET_COLS)
+            },
+            keys,
+        )
+
+    def monthly_sums(self, start, end, keys=CUBE_KEYS) -> pd.DataFrame:
+        """Kuantitas per bulan kalender (kolom pd.Period) dalam rentang [start, end]."""
+        keys = list(keys)
+        lo, hi = self._day_bounds(start, end)
+        rows = np.arange(lo, hi)
+        for k in keys:
+            rows = rows[self.codes[k][rows] >= 0]
+
+        months = (self.origin.to_datetime64().astype("datetime64[D]") + self.day[rows] * _DAY).astype("datetime64[M]")
+        month_codes, month_vals = pd.factorize(months.astype(np.int64), sort=True)
+        group, out = self._group(rows, keys)
+        grid = np.zeros((len(out), len(month_vals)))
+        np.add.at(grid, (group, month_codes), self.qty[rows])
+
+        periods = [pd.Period(str(np.datetime64(int(m), "M")), freq="M") for m in month_vals]
+        return pd.concat([out, pd.DataFrame(grid, columns=periods)], axis=1)
+
+    # ── Internal ───────────────────────────────────────────────────────────────
+    def _day_bounds(self, start, end) -> tuple[int, int]:
+        """Posisi [lo, hi) baris cube dengan tanggal dalam [start, end]."""
+        first = (pd.Timestamp(start).normalize() - self.origin) // pd.Timedelta(days=1)
+        last  = (pd.Timestamp(end).normalize() - self.origin) // pd.Timedelta(days=1)
+        return (
+            int(np.searchsorted(self.day, first, side="left")),
+            int(np.searchsorted(self.day, last, side="right")),
+        )
+
+    def _group(self, rows: np.ndarray, keys: list) -> tuple[np.ndarray, pd.DataFrame]:
+        """Kode grup per baris + DataFrame kunci grup (Categorical, terurut kode)."""
+        sizes = [len(self.labels[k]) for k in keys]
+        flat  = np.ravel_multi_index([self.codes[k][rows] for k in keys], sizes)
+        uniq, group = np.unique(flat, return_inverse=True)
+        key_codes = np.unravel_index(uniq, sizes)
+        out = pd.DataFrame({
+            k: pd.Categorical.from_codes(c, categories=self.labels[k])
+            for k, c in zip(keys, key_codes)
+        })
+        return group.ravel(), out
+
+
+# ── Build ──────────────────────────────────────────────────────────────────────
+@profiled("cube/build")
+def build_sales_cube(penjualan: pd.DataFrame, dims=CUBE_DIMS) -> SalesCube:
+    """
+    Bangun cube dari data penjualan ter-preprocess (Tgl Faktur datetime).
+    Platform diturunkan dari Dept./Nama Pelanggan jika kolomnya belum ada.
+    """
+    dims = list(dims)
+    df = penjualan
+    if "Platform" in dims and "Platform" not in df.columns:
+        if {"Dept.", "Nama Pelanggan"} & set(df.columns):
+            df = df.assign(Platform=map_sales_dimensions(df, columns=["Platform"])["Platform"])
+        else:
+            dims.remove("Platform")
+    dims = [d for d in dims if d in df.columns]
+
+    tgl = df["Tgl Faktur"]
+    valid = tgl.notna().to_numpy()
+    dates = tgl.to_numpy()[valid].astype("datetime64[D]")
+    origin = pd.Timestamp(dates.min()) if len(dates) else pd.Timestamp("1970-01-01")
+    day = (dates - origin.to_datetime64().astype("datetime64[D]")).astype(np.int64)
+
+    codes, labels, order = {}, {}, {}
+    for d in dims:
+        cat = df[d] if isinstance(df[d].dtype, pd.CategoricalDtype) else df[d].astype("category")
+        labels[d] = cat.cat.categories
+        c = cat.cat.codes.to_numpy()[valid]
+        codes[d] = c
+        order[d] = pd.unique(c[c >= 0])
+
+    qty = pd.to_numeric(df["Kuantitas"], errors="coerce").to_numpy(dtype=float)[valid]
+    agg = (
+        pd.DataFrame({"_day": day, **codes, "_qty": qty})
+        .groupby(["_day"] + dims, sort=True)["_qty"]
+        .sum()
+        .reset_index()
+    )
+    return SalesCube(
+        origin=origin,
+        day=agg["_day"].to_numpy(dtype=np.int32),
+        codes={d: agg[d].to_numpy(dtype=np.int32) for d in dims},
+        labels=labels,
+        order=order,
+        qty=agg["_qty"].to_numpy(dtype=float),
+    )
+
+
+# ── Disk ───────────────────────────────────────────────────────────────────────
+def _cube_path(fingerprint: str, cube_dir: str = CUBE_DIR) -> str:
+    return os.path.join(cube_dir, f"{fingerprint}.v{_CUBE_FORMAT}.npz")
+
+
+def store_sales_cube(fingerprint: str, cube: SalesCube, cube_dir: str = CUBE_DIR) -> None:
+    os.makedirs(cube_dir, exist_ok=True)
+    arrays = {
+        "origin": np.array(cube.origin.value, dtype=np.int64),
+        "day":    cube.day,
+        "qty":    cube.qty,
+        "dims":   np.array(list(cube.codes), dtype=str),
+    }
+    for i, d in enumerate(cube.codes):
+        arrays[f"codes_{i}"]  = cube.codes[d]
+        arrays[f"labels_{i}"] = np.asarray(cube.labels[d]).astype(str)
+        arrays[f"order_{i}"]  = cube.order[d]
+    path = _cube_path(fingerprint, cube_dir)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    _evict_old_cubes(cube_dir)
+
+
+def load_sales_cube(fingerprint: str, cube_dir: str = CUBE_DIR) -> SalesCube | None:
+    path = _cube_path(fingerprint, cube_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            dims = [str(d) for d in z["dims"]]
+            cube = SalesCube(
+                origin=pd.Timestamp(int(z["origin"])),
+                day=z["day"],
+                codes={d: z[f"codes_{i}"] for i, d in enumerate(dims)},
+                labels={d: pd.Index(z[f"labels_{i}"].tolist()) for i, d in enumerate(dims)},
+                order={d: z[f"order_{i}"] for i, d in enumerate(dims)},
+                qty=z["qty"],
+            )
+    except Exception:
+        # File cube rusak/terpotong → anggap miss dan hapus
+        os.remove(path)
+        return None
+    os.utime(path)
+    return cube
+
+
+def _evict_old_cubes(cube_dir: str = CUBE_DIR, keep: int = CUBE_KEEP_FILES) -> None:
+    """Sisakan `keep` file cube yang terakhir dipakai."""
+    files = [os.path.join(cube_dir, f) for f in os.listdir(cube_dir) if f.endswith(".npz")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# ── Akses dari halaman ─────────────────────────────────────────────────────────
+@st.cache_resource(max_entries=4, show_spinner="Membangun cube penjualan...")
+def _sales_cube_cached(fingerprint: str, _df_raw: pd.DataFrame) -> SalesCube:
+    cube = load_sales_cube(fingerprint)
+    if cube is None:
+        penjualan, _ = get_preprocessed_sales(_df_raw, fingerprint)
+        cube = build_sales_cube(penjualan)
+        try:
+            store_sales_cube(fingerprint, cube)
+        except OSError:
+            pass  # disk read-only → cube tetap dipakai dari memori
+    return cube
+
+
+def get_sales_cube(df_raw: pd.DataFrame, fingerprint: str | None = None) -> SalesCube:
+    """Cube penjualan untuk df_penjualan (sekali per content hash, dipakai bersama)."""
+    return _sales_cube_cached(fingerprint or _session_fingerprint(df_raw), df_raw)
@@ -0,0 +1,164 @@
+"""
+utils/sales_loader.py
+Loader paralel untuk semua file penjualan di Google Drive.
+
+Alur per file:
+    1. Cek cache Parquet lokal (drive_cache) → jika hit, selesai.
+    2. Download di thread pool (I/O-bound), masing-masing dengan _with_backoff.
+       Retry terjadi di dalam slot worker, sehingga jumlah request ke Drive
+       tidak pernah melebihi batas konkurensi.
+    3. Parse Excel/CSV di process pool (CPU-bound, openpyxl memegang GIL).
+       Pool dibuat sekali per proses dengan konteks "spawn": fork dari server
+       Streamlit yang multi-thread bisa mewarisi lock yang sedang dipegang
+       thread lain (mis. thread download) sehingga worker deadlock.
+    4. Simpan hasil parse ke cache.
+Progress dilaporkan per file lewat callback yang dipanggil dari thread utama,
+sehingga aman untuk memanggil fungsi Streamlit (st.progress, dll.).
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+import pandas as pd
+
+from .gdrive import download_bytes, drive_credentials
+from .drive_cache import cache_key, load_cached_frame, store_cached_frame
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+MAX_DOWNLOAD_WORKERS = int(os.environ.get("DRIVE_MAX_WORKERS", "4"))
+MAX_PARSE_WORKERS    = int(os.environ.get("PARSE_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_parse_pools     = {}   # jumlah worker → ProcessPoolExecutor (hidup selama proses)
+_parse_pool_lock = threading.Lock()
+
+
+# ── Parse (dijalankan di process pool → harus top-level & picklable) ──────────
+def parse_file_bytes(data: bytes, file_name: str, read_kwargs: dict) -> pd.DataFrame:
+    """Baca bytes file sebagai DataFrame (CSV atau Excel)."""
+    fh = BytesIO(data)
+    if file_name.endswith(".csv"):
+        return pd.read_csv(fh, **read_kwargs)
+    return pd.read_excel(fh, **read_kwargs)
+
+
+def _get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool parse bersama untuk semua sesi (satu per jumlah worker)."""
+    with _parse_pool_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _parse_pools[workers] = pool
+        return pool
+
+
+def _discard_parse_pool(pool: ProcessPoolExecutor) -> None:
+    """Buang pool yang rusak (worker mati); pemanggilan berikutnya membuat pool baru."""
+    with _parse_pool_lock:
+        for workers, p in list(_parse_pools.items()):
+            if p is pool:
+                del _parse_pools[workers]
+    pool.shutdown(wait=False)
+
+
+# ── Loader Paralel ─────────────────────────────────────────────────────────────
+def load_files_parallel(_drive_service, files: list, max_workers: int = MAX_DOWNLOAD_WORKERS,
+                        parse_workers: int = MAX_PARSE_WORKERS, progress_cb=None,
+                        credentials=None, **read_kwargs) -> tuple[list, list]:
+    """
+    Muat banyak file Drive secara paralel.
+
+    progress_cb(done, total, file_name, source) dipanggil setiap satu file
+    selesai; source = "cache", "drive" atau "error".
+    parse_workers=0 → parse dilakukan di thread utama (tanpa process pool).
+    credentials: kredensial service account untuk service per worker thread
+    (default = kredensial dari init_drive_service).
+
+    Mengembalikan (dfs, errors): dfs sesuai urutan `files` (DataFrame kosong
+    untuk file yang gagal), errors berisi (file id, nama file, pesan error) —
+    nama file Drive tidak unik, sehingga id dipakai untuk mencocokkan.
+    """
+    total  = len(files)
+    dfs    = [pd.DataFrame()] * total
+    errors = []
+    done   = 0
+
+    def _report(file_name, source):
+        nonlocal done
+        done += 1
+        if progress_cb is not None:
+            progress_cb(done, total, file_name, source)
+
+    # 1. Cache hit dilayani langsung
+    pending = []
+    for i, f in enumerate(files):
+        key = cache_key(f, **read_kwargs)
+        cached = load_cached_frame(key) if key is not None else None
+        if cached is not None:
+            dfs[i] = cached
+            _report(f["name"], "cache")
+        else:
+            pending.append((i, f, key))
+
+    if not pending:
+        return dfs, errors
+
+    # 2–4. Download (thread) → parse (process) → simpan cache. Future download
+    #      dan parse ditunggu bersama agar progress terus bergerak.
+    #      Jika pool parse rusak, sisa file di-parse di thread utama.
+    credentials = credentials if credentials is not None else drive_credentials()
+    parse_pool = _get_parse_pool(parse_workers) if parse_workers > 0 else None
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as download_pool:
+        downloads = {
+            download_pool.submit(download_bytes, _drive_service, f["id"], credentials=credentials): (i, f, key)
+            for i, f, key in pending
+        }
+        parses  = {}
+        waiting = set(downloads)
+        while waiting:
+            finished, waiting = wait(waiting, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                if fut in downloads:
+                    i, f, key = downloads[fut]
+                    try:
+                        data = fut.result()
+                    except Exception as e:
+                        errors.append((f["id"], f["name"], str(e)))
+                        _report(f["name"], "error")
+                        continue
+                    if parse_pool is not None:
+                        try:
+                            parse_fut = parse_pool.submit(parse_file_bytes, data, f["name"], read_kwargs)
+                        except (BrokenProcessPool, RuntimeError):   # rusak / dibuang sesi lain
+                            _discard_parse_pool(parse_pool)
+                            parse_pool = None
+                        else:
+                            parses[parse_fut] = (i, f, key)
+                            waiting.add(parse_fut)
+                            continue
+                    ok = _finish_parse(dfs, errors, i, f, key,
+                                       lambda: parse_file_bytes(data, f["name"], read_kwargs))
+                    _report(f["name"], "drive" if ok else "error")
+                else:
+                    i, f, key = parses.pop(fut)
+                    if parse_pool is not None and isinstance(fut.exception(), BrokenProcessPool):
+                        _discard_parse_pool(parse_pool)
+                        parse_pool = None
+                    ok = _finish_parse(dfs, errors, i, f, key, fut.result)
+                    _report(f["name"], "drive" if ok else "error")
+
+    return dfs, errors
+
+
+def _finish_parse(dfs: list, errors: list, i: int, f: dict, key, get_result) -> bool:
+    try:
+        df = get_result()
+    except Exception as e:
+        errors.append((f["id"], f["name"], str(e)))
+        return False
+    dfs[i] = df
+    if key is not None and not df.empty:
+        store_cached_frame(key, df)
+    return True
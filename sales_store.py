@@ -0,0 +1,191 @@
+"""
+utils/sales_store.py
+Store penjualan gabungan yang persisten + ingestion inkremental.
+
+Store terdiri dari:
+    - parts/<hash id>.parquet : baris penjualan satu file Drive (append-only)
+    - manifest.json           : {file_id: {name, modifiedTime, md5Checksum, rows}}
+Saat refresh hanya file baru/berubah yang dimuat dan ditulis sebagai part
+sendiri; part file yang diganti ditimpa, part file yang dihapus di Drive
+dibuang. Part yang tidak berubah tidak pernah ditulis ulang, sehingga biaya
+tulis refresh sebanding dengan data baru, bukan seluruh histori. Semua file
+ditulis lewat file sementara unik (tempfile) + os.replace, sehingga dua sesi
+yang refresh bersamaan tidak saling menimpa file setengah jadi.
+
+Refresh tanpa perubahan (versi manifest sama dengan versi yang sudah dipegang
+pemanggil) tidak membaca part sama sekali: pemanggil memakai frame yang sudah
+ada, sehingga tombol muat ulang tanpa file baru tidak sebanding dengan histori.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import pandas as pd
+
+from .schema import cache_safe_frame
+from .sales_loader import load_files_parallel
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+STORE_DIR      = os.environ.get("SALES_STORE_DIR", os.path.join(".cache", "sales_store"))
+_PARTS_DIR     = "parts"
+_MANIFEST_FILE = "manifest.json"
+_LEGACY_FILE   = "consolidated.parquet"   # format lama (satu file gabungan)
+
+
+# ── Manifest ───────────────────────────────────────────────────────────────────
+def _revision(file_meta: dict) -> dict:
+    return {
+        "name":         file_meta.get("name", ""),
+        "modifiedTime": file_meta.get("modifiedTime", ""),
+        "md5Checksum":  file_meta.get("md5Checksum", ""),
+    }
+
+
+def load_manifest(store_dir: str = STORE_DIR) -> dict:
+    path = os.path.join(store_dir, _MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def manifest_version(manifest: dict) -> str:
+    """Hash ringkas dari isi manifest → identitas versi dataset penjualan."""
+    payload = json.dumps(
+        {k: _revision(v) for k, v in manifest.items()}, sort_keys=True
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def diff_manifest(manifest: dict, files: list) -> dict:
+    """Bandingkan manifest dengan daftar file Drive saat ini."""
+    current = {f["id"]: f for f in files}
+    added, changed, unchanged = [], [], []
+    for fid, f in current.items():
+        if fid not in manifest:
+            added.append(f)
+        elif not f.get("modifiedTime") or _revision(f) != _revision(manifest[fid]):
+            # Tanpa modifiedTime perubahan tidak bisa dideteksi → selalu muat ulang
+            changed.append(f)
+        else:
+            unchanged.append(f)
+    removed = [fid for fid in manifest if fid not in current]
+    return {"added": added, "changed": changed, "unchanged": unchanged, "removed": removed}
+
+
+# ── Part per File ──────────────────────────────────────────────────────────────
+def _part_path(file_id: str, store_dir: str) -> str:
+    name = hashlib.sha1(file_id.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(store_dir, _PARTS_DIR, f"{name}.parquet")
+
+
+def _atomic_write(path: str, write) -> None:
+    """write(tmp_path) ke file sementara unik di folder tujuan, lalu os.replace."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        _safe_remove(tmp)
+        raise
+
+
+def _safe_remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_part(df: pd.DataFrame, file_id: str, store_dir: str) -> None:
+    # Kolom campuran: kolom skema penjualan dikonversi seperti preprocess;
+    # kolom lain menjadi teks (part adalah satu-satunya salinan di store)
+    safe = cache_safe_frame(df, strict=False)
+    _atomic_write(_part_path(file_id, store_dir), lambda tmp: safe.to_parquet(tmp, index=False))
+
+
+def _read_part(file_id: str, store_dir: str) -> pd.DataFrame | None:
+    try:
+        return pd.read_parquet(_part_path(file_id, store_dir))
+    except Exception:
+        return None
+
+
+def _write_manifest(manifest: dict, store_dir: str) -> None:
+    def _write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+    _atomic_write(os.path.join(store_dir, _MANIFEST_FILE), _write)
+
+
+def load_store(store_dir: str = STORE_DIR, manifest: dict | None = None) -> pd.DataFrame:
+    """Gabungan semua part file di manifest. Kosong jika belum ada."""
+    manifest = load_manifest(store_dir) if manifest is None else manifest
+    parts = [_read_part(fid, store_dir) for fid in sorted(manifest)]
+    parts = [p for p in parts if p is not None and not p.empty]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+# ── Refresh Inkremental ────────────────────────────────────────────────────────
+def refresh_sales_store(_drive_service, files: list, store_dir: str = STORE_DIR,
+                        progress_cb=None, loaded_version: str | None = None) -> tuple[pd.DataFrame | None, dict]:
+    """
+    Sinkronkan store dengan daftar file Drive.
+
+    Mengembalikan (df_penjualan, summary). summary berisi jumlah file
+    added/changed/unchanged/removed, daftar error (file_id, nama, pesan), dan
+    `version` (hash manifest setelah refresh). loaded_version = versi dataset
+    yang sudah dipegang pemanggil; jika store tidak berubah dan versinya sama,
+    part tidak dibaca ulang dan df_penjualan = None (frame lama masih berlaku).
+    """
+    os.makedirs(os.path.join(store_dir, _PARTS_DIR), exist_ok=True)
+    _safe_remove(os.path.join(store_dir, _LEGACY_FILE))
+    # Entri tanpa part di disk (store lama / part hilang) → dimuat ulang
+    manifest = {
+        fid: meta for fid, meta in load_manifest(store_dir).items()
+        if os.path.exists(_part_path(fid, store_dir))
+    }
+
+    delta   = diff_manifest(manifest, files)
+    to_load = delta["added"] + delta["changed"]
+
+    errors  = []
+    updated = False
+    if to_load:
+        dfs, errors = load_files_parallel(_drive_service, to_load, progress_cb=progress_cb)
+        failed = {fid for fid, _, _ in errors}
+        for f, df in zip(to_load, dfs):
+            if f["id"] in failed:
+                continue   # part lama (jika ada) dipertahankan
+            _write_part(df, f["id"], store_dir)
+            manifest[f["id"]] = {**_revision(f), "rows": len(df)}
+            updated = True
+
+    for fid in delta["removed"]:
+        manifest.pop(fid, None)
+        updated = True
+
+    if updated:
+        # Part ditulis lebih dulu: jika proses mati sebelum manifest diganti,
+        # revisi di manifest lama tidak cocok → refresh berikutnya memuat
+        # ulang file tersebut (aman, hanya lebih lambat).
+        _write_manifest(manifest, store_dir)
+        for fid in delta["removed"]:
+            _safe_remove(_part_path(fid, store_dir))
+
+    summary = {
+        "added":     len(delta["added"]),
+        "changed":   len(delta["changed"]),
+        "unchanged": len(delta["unchanged"]),
+        "removed":   len(delta["removed"]),
+        "errors":    errors,
+        "version":   manifest_version(manifest),
+    }
+    if not updated and summary["version"] == loaded_version:
+        return None, summary
+    return load_store(store_dir, manifest), summary
@@ -0,0 +1,265 @@
+"""
+utils/schema.py
+Skema tipe ringkas untuk frame penjualan, produk, dan stock.
+
+Frame hasil baca Excel berisi kolom object: setiap sel teks adalah objek str
+Python tersendiri (No. Barang, Nama Pelanggan, Dept. berulang jutaan kali) dan
+kuantitas bertipe float64. apply_schema dijalankan SEKALI saat ingestion
+(halaman Input Data, engine headless) sehingga yang tersimpan di session_state
+sudah ringkas:
+    "category" → kode integer + kamus nilai unik (teks berulang)
+    "string"   → string Arrow (teks hampir unik per baris, mis. nama produk)
+    "count"    → integer terkecil yang aman (int32/int64) jika semua nilai
+                 bulat & tidak kosong; selain itu tetap float64
+    "raw"      → dibiarkan (mis. Tgl Faktur, di-parse oleh preprocess)
+Kolom di luar skema dioptimalkan otomatis: teks dengan rasio nilai unik
+≤ AUTO_CATEGORY_RATIO → category, numerik bulat → integer. Stock hanya
+mengoptimalkan kolom numerik (kolom gudang dijumlah per baris).
+
+Nilai kosong tetap NaN (bukan pd.NA) sehingga .astype(str), isna(), dan
+groupby berperilaku sama seperti pada kolom object.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+# ── Skema ──────────────────────────────────────────────────────────────────────
+SALES_SCHEMA = {
+    "No. Faktur":     "category",
+    "Tgl Faktur":     "raw",
+    "Nama Pelanggan": "category",
+    "Dept.":          "category",
+    "No. Barang":     "category",
+    "Kuantitas":      "count",
+    "Qty":            "count",
+}
+# Produk & stock: satu baris per SKU → string, bukan category (kolom ini ikut
+# ke hasil analisis sebagai kunci groupby/pivot; kunci category di pandas 2
+# memakai observed=False dan menghasilkan kombinasi kosong)
+PRODUK_SCHEMA = {
+    "No. Barang":      "string",
+    "BRAND Barang":    "string",
+    "Kategori Barang": "string",
+    "Nama Barang":     "string",
+}
+STOCK_SCHEMA = {
+    "No. Barang":        "string",
+    "Keterangan Barang": "string",
+}   # kolom gudang → integer lewat optimasi otomatis (hanya kolom numerik)
+
+# Kolom wajib per skema; salah satu dari tuple cukup
+SALES_REQUIRED  = ["No. Barang", "Tgl Faktur", ("Kuantitas", "Qty")]
+PRODUK_REQUIRED = ["No. Barang"]
+STOCK_REQUIRED  = ["No. Barang"]
+
+AUTO_CATEGORY_RATIO = 0.5
+
+
+class SchemaError(ValueError):
+    """Frame tidak memenuhi skema (kolom wajib hilang)."""
+
+
+# ── Konversi Kolom ─────────────────────────────────────────────────────────────
+def _string_dtype():
+    """String Arrow dengan NaN sebagai nilai kosong; object jika pyarrow tidak ada."""
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)     # pandas ≥ 2.3
+    except (TypeError, ImportError):
+        pass
+    try:
+        return pd.StringDtype("pyarrow_numpy")                # pandas 2.1–2.2
+    except (TypeError, ValueError, ImportError):
+        return object
+
+
+def _as_text(s: pd.Series) -> pd.Series:
+    """Nilai non-kosong → str (Excel bisa membaca No. Barang sebagai angka)."""
+    if pd.api.types.is_string_dtype(s) and not isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return s.where(s.isna(), s.astype(str))
+
+
+def _to_category(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return _as_text(s).astype("category")
+
+
+def _to_string(s: pd.Series) -> pd.Series:
+    dtype = _string_dtype()
+    if s.dtype == dtype:
+        return s
+    return _as_text(s).astype(dtype)
+
+
+def _to_count(s: pd.Series) -> pd.Series:
+    """Integer terkecil (min. int32) jika semua nilai bulat & tidak kosong."""
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        s = pd.to_numeric(s, errors="coerce")
+    if s.empty or s.isna().any():
+        return s
+    values = s.to_numpy()
+    if pd.api.types.is_float_dtype(s) and not np.array_equal(values, np.floor(values)):
+        return s
+    lo, hi = values.min(), values.max()
+    info = np.iinfo(np.int32)
+    return s.astype(np.int32 if info.min <= lo and hi <= info.max else np.int64)
+
+
+_CONVERTERS = {"category": _to_category, "string": _to_string, "count": _to_count}
+
+
+def _auto(s: pd.Series, text: bool = True) -> pd.Series:
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    if pd.api.types.is_numeric_dtype(s):
+        return _to_count(s)
+    if text and (s.dtype == object or pd.api.types.is_string_dtype(s)):
+        n = len(s)
+        if n and s.nunique(dropna=True) <= AUTO_CATEGORY_RATIO * n:
+            return _to_category(s)
+    return s
+
+
+# ── API ────────────────────────────────────────────────────────────────────────
+def check_schema(df: pd.DataFrame, required: list, name: str = "data") -> None:
+    """Lempar SchemaError jika kolom wajib tidak ada."""
+    missing = [
+        " / ".join(col) if isinstance(col, tuple) else col
+        for col in required
+        if not any(c in df.columns for c in (col if isinstance(col, tuple) else (col,)))
+    ]
+    if missing:
+        raise SchemaError(f"Kolom wajib tidak ditemukan pada {name}: {', '.join(missing)}")
+
+
+@profiled("schema/apply")
+def apply_schema(df: pd.DataFrame, schema: dict, required: list | None = None,
+                 name: str = "data", auto: bool | str = True) -> pd.DataFrame:
+    """
+    Frame baru dengan tipe sesuai skema (idempoten — frame yang sudah bertipe
+    tidak dikonversi ulang). Frame kosong dikembalikan apa adanya.
+    auto: True = optimasi otomatis kolom lain, "numeric" = hanya kolom numerik,
+    False = kolom lain dibiarkan.
+    """
+    if df.empty:
+        return df
+    if required:
+        check_schema(df, required, name)
+    out = {}
+    for col in df.columns:
+        kind = schema.get(col)
+        s = df[col]
+        if kind in _CONVERTERS:
+            out[col] = _CONVERTERS[kind](s)
+        elif kind is None and auto:
+            out[col] = _auto(s, text=auto is True)
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def apply_sales_schema(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_schema(df, SALES_SCHEMA, SALES_REQUIRED, "data penjualan")
+
+
+def apply_produk_schema(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_schema(df, PRODUK_SCHEMA, PRODUK_REQUIRED, "produk referensi")
+
+
+def apply_stock_schema(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_schema(df, STOCK_SCHEMA, STOCK_REQUIRED, "data stock", auto="numeric")
+
+
+def parse_sales_dates(s: pd.Series) -> pd.Series:
+    """Tgl Faktur → datetime64 (dayfirst, tidak valid → NaT); parse kanonik preprocess."""
+    return pd.to_datetime(s, dayfirst=True, errors="coerce")
+
+
+def _arrow_compatible(s: pd.Series) -> bool:
+    import pyarrow as pa
+    try:
+        pa.array(s, from_pandas=True)
+        return True
+    except (pa.ArrowException, TypeError, ValueError, OverflowError):
+        return False
+
+
+def cache_safe_frame(df: pd.DataFrame, strict: bool = True) -> pd.DataFrame | None:
+    """
+    Frame penjualan yang bisa ditulis ke cache Parquet tanpa mengubah hasil
+    preprocess_sales. Kolom object bertipe campuran (mis. No. Barang angka &
+    teks) dikonversi eksplisit menurut SALES_SCHEMA:
+        category/string → teks (pemakai selalu str()-kan kolom ini)
+        count           → numerik (pd.to_numeric seperti preprocess)
+        raw (Tgl Faktur) → datetime (parse_sales_dates seperti preprocess)
+    Kolom campuran lain tidak bisa dikonversi tanpa mengubah arti → None
+    (frame tidak di-cache); strict=False → kolom tsb dijadikan teks (untuk
+    store yang menjadi satu-satunya salinan data).
+    """
+    converted = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype != object or _arrow_compatible(s):
+            continue
+        kind = SALES_SCHEMA.get(col)
+        if kind in ("category", "string"):
+            converted[col] = _as_text(s)
+        elif kind == "count":
+            converted[col] = pd.to_numeric(s, errors="coerce")
+        elif col == "Tgl Faktur":
+            converted[col] = parse_sales_dates(s)
+        elif strict:
+            return None
+        else:
+            converted[col] = _as_text(s)
+    return df.assign(**converted) if converted else df
+
+
+def arrow_safe_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ubah kolom object menjadi teks (NaN dipertahankan) agar bisa ditulis ke
+    Parquet. Hanya untuk export; cache memakai cache_safe_frame.
+    """
+    out = df.copy()
+    for col in out.columns:
+        if out[col].dtype == object:
+            s = out[col]
+            out[col] = s.where(s.isna(), s.astype(str))
+    return out
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Memori frame termasuk isi string (deep)."""
+    return round(df.memory_usage(deep=True).sum() / 2**20, 1)
+
+
+# ── File Export Produk & Stock ─────────────────────────────────────────────────
+# Parser murni (tanpa klien Drive), sehingga engine & benchmark tidak memuat
+# googleapiclient.
+PRODUK_COLUMNS = ["No. Barang", "BRAND Barang", "Kategori Barang", "Nama Barang"]
+STOCK_HEADER = [
+    "No. Barang", "Keterangan Barang",
+    "A - ITC", "AT - TRANSIT ITC", "B", "BT - TRANSIT JKT",
+    "C", "C6", "CT - TRANSIT PUSAT", "D - SMG", "DT - TRANSIT SMG",
+    "E - JOG", "ET - TRANSIT JOG", "F - MLG", "FT - TRANSIT MLG",
+    "H - BALI", "HT - TRANSIT BALI", "X", "Y - SBY", "Y3 - Display Y", "YT - TRANSIT Y",
+]
+
+
+@profiled("excel/produk")
+def parse_produk_file(fh) -> pd.DataFrame:
+    """Parse export produk referensi (file/path Excel) — dipakai oleh gdrive & engine headless."""
+    df = pd.read_excel(fh, sheet_name="Sheet1 (2)", skiprows=6, usecols=[0, 1, 2, 3])
+    df.columns = PRODUK_COLUMNS
+    return apply_produk_schema(df)
+
+
+@profiled("excel/stock")
+def parse_stock_file(fh) -> pd.DataFrame:
+    """Parse export stock per gudang (file/path Excel) — dipakai oleh gdrive & engine headless."""
+    df = pd.read_excel(fh, sheet_name="Sheet1", skiprows=9, header=None)
+    df.columns = STOCK_HEADER[: len(df.columns)]
+    return apply_stock_schema(df)
@@ -0,0 +1,159 @@
+"""
+utils/sparse_grid.py
+Grid hasil City × SKU dalam bentuk sparse.
+
+Grid dense (MultiIndex.from_product kota × SKU) didominasi baris nol: sebagian
+besar SKU tidak punya penjualan maupun stok di sebagian besar kota. SparseGrid
+hanya menyimpan baris AKTIF yang dihitung penuh. Baris implisit (nol) bersifat
+deterministik dan diturunkan saat diminta dari:
+    fill        : nilai konstan per kolom (mis. Kategori ABC = "F")
+    group_fill  : nilai per (City, Kategori Barang), mis. Avg Log
+    sku_fill    : nilai per No. Barang, mis. Stock Total
+Tampilan dense dibentuk hanya lewat to_dense() / city_frame(dense=True).
+"""
+
+from dataclasses import dataclass, replace
+import numpy as np
+import pandas as pd
+
+GRID_KEYS  = ["City", "No. Barang"]
+GROUP_KEYS = ["City", "Kategori Barang"]
+
+
+@dataclass(frozen=True)
+class SparseGrid:
+    active:     pd.DataFrame              # baris City × SKU yang dihitung penuh
+    cities:     list                      # urutan kota pada grid dense
+    items:      pd.DataFrame              # atribut SKU (blok baris per kota)
+    fill:       dict                      # kolom → nilai baris implisit
+    group_fill: pd.DataFrame | None = None  # index (City, Kategori Barang)
+    sku_fill:   pd.DataFrame | None = None  # index No. Barang
+
+    # ── Ukuran ─────────────────────────────────────────────────────────────────
+    @property
+    def n_dense(self) -> int:
+        return len(self.cities) * len(self.items)
+
+    @property
+    def n_implicit(self) -> int:
+        """Jumlah baris nol yang tidak disimpan."""
+        per_sku = self.items["No. Barang"].value_counts()
+        pairs   = self.active[GRID_KEYS].drop_duplicates()
+        pairs   = pairs[pairs["City"].isin(self.cities)]
+        return self.n_dense - int(pairs["No. Barang"].map(per_sku).fillna(0).sum())
+
+    @property
+    def empty(self) -> bool:
+        return self.active.empty and self.n_dense == 0
+
+    # ── Filter ─────────────────────────────────────────────────────────────────
+    def filter_items(self, mask_fn) -> "SparseGrid":
+        """
+        Filter atribut produk. mask_fn(df) → boolean mask dan hanya boleh memakai
+        kolom yang ada di `items` (Kategori/Brand/Nama), karena diterapkan ke
+        baris aktif maupun implisit.
+        """
+        return replace(
+            self,
+            active=self.active[mask_fn(self.active)],
+            items=self.items[mask_fn(self.items)],
+        )
+
+    def drop_cities(self, cities) -> "SparseGrid":
+        cities = set(cities)
+        return replace(
+            self,
+            active=self.active[~self.active["City"].isin(cities)],
+            cities=[c for c in self.cities if c not in cities],
+        )
+
+    # ── Ringkasan tanpa materialisasi ─────────────────────────────────────────
+    def city_list(self, dense: bool = False) -> list:
+        if dense and len(self.items):
+            return sorted(self.cities)
+        return sorted(self.active["City"].unique())
+
+    def city_sizes(self, dense: bool = False) -> pd.Series:
+        """Jumlah baris city_frame(city, dense) per kota, tanpa membentuk frame."""
+        counts = pd.Series(self.active["City"].to_numpy()).value_counts()
+        if dense and len(self.items):
+            per_sku = self.items["No. Barang"].value_counts()
+            pairs   = self.active[GRID_KEYS].drop_duplicates()
+            covered = pairs["No. Barang"].map(per_sku).fillna(0).groupby(pairs["City"].to_numpy()).sum()
+            implicit = len(self.items) - covered.reindex(self.cities, fill_value=0)
+            counts = counts.add(implicit, fill_value=0)
+        return counts.astype(int)
+
+    def unique(self, col: str) -> list:
+        """Nilai unik kolom pada grid dense (termasuk nilai fill baris implisit)."""
+        values = set(self.active[col].dropna().unique())
+        if col in self.fill and pd.notna(self.fill[col]) and self.n_implicit:
+            values.add(self.fill[col])
+        return list(values)
+
+    def value_counts(self, col: str) -> pd.Series:
+        """value_counts() kolom pada grid dense; baris implisit dihitung dari fill."""
+        counts = self.active[col].value_counts()
+        n = self.n_implicit
+        if n and col in self.fill:
+            counts = counts.add(pd.Series({self.fill[col]: n}), fill_value=0).astype(int)
+        return counts.sort_values(ascending=False)
+
+    # ── Materialisasi ──────────────────────────────────────────────────────────
+    def implicit_rows(self, cities=None) -> pd.DataFrame:
+        """Baris nol untuk `cities` (default semua kota), kolom sama dengan active."""
+        if cities is not None:
+            wanted = set(cities)
+            cities = [c for c in self.cities if c in wanted]
+        else:
+            cities = list(self.cities)
+        n_items = len(self.items)
+        if not cities or n_items == 0:
+            return self.active.iloc[0:0]
+
+        city_arr = np.repeat(np.asarray(cities, dtype=object), n_items)
+        item_pos = np.tile(np.arange(n_items), len(cities))
+        sku_arr  = self.items["No. Barang"].to_numpy()[item_pos]
+        keep = ~pd.MultiIndex.from_arrays([city_arr, sku_arr]).isin(
+            pd.MultiIndex.from_frame(self.active[GRID_KEYS])
+        )
+
+        out = self.items.iloc[item_pos[keep]].reset_index(drop=True)
+        out.insert(0, "City", city_arr[keep])
+        for col in self.active.columns:
+            if col in out.columns:
+                continue
+            default = self.fill.get(col, np.nan)
+            if self.sku_fill is not None and col in self.sku_fill.columns:
+                out[col] = self.sku_fill[col].reindex(out["No. Barang"], fill_value=default).to_numpy()
+            elif self.group_fill is not None and col in self.group_fill.columns:
+                idx = pd.MultiIndex.from_arrays([out[k] for k in GROUP_KEYS])
+                out[col] = self.group_fill[col].reindex(idx, fill_value=default).to_numpy()
+            else:
+                out[col] = default
+
+        # Samakan dtype teks/kategori dengan baris aktif agar concat tidak jatuh ke object
+        for col in out.columns:
+            dtype = self.active[col].dtype
+            if out[col].dtype != dtype and not pd.api.types.is_numeric_dtype(dtype):
+                out[col] = out[col].astype(dtype)
+        return out[list(self.active.columns)]
+
+    def to_dense(self, cities=None) -> pd.DataFrame:
+        """Grid dense lengkap (urutan kota × SKU sama dengan cross join lama)."""
+        active = self.active if cities is None else self.active[self.active["City"].isin(cities)]
+        dense  = pd.concat([active, self.implicit_rows(cities)], ignore_index=True)
+        return self._sorted(dense)
+
+    def city_frame(self, city: str, dense: bool = False) -> pd.DataFrame:
+        if dense:
+            return self.to_dense([city])
+        return self._sorted(self.active[self.active["City"] == city])
+
+    def _sorted(self, df: pd.DataFrame) -> pd.DataFrame:
+        city_pos = pd.Categorical(df["City"], categories=self.cities).codes
+        sku_pos  = pd.Series(np.arange(len(self.items)), index=self.items["No. Barang"].to_numpy())
+        sku_pos  = sku_pos[~sku_pos.index.duplicated()]
+        pos = sku_pos.reindex(df["No. Barang"].to_numpy()).to_numpy(dtype=float)
+        order = np.lexsort((np.nan_to_num(pos, nan=np.inf), city_pos))
+        return df.iloc[order].reset_index(drop=True)
@@ -1,31 +1,30 @@
 """
 pages/stock_analysis.py
-Halaman Hasil Analisa Stock — preprocessing, kalkulasi, tabel, dashboard.
+Halaman Hasil Analisa Stock — tampilan atas utils.engine (tabel, dashboard).
 """
 
-import math
 import re
-import numpy as np
 import pandas as pd
 import streamlit as st
-from io import BytesIO
 from datetime import timedelta
 
 from utils import (
-    BULAN_INDONESIA,
-    map_nama_dept,
-    map_city,
-    convert_df_to_excel,
-    calculate_daily_wma,
-    classify_abc_log_benchmark,
-    calculate_min_stock,
-    calculate_max_stock,
-    calculate_add_stock,
-    hitung_po_cabang_baru,
-    get_status_stock,
-    melt_stock_by_city,
+    get_preprocessed_sales,
+    get_sales_cube,
+    prepare_produk_ref,
+    prepare_stock,
+    run_stock_analysis,
+    build_stock_pivot,
+    GridFilter,
+    profile_stage,
+    put_result,
+    session_handle,
+    render_export,
+    export_version,
     highlight_kategori_abc_log,
     highlight_status_stock,
+    table_toggle,
+    render_paged_table,
 )
 
 
@@ -34,64 +33,45 @@ def render():
     st.title("📈 Hasil Analisa Stock")
 
     # Validasi data tersedia
-    if (
-        st.session_state.df_penjualan.empty
-        or st.session_state.produk_ref.empty
-        or st.session_state.df_stock.empty
-    ):
+    h_penjualan = session_handle("df_penjualan")
+    h_produk    = session_handle("produk_ref")
+    h_stock     = session_handle("df_stock")
+    if h_penjualan is None or h_produk is None or h_stock is None:
         st.warning("⚠️ Harap muat semua file di halaman **'Input Data'** terlebih dahulu.")
         st.stop()
 
     # ── Preprocessing ──────────────────────────────────────────────────────────
-    penjualan  = st.session_state.df_penjualan.copy()
-    produk_ref = st.session_state.produk_ref.copy()
-    df_stock   = st.session_state.df_stock.copy()
-
-    for df in [penjualan, produk_ref, df_stock]:
-        if "No. Barang" in df.columns:
-            df["No. Barang"] = df["No. Barang"].astype(str).str.strip()
-
-    # Deduplikasi faktur
-    if "No. Faktur" in penjualan.columns and "No. Barang" in penjualan.columns:
-        penjualan["No. Faktur"]     = penjualan["No. Faktur"].astype(str).str.strip()
-        penjualan["Faktur + Barang"] = penjualan["No. Faktur"] + penjualan["No. Barang"]
-        duplicates = penjualan[penjualan.duplicated(subset=["Faktur + Barang"], keep=False)]
-        penjualan.drop_duplicates(subset=["Faktur + Barang"], keep="first", inplace=True)
-        st.session_state.df_penjualan = penjualan.copy()
-        if not duplicates.empty:
-            deleted = duplicates[~duplicates.index.isin(penjualan.index)]
+    # Artefak penjualan bersama (sekali per versi dataset) — tidak di-copy;
+    # produk & stock siap pakai dihitung sekali per versi file, bukan per rerun
+    penjualan, deleted = get_preprocessed_sales(h_penjualan.view(), h_penjualan.version)
+    produk_ref = h_produk.derive("prepared", prepare_produk_ref)
+    df_stock   = h_stock.derive("prepared", prepare_stock)
+
+    if "Faktur + Barang" in penjualan.columns:
+        if not deleted.empty:
             st.warning(f"⚠️ Ditemukan dan dihapus {len(deleted)} baris duplikat 'Faktur + Barang'.")
             with st.expander("Lihat Detail Duplikat yang Dihapus"):
                 st.dataframe(deleted)
         else:
             st.info("✅ Tidak ada duplikat 'Faktur + Barang' yang ditemukan.")
 
-    penjualan.rename(columns={"Qty": "Kuantitas"}, inplace=True, errors="ignore")
-    penjualan["Nama Dept"] = penjualan.apply(map_nama_dept, axis=1)
-    penjualan["City"]      = penjualan["Nama Dept"].apply(map_city)
-
-    produk_ref.rename(columns={"Keterangan Barang": "Nama Barang"}, inplace=True, errors="ignore")
-    if "Kategori Barang" in produk_ref.columns:
-        produk_ref["Kategori Barang"] = produk_ref["Kategori Barang"].astype(str).str.strip().str.upper()
-    if "City" in penjualan.columns:
-        penjualan["City"] = penjualan["City"].astype(str).str.strip().str.upper()
-
-    penjualan["Tgl Faktur"] = pd.to_datetime(penjualan["Tgl Faktur"], errors="coerce")
-
     with st.expander("Lihat Data Penjualan Setelah Preprocessing"):
         preview_cols = ["No. Faktur", "Tgl Faktur", "Nama Pelanggan", "No. Barang", "Faktur + Barang", "Kuantitas"]
         preview_cols = [c for c in preview_cols if c in penjualan.columns]
         st.dataframe(penjualan[preview_cols].head(20), use_container_width=True)
-        st.download_button(
-            "📥 Unduh Data Penjualan Bersih (Excel)",
-            data=convert_df_to_excel(penjualan),
-            file_name="data_penjualan_bersih.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        render_export(
+            key="penjualan_bersih_export",
+            version=export_version("penjualan_bersih", st.session_state.get("penjualan_version", ""), len(penjualan)),
+            build_sheets=lambda: {"Sheet1": penjualan},
+            file_stem="data_penjualan_bersih",
+            label="📥 Unduh Data Penjualan Bersih",
         )
     st.markdown("---")
 
     # ── Tanggal Analisis ───────────────────────────────────────────────────────
-    default_end = penjualan["Tgl Faktur"].dropna().max().date()
+    # Query jendela dijawab dari cube agregat harian (dibangun sekali per dataset)
+    cube = get_sales_cube(h_penjualan.view(), h_penjualan.version)
+    default_end = cube.max_date.date()
     if st.session_state.stock_filename:
         m = re.search(r"(\d{8})", st.session_state.stock_filename)
         if m:
@@ -108,315 +88,158 @@ def render():
 
     # ── Tombol Jalankan Analisa ────────────────────────────────────────────────
     if st.button("Jalankan Analisa Stock"):
-        _run_stock_analysis(penjualan, produk_ref, df_stock, end_date)
+        _run_stock_analysis(cube, produk_ref, df_stock, end_date)
 
     # ── Tampilkan Hasil ────────────────────────────────────────────────────────
-    if st.session_state.stock_analysis_result is not None:
-        _render_results()
+    h_result = session_handle("stock_analysis_result")
+    if h_result is not None:
+        _render_results(h_result)
 
 
 # ── Logika Analisis Utama ──────────────────────────────────────────────────────
-def _run_stock_analysis(penjualan, produk_ref, df_stock, end_date):
-    with st.spinner("Melakukan perhitungan analisis stok..."):
-        end_date_dt  = pd.to_datetime(end_date)
-        wma_start    = end_date_dt - pd.DateOffset(days=89)
-        penjualan_90 = penjualan[penjualan["Tgl Faktur"].between(wma_start, end_date_dt)]
-
-        if penjualan_90.empty:
-            st.error("Tidak ada data penjualan dalam rentang 90 hari terakhir.")
-            st.session_state.stock_analysis_result = None
-            return
-
-        # Rentang bulanan
-        r1_end   = end_date_dt
-        r1_start = end_date_dt - pd.DateOffset(days=29)
-        r2_end   = end_date_dt - pd.DateOffset(days=30)
-        r2_start = end_date_dt - pd.DateOffset(days=59)
-        r3_end   = end_date_dt - pd.DateOffset(days=60)
-        r3_start = end_date_dt - pd.DateOffset(days=89)
-
-        def _sales(start, end, col_name):
-            return (
-                penjualan_90[penjualan_90["Tgl Faktur"].between(start, end)]
-                .groupby(["City", "No. Barang"])["Kuantitas"]
-                .sum()
-                .reset_index(name=col_name)
-            )
-
-        sales_m1 = _sales(r1_start, r1_end, "Penjualan Bln 1")
-        sales_m2 = _sales(r2_start, r2_end, "Penjualan Bln 2")
-        sales_m3 = _sales(r3_start, r3_end, "Penjualan Bln 3")
-
-        total_90 = (
-            penjualan_90.groupby(["City", "No. Barang"])["Kuantitas"]
-            .sum()
-            .reset_index()
-        )
-        total_90["AVG Mean"] = total_90["Kuantitas"] / 3
-        total_90.drop("Kuantitas", axis=1, inplace=True)
-
-        wma_grouped = (
-            penjualan_90.groupby(["City", "No. Barang"])
-            .apply(calculate_daily_wma, end_date=end_date)
-            .reset_index(name="AVG WMA")
-        )
-
-        # Kombinasi lengkap City × Barang
-        barang_list = produk_ref[["No. Barang", "Kategori Barang", "BRAND Barang", "Nama Barang"]].drop_duplicates()
-        city_list   = penjualan["City"].unique()
-        kombinasi   = pd.MultiIndex.from_product(
-            [city_list, barang_list["No. Barang"]], names=["City", "No. Barang"]
-        ).to_frame(index=False)
-        full_data = pd.merge(kombinasi, barang_list, on="No. Barang", how="left")
-
-        for df_merge in [wma_grouped, sales_m1, sales_m2, sales_m3, total_90]:
-            full_data = pd.merge(full_data, df_merge, on=["City", "No. Barang"], how="left")
-
-        # Kolom bulanan
-        penjualan_90 = penjualan_90.copy()
-        penjualan_90["Bulan"] = penjualan_90["Tgl Faktur"].dt.to_period("M")
-        monthly = (
-            penjualan_90.groupby(["City", "No. Barang", "Bulan"])["Kuantitas"]
-            .sum()
-            .unstack(fill_value=0)
-            .reset_index()
-        )
-        full_data = pd.merge(full_data, monthly, on=["City", "No. Barang"], how="left")
-        full_data.fillna(0, inplace=True)
-
-        # Rename kolom Period → nama bulan Indonesia
-        period_cols = sorted([c for c in full_data.columns if isinstance(c, pd.Period)])
-        rename_map  = {c: f"{BULAN_INDONESIA[c.month]} {c.year}" for c in period_cols}
-        full_data.rename(columns=rename_map, inplace=True)
-        bulan_columns_renamed = [rename_map[c] for c in period_cols]
-
-        full_data.rename(columns={"AVG WMA": "SO WMA", "AVG Mean": "SO Mean"}, inplace=True)
-        full_data["SO Total"] = full_data["SO WMA"]
-
-        # ── ABC Log-Benchmark ──────────────────────────────────────────────────
-        log_df = classify_abc_log_benchmark(full_data.copy(), metric_col="SO WMA")
-        log_cols_to_merge = [
-            "City", "No. Barang",
-            "Kategori ABC (Log-Benchmark - WMA)", "Ratio Log WMA", "Log (10) WMA", "Avg Log WMA",
-        ]
-        full_data = pd.merge(full_data, log_df[log_cols_to_merge], on=["City", "No. Barang"], how="left")
-
-        # ── Min & Max Stock (Vectorized — FIX performa) ────────────────────────
-        KAT_COL = "Kategori ABC (Log-Benchmark - WMA)"
-        full_data["Min Stock"] = calculate_min_stock(full_data, KAT_COL, "SO WMA")
-        full_data["Max Stock"] = calculate_max_stock(full_data, KAT_COL, "SO WMA")
-
-        st.markdown("### ⚙️ Konfigurasi Stok Minimal")
-        st.info("""
-        ✅ **Metode Terkunci: Min Stock (Days / Time Based)**
-
-        Perhitungan otomatis menggunakan multiplier waktu (WMA × Hari):
-        * **A & B:** 1.00x (Buffer 30 Hari)
-        * **C:** 0.75x (Buffer 24 Hari)
-        * **D:** 0.50x (Buffer 15 Hari)
-        * **E:** 0.25x (Buffer 7 Hari)
-        * **F:** 0.0x  (Min Stock 0, Max Stock 1)
-        """)
-
-        # ── Stock Cabang ───────────────────────────────────────────────────────
-        stock_df_raw  = df_stock.rename(columns=lambda x: x.strip())
-        stock_melted  = melt_stock_by_city(stock_df_raw)
-
-        full_data = pd.merge(
-            full_data, stock_melted, on=["City", "No. Barang"], how="left"
-        ).rename(columns={"Stock": "Stock Cabang"})
-        full_data["Stock Cabang"] = full_data["Stock Cabang"].fillna(0)
-
-        full_data["Status Stock"] = full_data.apply(get_status_stock, axis=1)
-
-        # ── Add Stock (Vectorized — FIX performa) ─────────────────────────────
-        full_data["Add Stock"] = calculate_add_stock(full_data, KAT_COL, "Min Stock", "Stock Cabang")
-
-        # Merge data pendukung
-        stock_sby   = stock_melted[stock_melted["City"] == "SURABAYA"][["No. Barang", "Stock"]].rename(columns={"Stock": "Stock Surabaya"})
-        stock_total = stock_melted.groupby("No. Barang")["Stock"].sum().reset_index().rename(columns={"Stock": "Stock Total"})
-        total_req   = full_data.groupby("No. Barang")["Add Stock"].sum().reset_index(name="Total Add Stock All")
-
-        full_data = full_data.merge(stock_sby,   on="No. Barang", how="left")
-        full_data = full_data.merge(stock_total, on="No. Barang", how="left")
-        full_data = full_data.merge(total_req,   on="No. Barang", how="left")
-        full_data.fillna(0, inplace=True)
-
-        # ── Suggested PO ──────────────────────────────────────────────────────
-        full_data["Suggested PO"] = full_data.apply(
-            lambda r: hitung_po_cabang_baru(
-                r["Stock Surabaya"], r["Stock Cabang"], r["Stock Total"],
-                r["Total Add Stock All"], r["SO WMA"], r["Add Stock"],
-            ),
-            axis=1,
-        )
+def _run_stock_analysis(cube, produk_ref, df_stock, end_date):
+    with st.spinner("Melakukan perhitungan analisis stok..."), \
+            profile_stage("page/stock/analisis", rows_in=len(df_stock)) as rec:
+        result = run_stock_analysis(cube, produk_ref, df_stock, end_date)
+        rec.rows_out = len(result.grid.active) if result is not None else 0
+
+    if result is None:
+        st.error("Tidak ada data penjualan dalam rentang 90 hari terakhir.")
+        st.session_state.stock_analysis_result = None
+        return
 
-        # ── Pembulatan ─────────────────────────────────────────────────────────
-        int_cols = [
-            "Stock Cabang", "Min Stock", "Max Stock", "Add Stock",
-            "Total Add Stock All", "Suggested PO", "Stock Surabaya", "Stock Total",
-            "SO WMA", "SO Mean", "Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3",
-        ] + bulan_columns_renamed
-        for col in int_cols:
-            if col in full_data.columns:
-                full_data[col] = full_data[col].round(0).astype(int)
+    st.markdown("### ⚙️ Konfigurasi Stok Minimal")
+    st.info("""
+    ✅ **Metode Terkunci: Min Stock (Days / Time Based)**
 
-        for col in ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA"]:
-            if col in full_data.columns:
-                full_data[col] = full_data[col].round(2)
+    Perhitungan otomatis menggunakan multiplier waktu (WMA × Hari):
+    * **A & B:** 1.00x (Buffer 30 Hari)
+    * **C:** 0.75x (Buffer 24 Hari)
+    * **D:** 0.50x (Buffer 15 Hari)
+    * **E:** 0.25x (Buffer 7 Hari)
+    * **F:** 0.0x  (Min Stock 0, Max Stock 1)
+    """)
 
-        st.session_state.stock_analysis_result = full_data.copy()
-        st.session_state.bulan_columns_stock   = bulan_columns_renamed
-        st.success("✅ Analisis Stok berhasil dijalankan!")
+    st.session_state.stock_analysis_result = put_result("stock", result.grid)
+    st.session_state.bulan_columns_stock   = result.bulan_columns
+    st.success("✅ Analisis Stok berhasil dijalankan!")
 
 
 # ── Render Hasil Tabel & Dashboard ────────────────────────────────────────────
-def _render_results():
-    result     = st.session_state.stock_analysis_result.copy()
-    result     = result[result["City"] != "OTHERS"]
+def _render_results(h_result):
+    # Filter engine (grid tanpa OTHERS + indeks filter + partisi per kota)
+    # dibentuk sekali per hasil; turunan per pilihan filter di-cache di dalamnya
+    flt        = h_result.derive("filter", lambda g: GridFilter(g.drop_cities(["OTHERS"])))
     bulan_cols = st.session_state.get("bulan_columns_stock", [])
 
     st.markdown("---")
     st.header("Filter Produk (Berlaku untuk Semua Tabel)")
     col_f1, col_f2, col_f3 = st.columns(3)
-    sel_kat  = col_f1.multiselect("Kategori:",    sorted(result["Kategori Barang"].dropna().unique().astype(str)))
-    sel_brand = col_f2.multiselect("Brand:",       sorted(result["BRAND Barang"].dropna().unique().astype(str)))
-    sel_prod  = col_f3.multiselect("Nama Produk:", sorted(result["Nama Barang"].dropna().unique().astype(str)))
+    sel_kat   = col_f1.multiselect("Kategori:",    flt.options("Kategori Barang"))
+    sel_brand = col_f2.multiselect("Brand:",       flt.options("BRAND Barang"))
+    sel_prod  = col_f3.multiselect("Nama Produk:", flt.options("Nama Barang"))
 
-    if sel_kat:   result = result[result["Kategori Barang"].astype(str).isin(sel_kat)]
-    if sel_brand: result = result[result["BRAND Barang"].astype(str).isin(sel_brand)]
-    if sel_prod:  result = result[result["Nama Barang"].astype(str).isin(sel_prod)]
+    item_sel = {"Kategori Barang": sel_kat, "BRAND Barang": sel_brand, "Nama Barang": sel_prod}
+    grid     = flt.select(**item_sel)
 
     st.header("Filter Hasil (Hanya untuk Tabel per Kota)")
     col_h1, col_h2 = st.columns(2)
-    sel_abc    = col_h1.multiselect("Kategori ABC:", sorted(result["Kategori ABC (Log-Benchmark - WMA)"].dropna().unique().astype(str)))
-    sel_status = col_h2.multiselect("Status Stock:", sorted(result["Status Stock"].dropna().unique().astype(str)))
+    opt_abc, opt_status, n_implicit = flt.cached("opts", item_sel, lambda: (
+        sorted(map(str, grid.unique("Kategori ABC (Log-Benchmark - WMA)"))),
+        sorted(map(str, grid.unique("Status Stock"))),
+        grid.n_implicit,
+    ))
+    sel_abc    = col_h1.multiselect("Kategori ABC:", opt_abc)
+    sel_status = col_h2.multiselect("Status Stock:", opt_status)
+
+    show_dense = st.checkbox(
+        "Tampilkan juga SKU tanpa penjualan & stok",
+        value=False,
+        help=f"{n_implicit:,} kombinasi Kota × SKU tanpa aktivitas (kategori F, semua nilai 0). "
+             "Tabel, pivot, dan unduhan akan memuat seluruh grid.",
+    )
+
+    export_id = export_version(
+        h_result.version, sel_kat, sel_brand, sel_prod, show_dense
+    )
 
     st.markdown("---")
     tab1, tab2 = st.tabs(["Hasil Tabel", "Dashboard"])
 
     with tab1:
-        _render_table(result, bulan_cols, sel_abc, sel_status)
+        _render_table(flt, item_sel, bulan_cols, sel_abc, sel_status, show_dense, export_id)
     with tab2:
-        _render_dashboard(result)
+        _render_dashboard(grid)
 
 
-def _render_table(result, bulan_cols, sel_abc, sel_status):
-    header_style = {"selector": "th", "props": [("background-color", "#0068c9"), ("color", "white"), ("text-align", "center")]}
+def _render_table(flt, item_sel, bulan_cols, sel_abc, sel_status, show_dense=False, export_id=""):
     st.header("Hasil Analisis Stok per Kota")
     KEYS = ["No. Barang", "Kategori Barang", "BRAND Barang", "Nama Barang"]
+    colored = st.checkbox("Warnai Kategori ABC & Status Stock", value=True, key="stock_table_colored",
+                          help="Tanpa warna tabel dirender lebih cepat (format angka di browser).")
+
+    with profile_stage("page/stock/city_frames") as rec:
+        frames = flt.city_frames(
+            item_sel,
+            {"Kategori ABC (Log-Benchmark - WMA)": sel_abc, "Status Stock": sel_status},
+            dense=show_dense,
+        )
+        rec.rows_out = sum(len(f) for f in frames.values())
 
-    for city in sorted(result["City"].unique()):
+    metric_order = (
+        bulan_cols
+        + ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3"]
+        + ["SO WMA", "SO Mean", "SO Total"]
+        + ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA", "Kategori ABC (Log-Benchmark - WMA)"]
+        + ["Min Stock", "Max Stock", "Stock Cabang", "Status Stock", "Add Stock", "Suggested PO"]
+    )
+    highlight = {
+        "Kategori ABC (Log-Benchmark - WMA)": highlight_kategori_abc_log,
+        "Status Stock":                       highlight_status_stock,
+    } if colored else None
+
+    for city, city_df in frames.items():
         with st.expander(f"📍 Lihat Hasil Stok untuk Kota: {city}"):
-            city_df = result[result["City"] == city].copy()
-            if sel_abc:    city_df = city_df[city_df["Kategori ABC (Log-Benchmark - WMA)"].isin(sel_abc)]
-            if sel_status: city_df = city_df[city_df["Status Stock"].isin(sel_status)]
             if city_df.empty:
                 st.write("Tidak ada data yang cocok dengan filter yang dipilih.")
                 continue
+            if not table_toggle("Tampilkan tabel", f"stock_show_{city}", len(city_df)):
+                continue
+
+            with profile_stage(f"render/stock/{city}", rows_in=len(city_df)):
+                display_cols = KEYS + [c for c in metric_order if c in city_df.columns]
+                render_paged_table(city_df[display_cols], key=f"stock_table_{city}", skip=KEYS, highlight=highlight)
 
-            metric_order = (
-                bulan_cols
-                + ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3"]
-                + ["SO WMA", "SO Mean", "SO Total"]
-                + ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA", "Kategori ABC (Log-Benchmark - WMA)"]
-                + ["Min Stock", "Max Stock", "Stock Cabang", "Status Stock", "Add Stock", "Suggested PO"]
-            )
-            display_cols = KEYS + [c for c in metric_order if c in city_df.columns]
-            city_df = city_df[display_cols]
-
-            fmt = {}
-            skip = set(KEYS)
-            for col in city_df.columns:
-                if col in skip or not pd.api.types.is_numeric_dtype(city_df[col]):
-                    continue
-                fmt[col] = "{:.2f}" if any(x in col for x in ["Ratio", "Log", "Avg Log"]) else "{:.0f}"
-
-            st.dataframe(
-                city_df.style
-                .format(fmt, na_rep="-")
-                .apply(lambda x: x.map(highlight_kategori_abc_log), subset=["Kategori ABC (Log-Benchmark - WMA)"])
-                .apply(lambda x: x.map(highlight_status_stock),     subset=["Status Stock"])
-                .set_table_styles([header_style]),
-                use_container_width=True,
-            )
-
-    # Tabel Gabungan Pivot
+    # Tabel Gabungan Pivot — grid dense hanya dibentuk jika diminta
+    grid   = flt.select(**item_sel)
+    result = flt.cached("dense", item_sel, grid.to_dense) if show_dense else grid.active
     st.header("📊 Tabel Gabungan Seluruh Kota (Stock)")
     with st.spinner("Membuat tabel pivot gabungan..."):
         if result.empty:
             st.warning("Tidak ada data untuk tabel gabungan.")
             return
 
-        _render_pivot_table(result, bulan_cols, KEYS)
+        df_style, num_cols, float_cols = flt.cached(
+            "pivot", item_sel, lambda: _build_pivot_table(result, bulan_cols, KEYS), extra=(show_dense,)
+        )
+        _render_pivot_table(df_style, num_cols, float_cols)
 
     # Unduh
     st.header("💾 Unduh Hasil Analisis Stock")
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        result.to_excel(writer, sheet_name="Filtered Data", index=False)
-    st.download_button(
-        "📥 Unduh Hasil Analisis Stock (Excel)",
-        data=output.getvalue(),
-        file_name="Hasil_Analisis_Stock.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    render_export(
+        key="stock_export",
+        version=export_id,
+        build_sheets=lambda: {"Filtered Data": result},
+        file_stem="Hasil_Analisis_Stock",
+        label="📥 Unduh Hasil Analisis Stock",
     )
 
 
-def _render_pivot_table(result, bulan_cols, KEYS):
-    from utils import classify_abc_log_benchmark, get_days_multiplier
-    pivot_cols = (
-        bulan_cols
-        + ["Penjualan Bln 1", "Penjualan Bln 2", "Penjualan Bln 3"]
-        + ["SO WMA", "SO Mean", "SO Total"]
-        + ["Log (10) WMA", "Avg Log WMA", "Ratio Log WMA", "Kategori ABC (Log-Benchmark - WMA)"]
-        + ["Min Stock", "Max Stock", "Stock Cabang", "Status Stock", "Add Stock", "Suggested PO"]
-    )
-    pivot_cols_existing = [c for c in pivot_cols if c in result.columns]
-    pivot = result.pivot_table(index=KEYS, columns="City", values=pivot_cols_existing, aggfunc="first")
-    pivot.columns = [f"{lv1}_{lv0}" for lv0, lv1 in pivot.columns]
-    pivot.reset_index(inplace=True)
-
-    cities = sorted(result["City"].unique())
-    metric_order = pivot_cols
-    ordered = [f"{city}_{m}" for city in cities for m in metric_order]
-    existing_ordered = [c for c in ordered if c in pivot.columns]
-
-    # ALL summary
-    total_agg = result.groupby(KEYS).agg(
-        All_Stock=("Stock Cabang", "sum"),
-        All_SO=("SO WMA", "sum"),
-        All_Suggested_PO=("Suggested PO", "sum"),
-    ).reset_index()
-
-    all_abc_input = result.groupby(KEYS, as_index=False).agg({"SO WMA": "sum"})
-    all_abc_input.rename(columns={"SO WMA": "Total Kuantitas"}, inplace=True)
-    all_abc_input["City"] = "ALL"
-    all_classified = classify_abc_log_benchmark(all_abc_input, metric_col="Total Kuantitas")
-    all_classified.rename(columns={
-        "Log (10) Total Kuantitas":                         "All_Log",
-        "Avg Log Total Kuantitas":                          "All_Avg Log",
-        "Ratio Log Total Kuantitas":                        "All_Ratio",
-        "Kategori ABC (Log-Benchmark - Total Kuantitas)":   "All_Kategori ABC All",
-    }, inplace=True)
-
-    total_agg = pd.merge(total_agg, all_classified[KEYS + ["All_Kategori ABC All"]], on=KEYS, how="left")
-
-    def _calc_all_add(row):
-        if row["All_Kategori ABC All"] == "F": return 0
-        mult = get_days_multiplier(row["All_Kategori ABC All"])
-        return max(0, math.ceil(row["All_SO"] * mult) - row["All_Stock"])
-
-    total_agg["All_Add_Stock"]     = total_agg.apply(_calc_all_add, axis=1)
-    total_agg["All_Restock 1 Bulan"] = np.where(total_agg["All_Stock"] < total_agg["All_SO"], "PO", "NO")
-
-    pivot = pd.merge(pivot, total_agg, on=KEYS, how="left")
-    pivot = pd.merge(pivot, all_classified[KEYS + ["All_Log", "All_Avg Log", "All_Ratio"]], on=KEYS, how="left")
-
-    final_summary = ["All_Stock", "All_SO", "All_Add_Stock", "All_Suggested_PO",
-                     "All_Log", "All_Avg Log", "All_Ratio", "All_Kategori ABC All", "All_Restock 1 Bulan"]
-    final_cols = KEYS + existing_ordered + final_summary
-    df_style = pivot[[c for c in final_cols if c in pivot.columns]].copy()
+def _build_pivot_table(result, bulan_cols, KEYS):
+    """Pivot gabungan + pengisian nilai kosong (di-cache per pilihan filter produk)."""
+    with profile_stage("page/stock/pivot", rows_in=len(result)) as rec:
+        df_style = build_stock_pivot(result, bulan_cols, KEYS)
+        rec.rows_out = len(df_style)
 
     num_cols   = [c for c in df_style.columns if c not in KEYS and pd.api.types.is_numeric_dtype(df_style[c])
                   and not any(x in c for x in ["Ratio", "Log", "Avg Log"])]
@@ -426,19 +249,26 @@ def _render_pivot_table(result, bulan_cols, KEYS):
     df_style[num_cols]   = df_style[num_cols].fillna(0).astype(int)
     df_style[float_cols] = df_style[float_cols].fillna(0)
     df_style[obj_cols]   = df_style[obj_cols].fillna("-")
+    return df_style, num_cols, float_cols
+
 
+def _render_pivot_table(df_style, num_cols, float_cols):
     col_cfg = {}
     for c in num_cols:   col_cfg[c] = st.column_config.NumberColumn(format="%.0f")
     for c in float_cols: col_cfg[c] = st.column_config.NumberColumn(format="%.2f")
-    st.dataframe(df_style, column_config=col_cfg, use_container_width=True)
+    with profile_stage("render/stock/pivot", rows_in=len(df_style)):
+        st.dataframe(df_style, column_config=col_cfg, use_container_width=True)
 
 
-def _render_dashboard(result):
+def _render_dashboard(grid):
     st.header("📈 Dashboard Analisis Stock")
-    if result.empty:
+    if grid.empty:
         st.info("Tidak ada data untuk ditampilkan.")
         return
 
+    # Baris implisit selalu F / Balance → cukup hitung baris aktif untuk
+    # Understock/Overstock; distribusi memakai value_counts grid dense.
+    result      = grid.active
     total_under = result[result["Status Stock"] == "Understock"].shape[0]
     total_over  = result[result["Status Stock"].str.contains("Overstock", na=False)].shape[0]
     col1, col2  = st.columns(2)
@@ -449,10 +279,10 @@ def _render_dashboard(result):
     col_c1, col_c2 = st.columns(2)
     with col_c1:
         st.subheader("Distribusi Kategori ABC (Log-Benchmark)")
-        st.bar_chart(result["Kategori ABC (Log-Benchmark - WMA)"].value_counts())
+        st.bar_chart(grid.value_counts("Kategori ABC (Log-Benchmark - WMA)"))
     with col_c2:
         st.subheader("Distribusi Status Stok")
-        st.bar_chart(result["Status Stock"].value_counts())
+        st.bar_chart(grid.value_counts("Status Stock"))
 
     st.markdown("---")
     col_t1, col_t2 = st.columns(2)
@@ -0,0 +1,77 @@
+"""
+utils/table_view.py
+Render tabel per kota secara bertahap (per halaman).
+
+Styler (warna per sel) menserialisasi SETIAP sel ke HTML/CSS — lambat dan boros
+memori untuk puluhan ribu baris. render_paged_table hanya mengirim satu halaman
+baris ke browser:
+    - warna (highlight_*) → Styler, tetapi hanya untuk baris di halaman aktif;
+    - tanpa warna         → st.column_config (format angka di sisi browser,
+                            tanpa Styler sama sekali).
+Tabel di dalam expander tetap dieksekusi walau expander tertutup, sehingga
+halaman membungkusnya dengan toggle "Tampilkan tabel" (table_toggle): frame
+kota baru dibentuk & dirender setelah toggle dinyalakan.
+"""
+
+import math
+import pandas as pd
+import streamlit as st
+
+# ── Konfigurasi ────────────────────────────────────────────────────────────────
+TABLE_PAGE_ROWS = 200
+DECIMAL_MARKERS = ("Ratio", "Log", "Avg Log")   # kolom 2 desimal, lainnya bulat
+
+
+def _decimals(col: str) -> int:
+    return 2 if any(x in col for x in DECIMAL_MARKERS) else 0
+
+
+def numeric_columns(df: pd.DataFrame, skip=()) -> list:
+    skip = set(skip)
+    return [c for c in df.columns if c not in skip and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def table_toggle(label: str, key: str, n_rows: int) -> bool:
+    """Toggle per tabel (state disimpan per key); ringkasan baris saat tertutup."""
+    on = st.toggle(label, key=key)
+    if not on:
+        st.caption(f"{n_rows:,} baris — nyalakan untuk menampilkan tabel.")
+    return on
+
+
+def _page_start(n_rows: int, page_size: int, key: str) -> int:
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    if n_pages == 1:
+        return 0
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:   # filter mengecilkan tabel
+        st.session_state[page_key] = n_pages
+    col_p, col_c = st.columns([1, 3])
+    page  = col_p.number_input("Halaman", min_value=1, max_value=n_pages, value=1, step=1, key=page_key)
+    start = (int(page) - 1) * page_size
+    col_c.caption(f"Baris {start + 1:,}–{min(start + page_size, n_rows):,} dari {n_rows:,} · {n_pages} halaman")
+    return start
+
+
+def render_paged_table(df: pd.DataFrame, key: str, skip=(), highlight: dict | None = None,
+                       page_size: int = TABLE_PAGE_ROWS) -> None:
+    """
+    Satu halaman df (page_size baris) + navigasi halaman.
+    skip: kolom yang tidak diformat sebagai angka (mis. kunci produk).
+    highlight: {kolom: fn(nilai) → css}; None/{} → tanpa Styler.
+    """
+    start = _page_start(len(df), page_size, key)
+    page  = df.iloc[start:start + page_size]
+    nums  = numeric_columns(page, skip)
+    highlight = {c: fn for c, fn in (highlight or {}).items() if c in page.columns}
+
+    if not highlight:
+        col_cfg = {c: st.column_config.NumberColumn(format=f"%.{_decimals(c)}f") for c in nums}
+        st.dataframe(page, column_config=col_cfg, use_container_width=True)
+        return
+
+    # Styler menimpa format column_config → format angka ikut di Styler
+    style = page.style.format({c: f"{{:.{_decimals(c)}f}}" for c in nums}, na_rep="-")
+    for col, fn in highlight.items():
+        style = style.apply(lambda x, fn=fn: x.map(fn), subset=[col])
+    st.dataframe(style, use_container_width=True)
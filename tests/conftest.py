@@ -0,0 +1,41 @@
+"""
+Konfigurasi pytest: paket `utils` dapat diimpor dari tests/.
+
+Tata letak project (README): tests/ berdampingan dengan utils/. Jika tests/
+berada langsung di dalam folder paket (folder ini memiliki __init__.py),
+folder induk tests/ didaftarkan sebagai paket `utils`.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+if (ROOT / "__init__.py").exists() and "utils" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "utils", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["utils"] = module
+    spec.loader.exec_module(module)
+else:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def wizard_pc():
+    """
+    App PC Wizard (wizard_pc.py, skrip Streamlit mandiri) dimuat sebagai modul.
+    Tanpa `streamlit run` UI top-level berjalan dalam bare mode: tidak ada file
+    yang di-upload, sehingga hanya fungsi & konstanta yang terdefinisi.
+    """
+    path = ROOT / "wizard_pc.py"
+    if not path.exists():
+        pytest.skip("wizard_pc.py tidak ada di project ini")
+    spec = importlib.util.spec_from_file_location("wizard_pc", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
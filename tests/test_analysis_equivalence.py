@@ -0,0 +1,151 @@
+"""
+Kesetaraan versi vectorized dengan fungsi skalar aslinya (baris per baris):
+    calculate_suggested_po  ↔ hitung_po_cabang_baru
+    calculate_status_stock  ↔ get_status_stock
+    build_stock_pivot       ↔ All_Add_Stock via apply(axis=1) lama
+Input acak dengan nilai kecil (banyak kasus batas: sama dengan, nol,
+pembulatan .5), NaN, dan nilai non-angka.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import (
+    build_stock_pivot,
+    calculate_status_stock,
+    calculate_suggested_po,
+    get_days_multiplier,
+    get_status_stock,
+    hitung_po_cabang_baru,
+)
+
+SEEDS = range(20)
+N_ROWS = 500
+KAT_COL = "Kategori ABC (Log-Benchmark - WMA)"
+PO_COLS = ["Stock Surabaya", "Stock Cabang", "Stock Total", "Total Add Stock All", "SO WMA", "Add Stock"]
+
+
+def _random_values(rng, n, nan_rate=0.05):
+    """Bilangan bulat & setengahan kecil (termasuk negatif dan nol) + NaN."""
+    values = rng.integers(-3, 12, n) + rng.choice([0.0, 0.5, 0.25], n, p=[0.7, 0.2, 0.1])
+    values[rng.random(n) < nan_rate] = np.nan
+    return values
+
+
+def _scalar_po(row):
+    try:
+        return hitung_po_cabang_baru(*(row[c] for c in PO_COLS))
+    except ValueError:      # round(NaN) di versi skalar
+        return 0
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_suggested_po_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: _random_values(rng, N_ROWS) for c in PO_COLS})
+
+    expected = [_scalar_po(row) for _, row in df.iterrows()]
+    result = calculate_suggested_po(df)
+
+    assert result.index.equals(df.index)
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS[:5])
+def test_suggested_po_non_numeric_is_zero(seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: pd.Series(_random_values(rng, N_ROWS, nan_rate=0), dtype=object) for c in PO_COLS})
+    for col in PO_COLS:
+        pick = rng.random(N_ROWS) < 0.03
+        df.loc[pick, col] = rng.choice(np.array([None, "abc", "5"], dtype=object), pick.sum())
+
+    expected = [_scalar_po(row) for _, row in df.iterrows()]
+    assert calculate_suggested_po(df).tolist() == expected
+
+
+def test_suggested_po_boundaries():
+    rows = [
+        # sby, cabang, total, total_add, so, add
+        (5, 0, 10, 10, 3, 5),        # stock_sby == add, total == total_add
+        (4, 0, 10, 10, 3, 5),        # stock_sby < add → 0
+        (10, 2, 0, 5, 3, 1),         # total 0 → 0
+        (10, 1, 4, 6, 2, 1),         # ideal (2/4*10 - 1) = 4
+        (10, 1, 8, 9, 2, 1.5),       # ideal 2.125 → 2
+        (3, 0, 2, 4, 1, 0.5),        # ideal 0.75 → 1
+        (10, 5, 20, 30, 5, 2.5),     # kondisi cabang tidak terpenuhi → round(2.5) = 2
+        (math.nan, 1, 2, 3, 4, 0),   # NaN sby: perbandingan False
+        (10, math.nan, 2, 3, 4, 1),  # NaN cabang
+        (10, 1, 2, 3, 4, math.nan),  # round(NaN) → 0
+    ]
+    df = pd.DataFrame(rows, columns=PO_COLS)
+    assert calculate_suggested_po(df).tolist() == [_scalar_po(r) for _, r in df.iterrows()]
+
+
+def _status_frame(rng, n):
+    stock = _random_values(rng, n)
+    min_stock = rng.integers(0, 6, n).astype(float)
+    max_stock = min_stock + rng.integers(0, 4, n)
+    max_stock[rng.random(n) < 0.05] = np.nan
+    kategori = rng.choice(np.array(["A", "B", "C", "D", "E", "F", None], dtype=object), n)
+    return pd.DataFrame({
+        KAT_COL: kategori, "Stock Cabang": stock, "Min Stock": min_stock, "Max Stock": max_stock,
+    })
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_status_stock_matches_scalar(seed):
+    df = _status_frame(np.random.default_rng(seed), N_ROWS)
+
+    expected = [get_status_stock(row) for _, row in df.iterrows()]
+    result = calculate_status_stock(df)
+
+    assert result.index.equals(df.index)
+    assert result.tolist() == expected
+
+
+def test_status_stock_boundaries_and_missing_category():
+    df = pd.DataFrame({
+        "Stock Cabang": [2, 3, 5, 4, 1, math.nan, 0],
+        "Min Stock":    [0, 0, 1, 4, 2, 1, math.nan],
+        "Max Stock":    [1, 9, 5, 9, 3, 2, 1],
+    })
+    expected = [get_status_stock(row) for _, row in df.iterrows()]
+    assert calculate_status_stock(df).tolist() == expected
+
+    df[KAT_COL] = ["F", "F", "A", "B", "C", "F", "D"]
+    expected = [get_status_stock(row) for _, row in df.iterrows()]
+    assert calculate_status_stock(df).tolist() == expected
+
+
+def _scalar_all_add(row):
+    if row["All_Kategori ABC All"] == "F":
+        return 0
+    mult = get_days_multiplier(row["All_Kategori ABC All"])
+    return max(0, math.ceil(row["All_SO"] * mult) - row["All_Stock"])
+
+
+@pytest.mark.parametrize("seed", SEEDS[:10])
+def test_all_add_stock_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    n = 300
+    stock = rng.integers(0, 40, n)
+    if seed % 2:
+        stock = stock + rng.choice([0.0, 0.5], n)
+    result = pd.DataFrame({
+        "No. Barang":      [f"SKU{i:03d}" for i in rng.integers(0, 120, n)],
+        "Kategori Barang": rng.choice(["mouse", "ram"], n),
+        "City":            rng.choice(["Surabaya", "Jakarta", "Bali"], n),
+        "SO WMA":          rng.exponential(4, n) * (rng.random(n) > 0.2),
+        "Stock Cabang":    stock,
+        "Suggested PO":    rng.integers(0, 5, n),
+    }).drop_duplicates(["No. Barang", "Kategori Barang", "City"])
+
+    pivot = build_stock_pivot(result, [], ["No. Barang", "Kategori Barang"])
+
+    assert set(pivot["All_Kategori ABC All"]) >= {"A", "F"}
+    expected = [_scalar_all_add(row) for _, row in pivot.iterrows()]
+    assert pivot["All_Add_Stock"].tolist() == expected
+    assert pivot["All_Add_Stock"].dtype == pivot["All_Stock"].dtype
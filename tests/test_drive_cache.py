@@ -0,0 +1,42 @@
+"""Cache Parquet: frame campuran tidak boleh mengubah hasil preprocessing."""
+
+import datetime as dt
+
+import pandas as pd
+
+from utils.drive_cache import load_cached_frame, store_cached_frame
+from utils.preprocess import preprocess_sales
+
+
+def _mixed_sales():
+    return pd.DataFrame({
+        "No. Faktur":     ["F1", "F2", "F3", "F4"],
+        "Tgl Faktur":     pd.Series([dt.datetime(2024, 1, 5), "06/02/2024", "bukan tanggal", "01/03/2024"], dtype=object),
+        "Nama Pelanggan": ["A - CASH", "PT MAJU", "TOKOPEDIA", "D - SHOPEE"],
+        "Dept.":          ["A", "B", "A", "D"],
+        "No. Barang":     pd.Series([123, "ABC", " 77 ", 123.0], dtype=object),
+        "Kuantitas":      pd.Series([1, "2", 3.0, "x"], dtype=object),
+    })
+
+
+def test_cache_hit_preprocesses_like_cold_read(tmp_path):
+    raw = _mixed_sales()
+    assert store_cached_frame("k", raw, cache_dir=str(tmp_path))
+    hit = load_cached_frame("k", cache_dir=str(tmp_path))
+
+    cold, _ = preprocess_sales(raw.copy())
+    warm, _ = preprocess_sales(hit.copy())
+    pd.testing.assert_frame_equal(
+        cold.reset_index(drop=True), warm.reset_index(drop=True),
+        check_dtype=False, check_categorical=False,
+    )
+    assert pd.api.types.is_datetime64_any_dtype(hit["Tgl Faktur"])
+    assert cold["Tgl Faktur"].tolist() == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-02-06"),
+                                          pd.Timestamp("2024-03-01")]
+
+
+def test_unknown_mixed_column_is_not_cached(tmp_path):
+    raw = _mixed_sales().assign(Keterangan=pd.Series([1, "x", None, 2.5], dtype=object))
+    assert not store_cached_frame("k", raw, cache_dir=str(tmp_path))
+    assert load_cached_frame("k", cache_dir=str(tmp_path)) is None
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,57 @@
+"""Regresi: produk bertipe PRODUK_SCHEMA dengan BRAND/Nama kosong lewat analisis Stock."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import (
+    apply_produk_schema,
+    apply_sales_schema,
+    apply_stock_schema,
+    build_sales_cube,
+    prepare_produk_ref,
+    prepare_stock,
+    preprocess_sales,
+    run_stock_analysis,
+)
+
+
+@pytest.fixture
+def frames():
+    end = pd.Timestamp("2024-06-30")
+    skus = ["SKU001", "SKU002", "SKU003", "SKU004"]
+    penjualan = pd.DataFrame({
+        "No. Faktur":     [f"INV{i}" for i in range(8)],
+        "Tgl Faktur":     [end - pd.Timedelta(days=d) for d in (1, 10, 35, 70, 2, 40, 5, 80)],
+        "Nama Pelanggan": ["A - CASH", "PT MAJU", "TOKOPEDIA", "CV X"] * 2,
+        "Dept.":          ["A", "B", "A", "D"] * 2,
+        "No. Barang":     skus * 2,
+        "Kuantitas":      [3, 1, 2, 5, 4, 1, 2, 6],
+    })
+    produk = pd.DataFrame({
+        "No. Barang":      skus,
+        "BRAND Barang":    ["ASUS", np.nan, "MSI", np.nan],
+        "Kategori Barang": ["mouse", "ram", "vga", "ram"],
+        "Nama Barang":     ["Mouse A", "RAM B", np.nan, np.nan],
+    })
+    stock = pd.DataFrame({
+        "No. Barang":        skus,
+        "Keterangan Barang": ["Mouse A", "RAM B", "VGA C", "RAM D"],
+        "A - ITC":           [2, 0, 1, 4],
+        "B":                 [0, 3, 0, 1],
+        "D - SMG":           [1, 1, 0, 0],
+    })
+    return apply_sales_schema(penjualan), apply_produk_schema(produk), apply_stock_schema(stock), end
+
+
+def test_stock_analysis_with_missing_brand_and_name(frames):
+    penjualan, produk, stock, end = frames
+    penjualan, _ = preprocess_sales(penjualan)
+    result = run_stock_analysis(build_sales_cube(penjualan), prepare_produk_ref(produk), prepare_stock(stock), end)
+
+    dense = result.grid.to_dense()
+    assert set(dense["No. Barang"]) == {"SKU001", "SKU002", "SKU003", "SKU004"}
+    assert not dense[["BRAND Barang", "Nama Barang"]].isna().any().any()
+    blank = dense[dense["No. Barang"] == "SKU004"]
+    assert (blank["BRAND Barang"].astype(str) == "0").all()
+    assert (blank["Nama Barang"].astype(str) == "0").all()
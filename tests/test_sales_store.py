@@ -0,0 +1,107 @@
+"""Store penjualan inkremental: hanya part file baru/berubah yang ditulis."""
+
+import os
+
+import pandas as pd
+import pytest
+
+import utils.sales_store as sales_store
+
+
+def _file(fid, name, rev):
+    return {"id": fid, "name": name, "modifiedTime": f"2024-06-{rev:02d}T00:00:00Z", "md5Checksum": str(rev)}
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    """Drive palsu: {file_id: frame}; id di `failing` gagal dimuat."""
+    state = {"frames": {}, "failing": set(), "loaded": []}
+
+    def _load(_service, files, progress_cb=None):
+        dfs, errors = [], []
+        for f in files:
+            state["loaded"].append(f["id"])
+            if f["id"] in state["failing"]:
+                dfs.append(pd.DataFrame())
+                errors.append((f["id"], f["name"], "boom"))
+            else:
+                dfs.append(state["frames"][f["id"]])
+        return dfs, errors
+
+    monkeypatch.setattr(sales_store, "load_files_parallel", _load)
+    return state
+
+
+def _sales(barang, qty):
+    return pd.DataFrame({"No. Barang": barang, "Kuantitas": qty})
+
+
+def _part_inodes(store_dir):
+    parts = os.path.join(store_dir, "parts")
+    return {n: os.stat(os.path.join(parts, n)).st_ino for n in os.listdir(parts)}
+
+
+def test_refresh_writes_only_new_and_changed_parts(tmp_path, drive):
+    store_dir = str(tmp_path)
+    drive["frames"] = {"a": _sales(["X"], [1]), "b": _sales(["Y", "Z"], [2, 3])}
+    files = [_file("a", "jan.xlsx", 1), _file("b", "feb.xlsx", 1)]
+
+    df, summary = sales_store.refresh_sales_store(None, files, store_dir)
+    assert (summary["added"], len(df)) == (2, 3)
+    before = _part_inodes(store_dir)
+
+    # a tidak berubah, b diganti, c baru
+    drive["loaded"].clear()
+    drive["frames"].update(b=_sales(["Y"], [5]), c=_sales(["W"], [7]))
+    files = [_file("a", "jan.xlsx", 1), _file("b", "feb.xlsx", 2), _file("c", "mar.xlsx", 1)]
+    df, summary = sales_store.refresh_sales_store(None, files, store_dir)
+
+    assert sorted(drive["loaded"]) == ["b", "c"]
+    assert (summary["unchanged"], summary["changed"], summary["added"]) == (1, 1, 1)
+    assert sorted(df["Kuantitas"]) == [1, 5, 7]
+    after = _part_inodes(store_dir)
+    part_a = os.path.basename(sales_store._part_path("a", store_dir))
+    assert after[part_a] == before[part_a]
+
+    # file dihapus di Drive → part dibuang
+    df, summary = sales_store.refresh_sales_store(None, files[:2], store_dir)
+    assert summary["removed"] == 1 and sorted(df["Kuantitas"]) == [1, 5]
+    assert len(os.listdir(os.path.join(store_dir, "parts"))) == 2
+    assert not [n for n in os.listdir(store_dir) if n.endswith(".tmp")]
+
+
+def test_failed_file_keeps_old_rows_matched_by_id(tmp_path, drive):
+    store_dir = str(tmp_path)
+    # Dua file Drive bernama sama; hanya satu yang gagal dimuat ulang
+    drive["frames"] = {"a": _sales(["X"], [1]), "b": _sales(["Y"], [2])}
+    files = [_file("a", "penjualan.xlsx", 1), _file("b", "penjualan.xlsx", 1)]
+    sales_store.refresh_sales_store(None, files, store_dir)
+
+    drive["frames"].update(a=_sales(["X"], [10]), b=_sales(["Y"], [20]))
+    drive["failing"] = {"a"}
+    files = [_file("a", "penjualan.xlsx", 2), _file("b", "penjualan.xlsx", 2)]
+    df, summary = sales_store.refresh_sales_store(None, files, store_dir)
+
+    assert [e[0] for e in summary["errors"]] == ["a"]
+    assert sorted(df["Kuantitas"]) == [1, 20]
+    assert sales_store.load_manifest(store_dir)["a"]["modifiedTime"] == files[0]["modifiedTime"].replace("-02T", "-01T")
+
+
+def test_unchanged_store_is_not_reread_for_the_loaded_version(tmp_path, drive, monkeypatch):
+    store_dir = str(tmp_path)
+    drive["frames"] = {"a": _sales(["X"], [1]), "b": _sales(["Y"], [2])}
+    files = [_file("a", "jan.xlsx", 1), _file("b", "feb.xlsx", 1)]
+    _, summary = sales_store.refresh_sales_store(None, files, store_dir)
+
+    def _no_read(fid, _store_dir):
+        raise AssertionError(f"part {fid} dibaca ulang")
+
+    monkeypatch.setattr(sales_store, "_read_part", _no_read)
+    df, again = sales_store.refresh_sales_store(None, files, store_dir, loaded_version=summary["version"])
+    assert df is None and again["version"] == summary["version"]
+
+    # Versi yang dipegang pemanggil berbeda → frame dibangun dari part
+    monkeypatch.undo()
+    monkeypatch.setattr(sales_store, "load_files_parallel", lambda *a, **k: ([], []))
+    df, _ = sales_store.refresh_sales_store(None, files, store_dir, loaded_version="lama")
+    assert sorted(df["Kuantitas"]) == [1, 2]
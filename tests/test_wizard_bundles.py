@@ -0,0 +1,167 @@
+"""
+Pencarian bundle dengan budget (search_bundles / generate_9_bundles): total
+selalu dalam [lo, hi], budget lebar tanpa seri (harga & stok unik) sama dengan
+pilihan greedy awal wizard_pc.py, dan reservasi stok tidak menjanjikan unit
+melebihi stok cabang.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+# ── Katalog sintetis (format keluaran process_data) ───────────────────────────
+CPUS = [(10, "LGA1200"), (12, "LGA1700"), (13, "LGA1700"), (14, "LGA1700"),
+        ("ULTRA", "LGA1851"), (None, "AM4"), (None, "AM5"), (None, None)]
+PRICE_RANGE = {
+    "Processor":    (1_000_000, 6_000_000),
+    "Motherboard":  (1_000_000, 4_000_000),
+    "Memory RAM":   (300_000, 2_000_000),
+    "SSD Internal": (300_000, 1_500_000),
+    "VGA":          (1_000_000, 10_000_000),
+    "Casing PC":    (300_000, 1_500_000),
+    "Power Supply": (400_000, 2_000_000),
+    "CPU Cooler":   (100_000, 1_000_000),
+}
+
+
+def _catalog(wizard_pc, seed, per_cat=12, max_stock=None):
+    """
+    per_cat baris per kategori. max_stock=None → harga & stok tiap cabang unik
+    di seluruh katalog (tanpa seri); selain itu stok acak 0..max_stock.
+    """
+    rng = np.random.default_rng(seed)
+    cats = [cat for cat in PRICE_RANGE for _ in range(per_cat)]
+    n = len(cats)
+    rows = []
+    for i, cat in enumerate(cats):
+        lo, hi = PRICE_RANGE[cat]
+        gen, socket = CPUS[rng.integers(len(CPUS))] if cat == "Processor" else (None, None)
+        row = {
+            "Nama Accurate": f"{cat} {i}",
+            "Kategori": cat,
+            # offset per baris unik → tidak ada dua harga yang sama
+            "Web": float(lo + (hi - lo) * rng.random() // 1000 * 1000 + i),
+            "NeedVGA": int(rng.integers(2)) if cat == "Processor" else 0,
+            "HasPSU": int(rng.integers(2)) if cat == "Casing PC" else 0,
+            "NeedCooler": int(rng.integers(2)) if cat == "Processor" else 0,
+            "CPU_Gen": gen,
+            "CPU_Socket": socket,
+            "Mobo_Series": rng.choice(wizard_pc.MOBO_SERIES) if cat == "Motherboard" else None,
+            "DDR_Type": rng.choice(["DDR4", "DDR5"]) if cat in ("Motherboard", "Memory RAM") else None,
+        }
+        for usage in wizard_pc.USAGE_CATS:
+            row[usage] = bool(rng.random() < 0.8)
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    for col in ["CPU_Gen", "CPU_Socket", "Mobo_Series", "DDR_Type"]:
+        df[col] = df[col].astype(object)
+    for col in wizard_pc.BRANCH_MAP.values():
+        df[col] = rng.permutation(n).astype(float) if max_stock is None else rng.integers(0, max_stock + 1, n).astype(float)
+    df.index = rng.permutation(n) + 1000   # label baris ≠ posisi
+    return df
+
+
+# ── Greedy awal (salinan pick_component / assemble_bundle versi awal) ─────────
+def _pick_component(items, strategy, branch_col):
+    if items.empty: return None
+    if strategy == "Harga Termurah": return items.sort_values(by=['Web', branch_col], ascending=[True, False]).iloc[0]
+    elif strategy == "Stok Terbanyak": return items.sort_values(by=[branch_col, 'Web'], ascending=[False, True]).iloc[0]
+    min_p = items['Web'].min()
+    pool = items[items['Web'] <= (min_p + 100000)]
+    return pool.sort_values(by=[branch_col, 'Web'], ascending=[False, True]).iloc[0]
+
+
+def _assemble_bundle(wizard_pc, index, pick_p, strategy, branch_col, usage_cat):
+    bundle, missing, total = {'Processor': pick_p}, [], pick_p['Web']
+
+    def add(slot, items):
+        nonlocal total
+        part = _pick_component(items, strategy, branch_col)
+        if part is not None:
+            bundle[slot], total = part, total + part['Web']
+        else:
+            missing.append(slot)
+        return part
+
+    parts = lambda cat: wizard_pc.compat_parts(index, usage_cat, cat)
+    mobo = add('Motherboard', wizard_pc.compat_mobos(index, usage_cat, pick_p))
+    add('Memory RAM', wizard_pc.compat_rams(index, usage_cat, mobo.get('DDR_Type') if mobo is not None else None))
+    add('SSD Internal', parts('SSD Internal'))
+    if pick_p['NeedVGA'] == 1: add('VGA', parts('VGA'))
+    case = add('Casing PC', parts('Casing PC'))
+    if case is not None and case.get('HasPSU', 0) == 0: add('Power Supply', parts('Power Supply'))
+    if pick_p['NeedCooler'] == 1: add('CPU Cooler', parts('CPU Cooler'))
+    return {"parts": bundle, "missing": missing, "total": total}
+
+
+def _labels(bundle):
+    return {slot: part.name for slot, part in bundle["parts"].items()}
+
+
+# ── Test ──────────────────────────────────────────────────────────────────────
+BUDGETS = [(0, 4_000_000), (4_000_000, 7_000_000), (6_500_000, 7_000_000),
+           (7_000_000, 12_000_000), (12_000_000, 25_000_000), (0, 1e12)]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_totals_stay_within_budget(wizard_pc, seed):
+    df = _catalog(wizard_pc, seed)
+    index = wizard_pc.build_compat_index(df)
+    found = 0
+    for usage in wizard_pc.USAGE_CATS:
+        for p_min, p_max in BUDGETS:
+            lo = max(wizard_pc.PRICE_THRESHOLDS[usage]['min'], p_min)
+            hi = min(wizard_pc.PRICE_THRESHOLDS[usage]['max'], p_max)
+            by_branch = wizard_pc.generate_all_branches(df, usage, p_min, p_max, index)
+            for results in by_branch.values():
+                for res in results:
+                    assert lo <= res["total"] <= hi
+                    assert res["total"] == pytest.approx(sum(p['Web'] for p in res["parts"].values()))
+                    assert all(p[usage] for p in res["parts"].values())
+                found += len(results)
+    assert found > 0
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("strategy", ["Harga Termurah", "Stok Terbanyak", "Smart Pick"])
+def test_wide_budget_matches_old_greedy(wizard_pc, seed, strategy):
+    df = _catalog(wizard_pc, seed)
+    index = wizard_pc.build_compat_index(df)
+    for usage in wizard_pc.USAGE_CATS:
+        for branch_col in wizard_pc.BRANCH_MAP.values():
+            results = wizard_pc.search_bundles(index, strategy, branch_col, usage, 0, 1e12)
+            procs = wizard_pc.compat_parts(index, usage, 'Processor')
+            assert len(results) == min(3, len(procs))
+
+            # Smart Pick awal mengacak urutan processor → hanya komponen yang dibandingkan
+            if strategy == "Harga Termurah":
+                assert [r["parts"]["Processor"].name for r in results] == list(procs.sort_values('Web').index[:3])
+            elif strategy == "Stok Terbanyak":
+                assert [r["parts"]["Processor"].name for r in results] == list(procs.sort_values(branch_col, ascending=False).index[:3])
+
+            for res in results:
+                old = _assemble_bundle(wizard_pc, index, res["parts"]["Processor"], strategy, branch_col, usage)
+                assert _labels(res) == _labels(old)
+                assert res["missing"] == old["missing"]
+                assert res["total"] == pytest.approx(old["total"])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_reserve_stock_never_overpromises(wizard_pc, seed):
+    df = _catalog(wizard_pc, seed, per_cat=6, max_stock=2)
+    index = wizard_pc.build_compat_index(df)
+    overpromised = False
+    for usage in wizard_pc.USAGE_CATS:
+        reserved = wizard_pc.generate_all_branches(df, usage, 0, 1e12, index, reserve_stock=True)
+        plain    = wizard_pc.generate_all_branches(df, usage, 0, 1e12, index)
+        for label, col in wizard_pc.BRANCH_MAP.items():
+            used = Counter(p.name for res in reserved[label] for p in res["parts"].values())
+            for name, units in used.items():
+                assert units <= df.loc[name, col]
+            used = Counter(p.name for res in plain[label] for p in res["parts"].values())
+            overpromised |= any(units > df.loc[name, col] for name, units in used.items())
+    # tanpa reservasi katalog ini memang menjanjikan unit melebihi stok
+    assert overpromised
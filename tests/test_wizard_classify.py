@@ -0,0 +1,237 @@
+"""
+Kesetaraan process_data (classify_components, vectorized) dengan aturan per
+baris (iterrows) versi awal wizard_pc.py: nilai, urutan kolom, dtype, dan
+tipe objek Python (int/str/None) di kolom object harus sama persis.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+# ── Versi per baris (salinan aturan awal) ─────────────────────────────────────
+def _cpu_info(name):
+    name = name.upper()
+    info = {"gen": None, "socket": None}
+    intel_match = re.search(r'I[3579]-(\d{4,5})', name)
+    if intel_match:
+        num = intel_match.group(1)
+        gen = int(num[0]) if len(num) == 4 else int(num[:2])
+        info["gen"] = gen
+        if gen >= 12: info["socket"] = "LGA1700"
+        elif gen >= 10: info["socket"] = "LGA1200"
+        elif gen >= 8: info["socket"] = "LGA1151"
+    elif "ULTRA" in name:
+        info["gen"] = "ULTRA"
+        info["socket"] = "LGA1851"
+    elif "RYZEN" in name:
+        ryzen_match = re.search(r'RYZEN\s[3579]\s(\d{4})', name)
+        if ryzen_match:
+            series = int(ryzen_match.group(1))
+            info["socket"] = "AM5" if series >= 7000 else "AM4"
+    return info
+
+
+def _ddr_type(name):
+    name = name.upper()
+    if 'DDR5' in name or ' D5' in name: return 'DDR5'
+    if 'DDR4' in name or ' D4' in name: return 'DDR4'
+    return None
+
+
+def _process_data_rowwise(df):
+    df.columns = df.columns.str.strip()
+    df['Stock_SBY_Combined'] = (df.get('Stock A - ITC', 0).fillna(0) + df.get('Stock B', 0).fillna(0) + df.get('Stock Y - SBY', 0).fillna(0))
+    df = df[df['Web'] > 1].copy()
+    df['Nama Accurate'] = df['Nama Accurate'].fillna('').str.strip()
+    df['Kategori'] = df['Kategori'].fillna('').str.strip()
+    df['Web'] = pd.to_numeric(df['Web'], errors='coerce').fillna(0)
+
+    cat_up = df['Kategori'].str.upper()
+    df.loc[cat_up.str.contains('PROCESSOR'), 'Kategori'] = 'Processor'
+    df.loc[cat_up.str.contains('MOTHERBOARD'), 'Kategori'] = 'Motherboard'
+    df.loc[cat_up.str.contains('MEMORY RAM|RAM'), 'Kategori'] = 'Memory RAM'
+    df.loc[cat_up.str.contains('SSD'), 'Kategori'] = 'SSD Internal'
+    df.loc[cat_up.str.contains('VGA|GRAPHIC CARD'), 'Kategori'] = 'VGA'
+    df.loc[cat_up.str.contains('CASING'), 'Kategori'] = 'Casing PC'
+    df.loc[cat_up.str.contains('POWER SUPPLY|PSU'), 'Kategori'] = 'Power Supply'
+    df.loc[cat_up.str.contains('COOLER|COOLING|FAN PROCESSOR|HEATSINK'), 'Kategori'] = 'CPU Cooler'
+
+    df['NeedVGA'], df['HasPSU'], df['NeedCooler'] = 0, 0, 0
+    df['CPU_Gen'], df['CPU_Socket'], df['Mobo_Series'], df['DDR_Type'] = None, None, None, None
+    for col in ['Office', 'Gaming Standard', 'Gaming Advanced']: df[col] = False
+
+    for idx, row in df.iterrows():
+        name = row['Nama Accurate'].upper()
+        price = row['Web']
+        cat = row['Kategori']
+
+        if cat == 'Processor':
+            is_f = bool(re.search(r'\d+F\b', name))
+            if is_f: df.at[idx, 'NeedVGA'] = 1
+            if 'TRAY' in name or 'NO FAN' in name: df.at[idx, 'NeedCooler'] = 1
+            info = _cpu_info(name)
+            df.at[idx, 'CPU_Gen'], df.at[idx, 'CPU_Socket'] = info['gen'], info['socket']
+
+            if 'I3' in name or 'I5' in name: df.at[idx, 'Office'] = True
+            if ('I3' in name or 'I5' in name) and is_f: df.at[idx, 'Gaming Standard'] = True
+            if (any(x in name for x in ['I7', 'I9', 'ULTRA'])) or ('RYZEN 7' in name or 'RYZEN 9' in name):
+                df.at[idx, 'Gaming Advanced'] = True
+
+        elif cat == 'Motherboard':
+            series_list = ['H410','H510','H610','H810','B660','B760','B860','Z790','Z890','A520','A620','B450','B550','B650','B840','B850','X870']
+            for s in series_list:
+                if s in name:
+                    df.at[idx,'Mobo_Series'] = s
+                    break
+            df.at[idx,'DDR_Type'] = _ddr_type(name)
+            series = df.at[idx,'Mobo_Series']
+            if series in ['H410','H510','H610','H810','A520','A620']: df.at[idx,'Office'] = True
+            if (series in ['B660','B760','B860'] and price < 2000000) or (series in ['B450','B550','B650','B840','B850']): df.at[idx,'Gaming Standard'] = True
+            if (series in ['B660','B760','B860'] and price >= 2000000) or (series in ['Z790','Z890','B450','B550','B650','B840','B850','X870']): df.at[idx,'Gaming Advanced'] = True
+
+        elif cat == 'Memory RAM':
+            if 'SODIMM' in name: continue
+            df.at[idx, 'DDR_Type'] = _ddr_type(name)
+            match_gb = re.search(r'(\d+)\s*GB', name)
+            if match_gb:
+                sz = int(match_gb.group(1))
+                if 8 <= sz <= 16: df.at[idx, 'Office'] = True
+                if 16 <= sz <= 32: df.at[idx, 'Gaming Standard'] = True
+                if 32 <= sz <= 64: df.at[idx, 'Gaming Advanced'] = True
+
+        elif cat == 'SSD Internal':
+            if 'WDS120G2G0B' in name: continue
+            df.loc[idx, ['Office', 'Gaming Standard']] = True
+            if 'NVME' in name: df.at[idx, 'Gaming Advanced'] = True
+
+        elif cat == 'VGA':
+            if any(x in name for x in ['GT710', 'GT730']): df.at[idx, 'Office'] = True
+            elif any(x in name for x in ['GT1030', 'GTX1650', 'RTX 3050', 'RTX 3060', 'RTX 5050', 'RTX 4060']): df.at[idx, 'Gaming Standard'] = True
+            elif any(x in name for x in ['RTX 50','RTX 60']): df.at[idx, 'Gaming Advanced'] = True
+
+        elif cat == 'Casing PC':
+            if 'ARMAGGEDDON' in name: continue
+            if any(x in name for x in ['PSU', 'OFFICE', 'VALCAS']):
+                df.at[idx, 'Office'] = True
+                if 'PSU' in name or 'VALCAS' in name: df.at[idx, 'HasPSU'] = 1
+            if 300000 <= price <= 600000: df.at[idx, 'Gaming Standard'] = True
+            if price > 600000: df.at[idx, 'Gaming Advanced'] = True
+
+        elif cat == 'Power Supply':
+            if price < 500000: df.at[idx, 'Office'] = True
+            if price >= 500000: df.at[idx, 'Gaming Standard'] = True
+            if any(x in name.lower() for x in ['bronze', 'titanium', 'gold', 'platinum', 'silver']): df.at[idx, 'Gaming Advanced'] = True
+
+        elif cat == 'CPU Cooler':
+            if price < 300000: df.at[idx, 'Office'] = True
+            if 250000 <= price <= 1000000: df.at[idx, 'Gaming Standard'] = True
+            if price > 500000: df.at[idx, 'Gaming Advanced'] = True
+    return df
+
+
+# ── Katalog uji ───────────────────────────────────────────────────────────────
+CATALOG = [
+    # (Kategori, Nama Accurate, Web)
+    ("PROCESSOR INTEL", "Intel Core i5-12400F 2.5GHz", 2_100_000),          # F → NeedVGA, Gaming Standard
+    ("PROCESSOR INTEL", "Intel Core i3-10105 TRAY", 1_300_000),             # TRAY → NeedCooler, gen 10
+    ("PROCESSOR INTEL", "Intel Core i5-11400 NO FAN", 1_900_000),           # NO FAN, gen 11
+    ("PROCESSOR INTEL", "Intel Core i3-13100F Tray", 1_500_000),            # F + TRAY, gen 13
+    ("PROCESSOR INTEL", "Intel Core i7-14700KF Box", 6_500_000),            # KF bukan '\d+F', gen 14
+    ("PROCESSOR INTEL", "Intel Core i9-9900K", 5_000_000),                   # gen 9 → LGA1151
+    ("PROCESSOR INTEL", "Intel Core i5-7400", 900_000),                      # gen 7 → socket None
+    ("PROCESSOR INTEL", "Intel Core Ultra 5 245K", 4_800_000),               # ULTRA
+    ("PROCESSOR INTEL", "Intel Core Ultra 7 265KF TRAY", 6_000_000),         # ULTRA + TRAY
+    ("PROCESSOR INTEL", "Intel Pentium Gold G7400", 1_000_000),              # tidak dikenal
+    ("PROCESSOR AMD", "AMD Ryzen 5 5600 Box", 1_600_000),                    # AM4
+    ("PROCESSOR AMD", "AMD Ryzen 7 7700X", 4_500_000),                       # AM5, Gaming Advanced
+    ("PROCESSOR AMD", "AMD Ryzen 9 PRO", 7_000_000),                         # Ryzen tanpa nomor seri
+    ("PROCESSOR AMD", "AMD Ryzen 5 8500G", 2_700_000),                       # AM5 tanpa F
+    ("MOTHERBOARD", "ASUS PRIME B760M-A D4", 1_800_000),                     # split < 2 jt, ' D4'
+    ("MOTHERBOARD", "MSI MAG B760 TOMAHAWK WIFI DDR5", 2_900_000),           # split ≥ 2 jt
+    ("MOTHERBOARD", "GIGABYTE B660M DS3H DDR4", 2_000_000),                  # tepat 2 jt
+    ("MOTHERBOARD", "ASROCK H610M-HVS DDR4", 1_200_000),                     # Office
+    ("MOTHERBOARD", "ASUS TUF B650-PLUS D5", 3_200_000),                     # Standard + Advanced
+    ("MOTHERBOARD", "MSI PRO Z790-P DDR5", 4_000_000),
+    ("MOTHERBOARD", "GIGABYTE A520M K V2", 1_000_000),                       # tanpa DDR
+    ("MOTHERBOARD", "ASROCK X870E TAICHI", 9_000_000),
+    ("MOTHERBOARD", "BIOSTAR H310MHP", 700_000),                             # seri tidak dikenal
+    ("MEMORY RAM", "Kingston Fury DDR4 8GB 3200", 350_000),
+    ("MEMORY RAM", "Corsair Vengeance DDR5 16 GB", 900_000),
+    ("MEMORY RAM", "G.Skill Trident D5 32GB Kit", 2_000_000),
+    ("MEMORY RAM", "TeamGroup T-Force DDR5 64GB", 3_500_000),
+    ("MEMORY RAM", "Adata DDR4 4GB", 200_000),
+    ("RAM", "Kingston SODIMM DDR4 8GB", 300_000),                             # SODIMM dilewati
+    ("RAM", "V-GeN RESCUE D4 RAM", 150_000),                                 # tanpa GB
+    ("SSD", "WD Green SATA WDS120G2G0B", 250_000),                            # dilewati
+    ("SSD", "Samsung 980 NVMe 500GB", 800_000),
+    ("SSD INTERNAL", "Adata SU650 SATA 256GB", 350_000),
+    ("VGA", "Zotac GT730 2GB", 900_000),
+    ("VGA", "MSI RTX 4060 Ventus", 5_000_000),
+    ("GRAPHIC CARD", "Asus RTX 5070 Prime", 11_000_000),
+    ("VGA", "Gigabyte RTX 5050 Eagle", 4_200_000),                             # Standard (aturan pertama)
+    ("VGA", "Sapphire RX 7600 Pulse", 4_500_000),                              # tidak ada aturan
+    ("CASING", "Armaggeddon Nimitz TR1000 PSU", 450_000),                      # dilewati
+    ("CASING", "Valcas Office Case 450W", 350_000),
+    ("CASING", "Cube Gaming Office mATX", 250_000),
+    ("CASING", "Paradox Gaming + PSU 500W", 550_000),
+    ("CASING", "Lian Li Lancool 216", 1_300_000),
+    ("POWER SUPPLY", "FSP Hydro K 500W", 450_000),
+    ("PSU", "Corsair CX650 80+ Bronze", 750_000),
+    ("POWER SUPPLY", "Seasonic Focus GX-750 Gold", 1_600_000),
+    ("POWER SUPPLY", "Cooler Master Elite 600 White", 500_000),
+    ("CPU COOLER", "Deepcool AG400", 280_000),
+    ("COOLING", "ID-Cooling SE-214", 200_000),
+    ("HEATSINK", "Noctua NH-D15", 1_600_000),
+    ("FAN PROCESSOR", "Deepcool LE520 AIO", 700_000),
+    ("MOUSE", "Logitech G102", 250_000),                                        # kategori lain
+    ("PROCESSOR INTEL", "Intel Core i5-12400", 1),                              # Web ≤ 1 → dibuang
+    ("PROCESSOR INTEL", None, 1_500_000),                                       # nama kosong
+]
+
+
+def _catalog(rows=CATALOG):
+    rng = np.random.default_rng(0)
+    n = len(rows)
+    return pd.DataFrame({
+        " Kategori ": [r[0] for r in rows],
+        "Nama Accurate": [r[1] for r in rows],
+        "Web": [r[2] for r in rows],
+        "Stock A - ITC": rng.integers(0, 4, n).astype(float),
+        "Stock B": np.where(rng.random(n) < 0.2, np.nan, rng.integers(0, 3, n)),
+        "Stock Y - SBY": rng.integers(0, 2, n),
+        "Stock C6": rng.integers(0, 5, n),
+        "Stock D - SMG": rng.integers(0, 5, n),
+    })
+
+
+def _assert_identical(result, expected):
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    for col in expected.columns[expected.dtypes == object]:
+        assert [type(v) for v in result[col]] == [type(v) for v in expected[col]], col
+
+
+def test_process_data_matches_rowwise_rules(wizard_pc):
+    result = wizard_pc.process_data(_catalog())
+    expected = _process_data_rowwise(_catalog())
+
+    _assert_identical(result, expected)
+    # Katalog benar-benar mencakup setiap cabang aturan
+    assert set(result["CPU_Socket"].dropna()) == {"LGA1700", "LGA1200", "LGA1151", "LGA1851", "AM4", "AM5"}
+    assert set(result["Mobo_Series"].dropna()) == {"A520", "B650", "B660", "B760", "H610", "X870", "Z790"}
+    assert (result["NeedVGA"].sum(), result["NeedCooler"].sum(), result["HasPSU"].sum()) == (2, 4, 2)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_process_data_matches_rowwise_on_shuffled_names(wizard_pc, seed):
+    """Nama disusun ulang dari token katalog (kombinasi F/TRAY/DDR/GB/seri lintas kategori)."""
+    rng = np.random.default_rng(seed)
+    tokens = sorted({t for _, name, _ in CATALOG if name for t in name.split()})
+    kategori = sorted({k for k, _, _ in CATALOG})
+    rows = [
+        (rng.choice(kategori), " ".join(rng.choice(tokens, rng.integers(1, 6))), float(rng.choice([0, 1, 250_000, 300_000, 500_000, 600_000, 1_999_999, 2_000_000, 2_500_000])))
+        for _ in range(300)
+    ]
+    _assert_identical(wizard_pc.process_data(_catalog(rows)), _process_data_rowwise(_catalog(rows)))
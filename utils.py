@@ -65,39 +65,6 @@ def read_produk_file(_drive_service, file_id):
     df.columns = ['No. Barang', 'BRAND Barang', 'Kategori Barang', 'Nama Barang']
     return df
 
-# --- FUNGSI MAPPING DATA ---
-def map_nama_dept(row):
-    dept = str(row.get('Dept.', '')).strip().upper()
-    pelanggan = str(row.get('Nama Pelanggan', '')).strip().upper()
-    if dept == 'A':
-        if pelanggan in ['A - CASH', 'AIRPAY INTERNATIONAL INDONESIA', 'TOKOPEDIA']: return 'A - ITC'
-        else: return 'A - RETAIL'
-    mapping = {'B': 'B - JKT', 'C': 'C - PUSAT', 'D': 'D - SMG','E': 'E - JOG', 'F': 'F - MLG', 'G': 'G - PROJECT','H': 'H - BALI', 'X': 'X'}
-    return mapping.get(dept, 'X')
-
-def map_city(nama_dept):
-    if nama_dept in ['A - ITC', 'A - RETAIL', 'C - PUSAT', 'G - PROJECT']: return 'Surabaya'
-    elif nama_dept == 'B - JKT': return 'Jakarta'
-    elif nama_dept == 'D - SMG': return 'Semarang'
-    elif nama_dept == 'E - JOG': return 'Jogja'
-    elif nama_dept == 'F - MLG': return 'Malang'
-    elif nama_dept == 'H - BALI': return 'Bali'
-    else: return 'Others'
-
-SHOPEE_SET = {
-    'AIRPAY INTERNATIONAL INDONESIA', 'AIRPAY.ID', 'AIRPAY - WD',
-    'D - SHOPEE', 'F - SHOPEE', 'E - SHOPEE', 'H - SHOPEE'
-}
-TOKOPEDIA_SET = {'TOKOPEDIA', 'TOKOPEDIA.ID'}
-WEBSITE_SET = {'A - CASH', 'D - CASH', 'H - CASH', 'E - CASH', 'F - CASH', 'B - CASH'}
-
-def map_platform(row):
-    pelanggan = str(row.get('Nama Pelanggan', '')).strip().upper()
-    if pelanggan in SHOPEE_SET: return 'Shopee'
-    if pelanggan in TOKOPEDIA_SET: return 'Tokopedia'
-    if pelanggan in WEBSITE_SET: return 'Website'
-    return 'Offline'
-
 # --- FUNGSI KONVERSI EXCEL ---
 @st.cache_data
 def convert_df_to_excel(df):
@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
+import hashlib
+from io import BytesIO
 
 # --- 1. KONFIGURASI & CSS CUSTOM ---
 st.set_page_config(page_title="PC Wizard Pro - Marketplace", layout="wide")
@@ -102,13 +105,44 @@ PRICE_THRESHOLDS = {
 }
 
 DISPLAY_ORDER = ['Processor', 'Motherboard', 'Memory RAM', 'SSD Internal', 'VGA', 'Casing PC', 'Power Supply', 'CPU Cooler']
+USAGE_CATS = ['Office', 'Gaming Standard', 'Gaming Advanced']
+
+# Pola klasifikasi komponen (dikompilasi sekali, dipakai per kolom)
+RE_INTEL_NUM  = re.compile(r'I[3579]-(\d{4,5})')
+RE_RYZEN_NUM  = re.compile(r'RYZEN\s[3579]\s(\d{4})')
+RE_F_SUFFIX   = re.compile(r'\d+F\b')
+RE_RAM_GB     = re.compile(r'(\d+)\s*GB')
+
+MOBO_SERIES       = ['H410','H510','H610','H810','B660','B760','B860','Z790','Z890','A520','A620','B450','B550','B650','B840','B850','X870']
+MOBO_OFFICE       = ['H410','H510','H610','H810','A520','A620']
+MOBO_PRICE_SPLIT  = ['B660','B760','B860']          # < 2 jt → Gaming Standard, ≥ 2 jt → Gaming Advanced
+MOBO_GAMING_STD   = ['B450','B550','B650','B840','B850']
+MOBO_GAMING_ADV   = ['Z790','Z890','B450','B550','B650','B840','B850','X870']
+VGA_OFFICE        = ['GT710', 'GT730']
+VGA_GAMING_STD    = ['GT1030', 'GTX1650', 'RTX 3050', 'RTX 3060', 'RTX 5050', 'RTX 4060']
+VGA_GAMING_ADV    = ['RTX 50', 'RTX 60']
+PSU_CERTIFIED     = ['bronze', 'titanium', 'gold', 'platinum', 'silver']
+
+# Kompatibilitas processor → seri motherboard (generasi Intel dulu, lalu socket)
+MOBO_BY_GEN = {
+    10: ('H410', 'H510'),
+    11: ('H510',),
+    12: ('H610', 'B660', 'B760', 'Z790'),
+    13: ('H610', 'B660', 'B760', 'Z790'),
+    14: ('H610', 'B660', 'B760', 'Z790'),
+    "ULTRA": ('H810', 'B860', 'Z890'),
+}
+MOBO_BY_SOCKET = {
+    "AM4": ('A520', 'B450', 'B550'),
+    "AM5": ('A620', 'B650', 'B840', 'B850', 'X870'),
+}
 
 # --- 2. LOGIKA HELPER ---
 
 def get_cpu_info(name):
     name = name.upper()
     info = {"gen": None, "socket": None}
-    intel_match = re.search(r'I[3579]-(\d{4,5})', name)
+    intel_match = RE_INTEL_NUM.search(name)
     if intel_match:
         num = intel_match.group(1)
         gen = int(num[0]) if len(num) == 4 else int(num[:2])
@@ -120,7 +154,7 @@ def get_cpu_info(name):
         info["gen"] = "ULTRA"
         info["socket"] = "LGA1851"
     elif "RYZEN" in name:
-        ryzen_match = re.search(r'RYZEN\s[3579]\s(\d{4})', name)
+        ryzen_match = RE_RYZEN_NUM.search(name)
         if ryzen_match:
             series = int(ryzen_match.group(1))
             info["socket"] = "AM5" if series >= 7000 else "AM4"
@@ -132,20 +166,186 @@ def get_ddr_type(name):
     if 'DDR4' in name or ' D4' in name: return 'DDR4'
     return None
 
+def compatible_series(gen, socket):
+    """Seri motherboard yang cocok untuk processor (tuple kosong jika tidak dikenal)."""
+    if gen in MOBO_BY_GEN: return MOBO_BY_GEN[gen]
+    return MOBO_BY_SOCKET.get(socket, ())
+
 def is_compatible(cpu_row, mobo_row):
-    gen = cpu_row['CPU_Gen']
-    socket = cpu_row['CPU_Socket']
-    series = mobo_row['Mobo_Series']
-    if gen == 10: return series in ['H410', 'H510']
-    if gen == 11: return series in ['H510']
-    if gen in [12, 13, 14]: return series in ['H610', 'B660', 'B760', 'Z790']
-    if gen == "ULTRA": return series in ['H810', 'B860', 'Z890']
-    if socket == "AM4": return series in ['A520', 'B450', 'B550']
-    if socket == "AM5": return series in ['A620', 'B650', 'B840', 'B850', 'X870']
-    return False
+    return mobo_row['Mobo_Series'] in compatible_series(cpu_row['CPU_Gen'], cpu_row['CPU_Socket'])
+
+# --- 2b. INDEKS KOMPATIBILITAS ---
+# Dibangun sekali per katalog: setiap lookup komponen menjadi akses dict, bukan
+# filter + apply(axis=1) atas seluruh katalog. Semua irisan mempertahankan
+# urutan katalog sehingga urutan strategi (sort stabil) tetap deterministik.
+
+def build_compat_index(df):
+    """
+    {('part', usage, kategori): baris kategori dengan flag usage,
+     ('mobo', usage, seri):     motherboard usage dengan Mobo_Series di seri (tuple),
+     ('ram', usage, ddr):       RAM usage dengan DDR_Type == ddr (None = tanpa DDR),
+     'stock':                   matriks stok item × cabang (kolom = BRANCH_MAP, urutan baris df),
+     'positions':               index df (label baris → posisi di matriks)}
+    """
+    index = {'empty': df.iloc[:0], 'branches': list(BRANCH_MAP.values()), 'positions': df.index}
+    index['stock'] = df.reindex(columns=index['branches']).to_numpy(dtype=float)
+    mobo_keys = set(MOBO_BY_GEN.values()) | set(MOBO_BY_SOCKET.values())
+    for usage in USAGE_CATS:
+        usable = df[df[usage] == True]
+        for cat, part in usable.groupby('Kategori', sort=False):
+            index[('part', usage, cat)] = part
+        mobos = index.get(('part', usage, 'Motherboard'), index['empty'])
+        for series in mobo_keys:
+            index[('mobo', usage, series)] = mobos[mobos['Mobo_Series'].isin(series)]
+        rams = index.get(('part', usage, 'Memory RAM'), index['empty'])
+        for ddr in rams['DDR_Type'].dropna().unique():
+            index[('ram', usage, ddr)] = rams[rams['DDR_Type'] == ddr]
+        index[('ram', usage, None)] = rams[rams['DDR_Type'].isna()]
+    return index
+
+def compat_parts(index, usage, cat):
+    return index.get(('part', usage, cat), index['empty'])
+
+def compat_mobos(index, usage, cpu_row):
+    series = compatible_series(cpu_row['CPU_Gen'], cpu_row['CPU_Socket'])
+    return index.get(('mobo', usage, series), index['empty'])
+
+def compat_rams(index, usage, ddr):
+    try:
+        return index.get(('ram', usage, ddr), index['empty'])
+    except TypeError:   # DDR_Type tidak hashable → tidak ada RAM yang sama
+        return index['empty']
 
 # --- 3. PUSAT LOGIKA PEMROSESAN DATA ---
 
+def _words(words):
+    """Pola regex 'salah satu kata' (substring biasa, karakter khusus di-escape)."""
+    return re.compile('|'.join(map(re.escape, words)))
+
+RE_DDR5 = _words(['DDR5', ' D5'])
+RE_DDR4 = _words(['DDR4', ' D4'])
+
+def classify_components(df):
+    """
+    Aturan klasifikasi per kategori dalam bentuk operasi kolom (str.contains /
+    str.extract dengan pola terkompilasi, hanya pada baris kategori terkait).
+    Hasil sama dengan aturan per baris (iterrows) sebelumnya: {kolom: array}
+    untuk NeedVGA, HasPSU, NeedCooler, CPU_Gen, CPU_Socket, Mobo_Series,
+    DDR_Type, dan flag Office / Gaming Standard / Gaming Advanced.
+    """
+    n = len(df)
+    name  = df['Nama Accurate'].str.upper()
+    price = df['Web'].to_numpy()
+    cat   = df['Kategori'].to_numpy()
+
+    def has(rows, pat):
+        out = np.zeros(n, dtype=bool)
+        if rows.any():
+            pat = pat if isinstance(pat, re.Pattern) else _words(pat)
+            out[rows] = name[rows].str.contains(pat, na=False).to_numpy(dtype=bool)
+        return out
+
+    def extract(rows, pat):
+        return name[rows].str.extract(pat, expand=False)
+
+    need_vga, has_psu, need_cooler = (np.zeros(n, dtype=np.int64) for _ in range(3))
+    cpu_gen, cpu_socket, mobo_series, ddr_type = (np.full(n, None, dtype=object) for _ in range(4))
+    office, gaming_std, gaming_adv = (np.zeros(n, dtype=bool) for _ in range(3))
+
+    def set_ddr(rows):
+        ddr_type[has(rows, RE_DDR4)] = 'DDR4'
+        ddr_type[has(rows, RE_DDR5)] = 'DDR5'   # DDR5 diperiksa lebih dulu di get_ddr_type
+
+    # Processor
+    proc = cat == 'Processor'
+    is_f = has(proc, RE_F_SUFFIX)
+    need_vga[is_f] = 1
+    need_cooler[has(proc, ['TRAY', 'NO FAN'])] = 1
+
+    num   = extract(proc, RE_INTEL_NUM)
+    intel = np.zeros(n, dtype=bool)
+    intel[proc] = num.notna().to_numpy()
+    num   = num.dropna()
+    gen   = num.str.slice(0, 1).where(num.str.len() == 4, num.str.slice(0, 2)).astype(int).to_numpy()
+    cpu_gen[intel]    = gen
+    cpu_socket[intel] = np.select([gen >= 12, gen >= 10, gen >= 8], ['LGA1700', 'LGA1200', 'LGA1151'], '')
+    cpu_socket[intel & (cpu_socket == '')] = None
+
+    ultra = has(proc & ~intel, ['ULTRA'])
+    cpu_gen[ultra], cpu_socket[ultra] = 'ULTRA', 'LGA1851'
+
+    ryzen  = has(proc & ~intel & ~ultra, ['RYZEN'])
+    series = extract(ryzen, RE_RYZEN_NUM).astype(float).to_numpy()
+    cpu_socket[ryzen] = np.where(np.isnan(series), None, np.where(series >= 7000, 'AM5', 'AM4'))
+
+    i3_i5 = has(proc, ['I3', 'I5'])
+    office     |= i3_i5
+    gaming_std |= i3_i5 & is_f
+    gaming_adv |= has(proc, ['I7', 'I9', 'ULTRA', 'RYZEN 7', 'RYZEN 9'])
+
+    # Motherboard: seri pertama (urutan MOBO_SERIES) yang muncul di nama
+    mobo = cat == 'Motherboard'
+    for s in MOBO_SERIES:
+        mobo_series[has(mobo & pd.isna(mobo_series), [s])] = s
+    set_ddr(mobo)
+    in_series = lambda values: mobo & pd.Series(mobo_series).isin(values).to_numpy()
+    split = in_series(MOBO_PRICE_SPLIT)
+    office     |= in_series(MOBO_OFFICE)
+    gaming_std |= (split & (price < 2000000)) | in_series(MOBO_GAMING_STD)
+    gaming_adv |= (split & (price >= 2000000)) | in_series(MOBO_GAMING_ADV)
+
+    # Memory RAM (SODIMM dilewati)
+    ram = cat == 'Memory RAM'
+    ram &= ~has(ram, ['SODIMM'])
+    set_ddr(ram)
+    size = np.full(n, np.nan)
+    size[ram] = extract(ram, RE_RAM_GB).astype(float).to_numpy()
+    office     |= ram & (8 <= size) & (size <= 16)
+    gaming_std |= ram & (16 <= size) & (size <= 32)
+    gaming_adv |= ram & (32 <= size) & (size <= 64)
+
+    # SSD Internal
+    ssd = cat == 'SSD Internal'
+    ssd &= ~has(ssd, ['WDS120G2G0B'])
+    office     |= ssd
+    gaming_std |= ssd
+    gaming_adv |= has(ssd, ['NVME'])
+
+    # VGA: aturan pertama yang cocok
+    vga = cat == 'VGA'
+    vga_office = has(vga, VGA_OFFICE)
+    vga_std    = has(vga & ~vga_office, VGA_GAMING_STD)
+    office     |= vga_office
+    gaming_std |= vga_std
+    gaming_adv |= has(vga & ~vga_office & ~vga_std, VGA_GAMING_ADV)
+
+    # Casing PC (ARMAGGEDDON dilewati)
+    case = cat == 'Casing PC'
+    case &= ~has(case, ['ARMAGGEDDON'])
+    office |= has(case, ['PSU', 'OFFICE', 'VALCAS'])
+    has_psu[has(case, ['PSU', 'VALCAS'])] = 1
+    gaming_std |= case & (300000 <= price) & (price <= 600000)
+    gaming_adv |= case & (price > 600000)
+
+    # Power Supply (kata sertifikasi dicocokkan pada nama huruf kecil)
+    psu = cat == 'Power Supply'
+    office     |= psu & (price < 500000)
+    gaming_std |= psu & (price >= 500000)
+    if psu.any():
+        gaming_adv[psu] |= name[psu].str.lower().str.contains(_words(PSU_CERTIFIED), na=False).to_numpy(dtype=bool)
+
+    # CPU Cooler
+    cooler = cat == 'CPU Cooler'
+    office     |= cooler & (price < 300000)
+    gaming_std |= cooler & (250000 <= price) & (price <= 1000000)
+    gaming_adv |= cooler & (price > 500000)
+
+    return {
+        'NeedVGA': need_vga, 'HasPSU': has_psu, 'NeedCooler': need_cooler,
+        'CPU_Gen': cpu_gen, 'CPU_Socket': cpu_socket, 'Mobo_Series': mobo_series, 'DDR_Type': ddr_type,
+        'Office': office, 'Gaming Standard': gaming_std, 'Gaming Advanced': gaming_adv,
+    }
+
 def process_data(df):
     df.columns = df.columns.str.strip()
     # Sesuai file CSV: ITC + B + Y = Surabaya
@@ -168,162 +368,323 @@ def process_data(df):
     
     df['NeedVGA'], df['HasPSU'], df['NeedCooler'] = 0, 0, 0
     df['CPU_Gen'], df['CPU_Socket'], df['Mobo_Series'], df['DDR_Type'] = None, None, None, None
-    for col in ['Office', 'Gaming Standard', 'Gaming Advanced']: df[col] = False
-
-    for idx, row in df.iterrows():
-        name = row['Nama Accurate'].upper()
-        price = row['Web']
-        cat = row['Kategori']
-
-        if cat == 'Processor':
-            is_f = bool(re.search(r'\d+F\b', name))
-            if is_f: df.at[idx, 'NeedVGA'] = 1
-            if 'TRAY' in name or 'NO FAN' in name: df.at[idx, 'NeedCooler'] = 1
-            info = get_cpu_info(name)
-            df.at[idx, 'CPU_Gen'], df.at[idx, 'CPU_Socket'] = info['gen'], info['socket']
-            
-            if 'I3' in name or 'I5' in name: df.at[idx, 'Office'] = True
-            if ('I3' in name or 'I5' in name) and is_f: df.at[idx, 'Gaming Standard'] = True
-            # REVISI: Gaming Advanced lebih luas
-            if (any(x in name for x in ['I7', 'I9', 'ULTRA'])) or ('RYZEN 7' in name or 'RYZEN 9' in name): 
-                df.at[idx, 'Gaming Advanced'] = True
-
-        elif cat == 'Motherboard':
-            series_list = ['H410','H510','H610','H810','B660','B760','B860','Z790','Z890','A520','A620','B450','B550','B650','B840','B850','X870']
-            for s in series_list:
-                if s in name: 
-                    df.at[idx,'Mobo_Series'] = s
-                    break
-            df.at[idx,'DDR_Type'] = get_ddr_type(name)
-            series = df.at[idx,'Mobo_Series']
-            if series in ['H410','H510','H610','H810','A520','A620']: df.at[idx,'Office'] = True
-            if (series in ['B660','B760','B860'] and price < 2000000) or (series in ['B450','B550','B650','B840','B850']): df.at[idx,'Gaming Standard'] = True
-            if (series in ['B660','B760','B860'] and price >= 2000000) or (series in ['Z790','Z890','B450','B550','B650','B840','B850','X870']): df.at[idx,'Gaming Advanced'] = True
-        
-        elif cat == 'Memory RAM':
-            if 'SODIMM' in name: continue 
-            df.at[idx, 'DDR_Type'] = get_ddr_type(name)
-            match_gb = re.search(r'(\d+)\s*GB', name)
-            if match_gb:
-                sz = int(match_gb.group(1))
-                if 8 <= sz <= 16: df.at[idx, 'Office'] = True
-                if 16 <= sz <= 32: df.at[idx, 'Gaming Standard'] = True
-                if 32 <= sz <= 64: df.at[idx, 'Gaming Advanced'] = True
-
-        elif cat == 'SSD Internal':
-            if 'WDS120G2G0B' in name: continue 
-            df.loc[idx, ['Office', 'Gaming Standard']] = True
-            if 'NVME' in name: df.at[idx, 'Gaming Advanced'] = True
-
-        elif cat == 'VGA':
-            if any(x in name for x in ['GT710', 'GT730']): df.at[idx, 'Office'] = True
-            elif any(x in name for x in ['GT1030', 'GTX1650', 'RTX 3050', 'RTX 3060', 'RTX 5050', 'RTX 4060']): df.at[idx, 'Gaming Standard'] = True
-            elif any(x in name for x in ['RTX 50','RTX 60']): df.at[idx, 'Gaming Advanced'] = True
-
-        elif cat == 'Casing PC':
-            if 'ARMAGGEDDON' in name: continue
-            if any(x in name for x in ['PSU', 'OFFICE', 'VALCAS']):
-                df.at[idx, 'Office'] = True
-                if 'PSU' in name or 'VALCAS' in name: df.at[idx, 'HasPSU'] = 1
-            if 300000 <= price <= 600000: df.at[idx, 'Gaming Standard'] = True
-            if price > 600000: df.at[idx, 'Gaming Advanced'] = True
-
-        elif cat == 'Power Supply':
-            if price < 500000: df.at[idx, 'Office'] = True
-            if price >= 500000: df.at[idx, 'Gaming Standard'] = True
-            if any(x in name.lower() for x in ['bronze', 'titanium', 'gold', 'platinum', 'silver']): df.at[idx, 'Gaming Advanced'] = True
-
-        elif cat == 'CPU Cooler':
-            if price < 300000: df.at[idx, 'Office'] = True
-            if 250000 <= price <= 1000000: df.at[idx, 'Gaming Standard'] = True
-            if price > 500000: df.at[idx, 'Gaming Advanced'] = True
+    for col in USAGE_CATS: df[col] = False
+    # dtype eksplisit: kolom object (None/str/int) tidak boleh diinferensi jadi string
+    for col, values in classify_components(df).items(): df[col] = pd.Series(values, index=df.index, dtype=values.dtype)
     return df
 
+@st.cache_data(show_spinner="Memproses katalog...")
+def load_catalog(file_hash, _file_bytes, file_name):
+    """Baca & klasifikasi katalog portal; di-cache per hash isi file upload."""
+    buf = BytesIO(_file_bytes)
+    raw_df = pd.read_csv(buf) if file_name.endswith('.csv') else pd.read_excel(buf)
+    return process_data(raw_df)
+
+@st.cache_resource(show_spinner=False)
+def load_compat_index(file_hash, _data):
+    """Indeks kompatibilitas per katalog (dipakai bersama, tidak diubah)."""
+    return build_compat_index(_data)
+
 # --- 4. ENGINE REKOMENDASI ---
 
-def pick_component(items, strategy, branch_col):
-    if items.empty: return None
-    if strategy == "Harga Termurah": return items.sort_values(by=['Web', branch_col], ascending=[True, False]).iloc[0]
-    elif strategy == "Stok Terbanyak": return items.sort_values(by=[branch_col, 'Web'], ascending=[False, True]).iloc[0]
-    elif strategy == "Smart Pick":
-        min_p = items['Web'].min()
-        pool = items[items['Web'] <= (min_p + 100000)]
-        return pool.sort_values(by=[branch_col, 'Web'], ascending=[False, True]).iloc[0]
-    return items.iloc[0]
-
-def assemble_bundle(available_df, pick_p, strategy, branch_col, usage_cat):
-    bundle = {'Processor': pick_p}
-    missing = []
-    total = pick_p['Web']
-    def get_part(category, filter_func=None):
-        items = available_df[(available_df['Kategori'] == category) & (available_df[usage_cat] == True)]
-        if filter_func: items = items[items.apply(filter_func, axis=1)]
-        return pick_component(items, strategy, branch_col)
-        
-    mobo = get_part('Motherboard', lambda m: is_compatible(pick_p, m))
-    if mobo is not None:
-        bundle['Motherboard'], total = mobo, total + mobo['Web']
-    else: missing.append('Motherboard')
-    
-    ram = get_part('Memory RAM', lambda r: r.get('DDR_Type') == (mobo.get('DDR_Type') if mobo is not None else None))
-    if ram is not None:
-        bundle['Memory RAM'], total = ram, total + ram['Web']
-    else: missing.append('Memory RAM')
-    
-    ssd = get_part('SSD Internal')
-    if ssd is not None:
-        bundle['SSD Internal'], total = ssd, total + ssd['Web']
-    else: missing.append('SSD Internal')
-    
-    if pick_p['NeedVGA'] == 1:
-        vga = get_part('VGA')
-        if vga is not None:
-            bundle['VGA'], total = vga, total + vga['Web']
-        else: missing.append('VGA')
-        
-    case = get_part('Casing PC')
-    if case is not None:
-        bundle['Casing PC'], total = case, total + case['Web']
-    else: missing.append('Casing PC')
-    
-    if case is not None and case.get('HasPSU',0) == 0:
-        psu = get_part('Power Supply')
-        if psu is not None:
-            bundle['Power Supply'], total = psu, total + psu['Web']
-        else: missing.append('Power Supply')
-        
-    if pick_p['NeedCooler'] == 1:
-        cooler = get_part('CPU Cooler')
-        if cooler is not None:
-            bundle['CPU Cooler'], total = cooler, total + cooler['Web']
-        else: missing.append('CPU Cooler')
-        
-    return {"parts": bundle, "missing": missing, "total": total}
-    
-def generate_9_bundles(df, branch_col, usage_cat, p_min_user, p_max_user):
-    # REVISI 10: Satu produk bisa masuk ke banyak kartu
-    available_df = df.copy() 
-    strategies = [{"label": "Stok Terbanyak", "class": "badge-stock"}, {"label": "Harga Termurah", "class": "badge-cheap"}, {"label": "Smart Pick", "class": "badge-smart"}]
+STRATEGIES = [
+    {"label": "Stok Terbanyak", "class": "badge-stock"},
+    {"label": "Harga Termurah", "class": "badge-cheap"},
+    {"label": "Smart Pick",     "class": "badge-smart"},
+]
+SEARCH_TOP_K      = 3        # bundle per strategi
+SEARCH_MAX_NODES  = 5000     # batas kandidat yang dicoba per strategi (latensi terjamin)
+SMART_PICK_MARGIN = 100000   # Smart Pick: kandidat utama = harga ≤ termurah + margin
+
+BUNDLE_SLOTS = ['Motherboard', 'Memory RAM', 'SSD Internal', 'VGA', 'Casing PC', 'Power Supply', 'CPU Cooler']
+
+def strategy_order(web, stock, strategy):
+    """
+    Posisi dalam urutan preferensi strategi (sort stabil) untuk array harga
+    web & stok cabang. Elemen pertama = pilihan greedy lama:
+      Harga Termurah → Web naik, stok turun
+      Stok Terbanyak → stok turun, Web naik
+      Smart Pick     → harga ≤ termurah + SMART_PICK_MARGIN dulu, lalu stok turun, Web naik
+    """
+    stock = -stock                                          # NaN tetap di akhir
+    if strategy == "Harga Termurah": return np.lexsort((stock, web))
+    if strategy == "Stok Terbanyak" or not len(web): return np.lexsort((web, stock))
+    return np.lexsort((web, stock, web > web.min() + SMART_PICK_MARGIN))
+
+class _Candidates:
+    """Kandidat satu irisan indeks dalam urutan strategi: harga, stok, posisi matriks + min/maks harga."""
+    def __init__(self, items, rows, stock, strategy):
+        web = items['Web'].to_numpy(dtype=float)
+        self.items  = items
+        self.order  = strategy_order(web, stock, strategy)
+        self.prices = web[self.order]
+        self.rows   = rows[self.order]      # posisi baris di index['stock']
+        self.stock  = stock[self.order]
+        self.lo, self.hi = (self.prices.min(), self.prices.max()) if len(self.prices) else (0.0, 0.0)   # kosong → missing
+        self._columns = {}
+    def column(self, col):
+        if col not in self._columns:
+            self._columns[col] = self.items[col].to_numpy(dtype=object)[self.order]
+        return self._columns[col]
+    def row(self, j):
+        return self.items.iloc[self.order[j]]
+
+def search_bundles(index, strategy, branch_col, usage_cat, lo, hi, k=SEARCH_TOP_K, max_nodes=SEARCH_MAX_NODES,
+                   reserve=None, slices=None):
+    """
+    Hingga k bundle dengan total dalam [lo, hi] untuk satu strategi.
+
+    Processor dan setiap komponen dicoba dalam urutan preferensi strategi
+    (depth-first): jika bundle greedy lama masuk budget, itulah hasilnya; jika
+    tidak, kandidat berikutnya dicoba. Komponen dikelompokkan menjadi grup
+    independen — (motherboard, RAM), SSD, VGA, (casing, PSU), cooler — dengan
+    batas harga min/maks per grup dari array harga terurut. Sebelum turun ke
+    slot berikutnya, kandidat yang membuat batas bawah/atas total keluar dari
+    [lo, hi] dibuang, dan processor yang pasti keluar budget tidak dicoba sama
+    sekali. Deterministik; max_nodes membatasi kerja per strategi.
+
+    reserve: array unit terpakai per baris matriks stok (diubah di tempat) —
+    hanya komponen dengan sisa stok cabang ≥ 1 yang dipilih, dan setiap
+    bundle yang ditemukan memesan 1 unit per komponennya. slices: cache
+    (irisan, posisi matriks) per key, dipakai bersama antar strategi/cabang.
+    """
+    if lo > hi: return []   # budget user tidak beririsan dengan range kategori
+    slices = {} if slices is None else slices
+    b = index['branches'].index(branch_col) if branch_col in index['branches'] else None
+    cache = {}
+    def cands(key):
+        if key not in cache:
+            if key not in slices:
+                try: items = index.get(key, index['empty'])
+                except TypeError: items = index['empty']   # DDR_Type tidak hashable → tidak ada RAM
+                slices[key] = (items, index['positions'].get_indexer(items.index))
+            items, rows = slices[key]
+            stock = index['stock'][rows, b] if b is not None else items[branch_col].to_numpy(dtype=float)
+            cache[key] = _Candidates(items, rows, stock, strategy)
+        return cache[key]
+
+    ram_of = lambda ddr: cands(('ram', usage_cat, ddr))
+    part   = lambda cat: cands(('part', usage_cat, cat))
+    psu    = part('Power Supply')
+
+    def dep_bounds(slot, c):
+        """Batas (lo, hi) slot turunan per kandidat c: RAM per motherboard, PSU per casing."""
+        key = ('dep', slot, id(c))
+        if key not in cache:
+            if slot == 'Motherboard':
+                by_ddr = {d: (ram_of(d).lo, ram_of(d).hi) for d in pd.unique(c.column('DDR_Type'))}
+                b = np.array([by_ddr[d] for d in c.column('DDR_Type')], dtype=float).reshape(-1, 2)
+            else:
+                need_psu = np.array([h == 0 for h in c.column('HasPSU')], dtype=bool)
+                b = np.where(need_psu[:, None], [psu.lo, psu.hi], 0.0)
+            cache[key] = (b[:, 0], b[:, 1])
+        return cache[key]
+
+    def group_bounds(c, slot):
+        d_lo, d_hi = dep_bounds(slot, c)
+        return (c.prices + d_lo).min(), (c.prices + d_hi).max()
+
+    def plan(gen, socket, need_vga, need_cooler):
+        """Kandidat & batas grup untuk satu processor (di-cache per kombinasi atribut)."""
+        mobo_key = ('mobo', usage_cat, compatible_series(gen, socket))
+        key = ('plan', mobo_key, need_vga == 1, need_cooler == 1)
+        if key not in cache:
+            mobo = cands(mobo_key)
+            slots = {
+                'Motherboard':  mobo,
+                'SSD Internal': part('SSD Internal'),
+                'VGA':          part('VGA') if key[2] else None,
+                'Casing PC':    part('Casing PC'),
+                'CPU Cooler':   part('CPU Cooler') if key[3] else None,
+            }
+            groups = [
+                group_bounds(mobo, 'Motherboard') if len(mobo.order) else (ram_of(None).lo, ram_of(None).hi),
+                (slots['SSD Internal'].lo, slots['SSD Internal'].hi),
+                (slots['VGA'].lo, slots['VGA'].hi) if slots['VGA'] else (0.0, 0.0),
+                group_bounds(slots['Casing PC'], 'Casing PC') if len(slots['Casing PC'].order) else (0.0, 0.0),
+                (slots['CPU Cooler'].lo, slots['CPU Cooler'].hi) if slots['CPU Cooler'] else (0.0, 0.0),
+            ]
+            # suffix[g] = batas total grup g.. terakhir
+            suffix = [tuple(map(sum, zip(*groups[g:]))) if g < len(groups) else (0.0, 0.0) for g in range(len(groups) + 1)]
+            cache[key] = (slots, suffix, key)
+        return cache[key]
+
+    # grup (indeks suffix) setelah tiap slot selesai; slot pertama grup pasangan memakai dep_bounds
+    AFTER = {'Motherboard': 1, 'Memory RAM': 1, 'SSD Internal': 2, 'VGA': 3, 'Casing PC': 4, 'Power Supply': 4, 'CPU Cooler': 5}
+    nodes = 0
+    dead  = set()   # (plan, slot, kandidat, total) yang terbukti tidak punya penyelesaian
+
+    def dfs(i, slots, suffix, pid, total, chosen, missing):
+        nonlocal nodes
+        if i == len(BUNDLE_SLOTS):
+            return (dict(chosen), list(missing), total) if lo <= total <= hi else None
+        slot = BUNDLE_SLOTS[i]
+        if slot == 'Memory RAM':
+            m = chosen.get('Motherboard')
+            c = ram_of(m[0].column('DDR_Type')[m[1]] if m is not None else None)
+        elif slot == 'Power Supply':
+            case = chosen.get('Casing PC')
+            c = psu if case is not None and case[0].column('HasPSU')[case[1]] == 0 else None
+        else:
+            c = slots[slot]
+        if c is None:   # slot tidak dibutuhkan
+            return dfs(i + 1, slots, suffix, pid, total, chosen, missing)
+        if not len(c.order):
+            chosen[slot] = None
+            missing.append(slot)
+            found = dfs(i + 1, slots, suffix, pid, total, chosen, missing)
+            missing.pop()
+            del chosen[slot]
+            return found
+        # sisa bundle hanya bergantung pada (plan, slot, kandidat slot ini, total) → kegagalan di-memo
+        state = (pid, i, id(c), total)
+        if state in dead:
+            return None
+
+        rest_lo, rest_hi = suffix[AFTER[slot]]
+        if slot in ('Motherboard', 'Casing PC'):
+            d_lo, d_hi = dep_bounds(slot, c)
+            rest_lo, rest_hi = rest_lo + d_lo, rest_hi + d_hi
+        ok = (total + c.prices + rest_lo <= hi) & (total + c.prices + rest_hi >= lo)
+        if reserve is not None: ok &= c.stock - reserve[c.rows] >= 1
+        fits = np.flatnonzero(ok)
+        for j in fits:
+            nodes += 1
+            if nodes > max_nodes: break
+            chosen[slot] = (c, j)
+            found = dfs(i + 1, slots, suffix, pid, total + c.prices[j], chosen, missing)
+            if found is not None: return found
+        chosen.pop(slot, None)
+        if nodes <= max_nodes:
+            dead.add(state)
+        return None
+
+    procs = part('Processor')
+    attrs = zip(*(procs.column(col) for col in ['CPU_Gen', 'CPU_Socket', 'NeedVGA', 'NeedCooler']))
     results = []
-    cat_min, cat_max = PRICE_THRESHOLDS[usage_cat]['min'], PRICE_THRESHOLDS[usage_cat]['max']
+    for j, proc_attrs in enumerate(attrs):
+        if len(results) >= k or nodes > max_nodes: break
+        if reserve is not None and not procs.stock[j] - reserve[procs.rows[j]] >= 1:
+            continue   # unit processor sudah dipesan bundle lain
+        slots, suffix, pid = plan(*proc_attrs)
+        price = procs.prices[j]
+        if price + suffix[0][0] > hi or price + suffix[0][1] < lo:
+            continue   # processor ini pasti menghasilkan bundle di luar budget
+        found = dfs(0, slots, suffix, pid, price, {}, [])
+        if found is not None:
+            chosen, missing, total = found
+            parts = {'Processor': procs.row(j)}
+            for slot, pick in chosen.items():
+                if pick is not None: parts[slot] = pick[0].row(pick[1])
+            if reserve is not None:
+                reserve[procs.rows[j]] += 1
+                for pick in chosen.values():
+                    if pick is not None: reserve[pick[0].rows[pick[1]]] += 1
+            results.append({"parts": parts, "missing": missing, "total": total})
+    return results
 
-    for strat in strategies:
-        procs = available_df[(available_df['Kategori'] == 'Processor') & (available_df[usage_cat] == True)]
-        if strat['label'] == "Harga Termurah": sorted_procs = procs.sort_values('Web')
-        elif strat['label'] == "Smart Pick": sorted_procs = procs.sample(frac=1) if not procs.empty else procs
-        else: sorted_procs = procs.sort_values(branch_col, ascending=False)
-        
-        found_for_strat = 0
-        for i in range(len(sorted_procs)):
-            if found_for_strat >= 3: break 
-            res = assemble_bundle(available_df, sorted_procs.iloc[i], strat['label'], branch_col, usage_cat)
-            if res:
-                # REVISI 6: Memastikan range harga kategori Advanced dkk terakomodasi
-                if (cat_min <= res['total'] <= cat_max) and (p_min_user <= res['total'] <= p_max_user):
-                    results.append({"strategy": strat['label'], "badge_class": strat['class'], "parts": res['parts'], "total": res['total'], "missing": res['missing']})
-                    found_for_strat += 1
+def generate_9_bundles(df, branch_col, usage_cat, p_min_user, p_max_user, index=None,
+                       reserve_stock=False, slices=None):
+    # REVISI 10: Satu produk bisa masuk ke banyak kartu (katalog tidak diubah),
+    # kecuali reserve_stock: satu unit stok cabang hanya dijanjikan ke satu paket
+    if index is None: index = build_compat_index(df)
+    reserve = np.zeros(len(index['positions'])) if reserve_stock else None
+    # REVISI 6: Memastikan range harga kategori Advanced dkk terakomodasi
+    lo = max(PRICE_THRESHOLDS[usage_cat]['min'], p_min_user)
+    hi = min(PRICE_THRESHOLDS[usage_cat]['max'], p_max_user)
+    results = []
+    for strat in STRATEGIES:
+        for res in search_bundles(index, strat['label'], branch_col, usage_cat, lo, hi, reserve=reserve, slices=slices):
+            results.append({"strategy": strat['label'], "badge_class": strat['class'], **res})
     return results
 
+def generate_all_branches(df, usage_cat, p_min_user, p_max_user, index=None, reserve_stock=False):
+    """
+    {label cabang: bundle} untuk semua cabang BRANCH_MAP dalam satu pass:
+    indeks, irisan, dan matriks stok item × cabang dipakai bersama; per cabang
+    hanya urutan strategi (kolom stok matriks) yang berbeda.
+    """
+    if index is None: index = build_compat_index(df)
+    slices = {}
+    return {
+        label: generate_9_bundles(df, col, usage_cat, p_min_user, p_max_user, index, reserve_stock, slices)
+        for label, col in BRANCH_MAP.items()
+    }
+
+def branch_feasibility(results_by_branch):
+    """
+    Ringkasan per cabang: jumlah paket per strategi, harga termurah, paket
+    dengan komponen missing, dan paket yang memuat komponen tanpa stok cabang.
+    """
+    rows = []
+    for label, results in results_by_branch.items():
+        col = BRANCH_MAP[label]
+        row = {"Cabang": label, "Total Paket": len(results)}
+        for strat in STRATEGIES:
+            row[strat['label']] = sum(r['strategy'] == strat['label'] for r in results)
+        row["Paket Termurah (Rp)"] = min((r['total'] for r in results), default=None)
+        row["Paket dgn Missing"] = sum(bool(r['missing']) for r in results)
+        row["Paket Stok Kosong"] = sum(any(not p.get(col, 0) >= 1 for p in r['parts'].values()) for r in results)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+BUNDLE_CACHE_SIZE = 64
+
+@st.cache_data(max_entries=BUNDLE_CACHE_SIZE, show_spinner=False)
+def cached_bundles(file_hash, branch_col, usage_cat, p_min_user, p_max_user, reserve_stock, _data, _index):
+    """generate_9_bundles di-cache per (katalog, cabang, kategori, range budget, reservasi)."""
+    return generate_9_bundles(_data, branch_col, usage_cat, p_min_user, p_max_user, _index, reserve_stock)
+
+@st.cache_data(max_entries=BUNDLE_CACHE_SIZE, show_spinner="Menghitung paket untuk semua cabang...")
+def cached_all_branches(file_hash, usage_cat, p_min_user, p_max_user, reserve_stock, _data, _index):
+    return generate_all_branches(_data, usage_cat, p_min_user, p_max_user, _index, reserve_stock)
+
+# --- 4b. EDITOR DETAIL (REPRICING INKREMENTAL) ---
+# Mengganti satu komponen hanya memperbarui total dengan selisih harga dan
+# memeriksa ulang komponen itu + turunannya, bukan seluruh bundle.
+
+PART_DEPENDENTS = {
+    'Processor':   ['Motherboard', 'VGA', 'CPU Cooler'],
+    'Motherboard': ['Memory RAM'],
+    'Casing PC':   ['Power Supply'],
+}
+
+def check_part(parts, cat):
+    """Pesan ketidakcocokan komponen cat terhadap induknya; None jika cocok."""
+    proc, mobo, case = parts.get('Processor'), parts.get('Motherboard'), parts.get('Casing PC')
+    if cat == 'Motherboard' and proc is not None and mobo is not None and not is_compatible(proc, mobo):
+        return "Motherboard tidak kompatibel dengan processor terpilih."
+    if cat == 'Memory RAM' and mobo is not None and 'Memory RAM' in parts:
+        ddr = mobo.get('DDR_Type')
+        if ddr and parts['Memory RAM'].get('DDR_Type') != ddr:
+            return f"RAM tidak sesuai motherboard ({ddr})."
+    if cat == 'VGA' and proc is not None and proc['NeedVGA'] == 1 and 'VGA' not in parts:
+        return "Processor tanpa integrated graphics membutuhkan VGA Card."
+    if cat == 'CPU Cooler' and proc is not None and proc['NeedCooler'] == 1 and 'CPU Cooler' not in parts:
+        return "Processor tanpa cooler bawaan membutuhkan CPU Cooler."
+    if cat == 'Power Supply' and case is not None and case.get('HasPSU', 0) == 0 and 'Power Supply' not in parts:
+        return "Casing tanpa PSU membutuhkan Power Supply."
+    return None
+
+def new_editor_state(parts):
+    state = {'parts': dict(parts), 'total': sum(x['Web'] for x in parts.values()), 'issues': {}}
+    for cat in DISPLAY_ORDER:
+        msg = check_part(state['parts'], cat)
+        if msg: state['issues'][cat] = msg
+    return state
+
+def apply_part_change(state, cat, item):
+    """Ganti (item) atau hapus (None) komponen cat; total & pengecekan diperbarui inkremental."""
+    parts = state['parts']
+    old = parts.get(cat)
+    state['total'] += (item['Web'] if item is not None else 0) - (old['Web'] if old is not None else 0)
+    if item is None: parts.pop(cat, None)
+    else: parts[cat] = item
+    for dep in [cat, *PART_DEPENDENTS.get(cat, [])]:
+        msg = check_part(parts, dep)
+        if msg: state['issues'][dep] = msg
+        else: state['issues'].pop(dep, None)
+
 # --- 5. UI LAYER ---
 
 st.title("🛒 PC Wizard Pro")
@@ -331,14 +692,53 @@ st.title("🛒 PC Wizard Pro")
 if 'view' not in st.session_state: st.session_state.view = 'main'
 if 'selected_bundle' not in st.session_state: st.session_state.selected_bundle = None
 
+def select_bundle(res, branch_label):
+    """Callback tombol kartu: buka detail paket & samakan pilihan cabang di sidebar."""
+    st.session_state.selected_bundle = res.copy()
+    st.session_state.view = 'detail'
+    st.session_state.branch_select = branch_label
+    if 'temp_state' in st.session_state: del st.session_state.temp_state
+
+def render_bundle_cards(all_res, branch_label, u_cat):
+    b_col = BRANCH_MAP[branch_label]
+    for i in range(0, len(all_res), 3):
+        cols = st.columns(3)
+        for j in range(3):
+            idx = i + j
+            if idx < len(all_res):
+                res = all_res[idx]
+                with cols[j]:
+                    missing_text = ""
+                    if res.get("missing"):
+                        missing_text = f"<div style='color:#e74c3c;font-size:11px;margin-top:6px;'>⚠ Missing: {', '.join(res['missing'])}</div>"
+
+                    # REVISI 5: Fix tag penutup HTML dan perataan Markdown
+                    card_html = f"""<div class="bundle-card">
+<div>
+<span class="badge-strategy {res['badge_class']}">{res['strategy']}</span>
+<div class="bundle-title">Paket {u_cat} #{idx+1}</div>
+<div class="part-count-text">📦 {len(res['parts'])} Komponen</div>
+<div class="price-text">Rp {res['total']:,.0f}</div>
+<div class="stock-info">Stok Utama: {res['parts']['Processor'][b_col]:.0f} unit</div>
+{missing_text}
+</div>
+</div>"""
+                    st.markdown(card_html, unsafe_allow_html=True)
+                    st.button(f"Pilih & Detail Paket #{idx+1}", key=f"btn_{b_col}_{idx}", use_container_width=True,
+                              on_click=select_bundle, args=(res, branch_label))
+    st.divider()
+
 uploaded_file = st.file_uploader("Upload Data Portal (CSV/XLSX)", type=["csv", "xlsx"])
 
 if uploaded_file:
-    raw_df = pd.read_csv(uploaded_file) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file)
-    data = process_data(raw_df)
+    file_bytes = uploaded_file.getvalue()
+    file_hash = hashlib.sha1(file_bytes).hexdigest()
+    data = load_catalog(file_hash, file_bytes, uploaded_file.name)
+    compat_index = load_compat_index(file_hash, data)
 
     st.sidebar.header("⚙️ Konfigurasi")
-    sel_branch = st.sidebar.selectbox("Pilih Cabang:", list(BRANCH_MAP.keys()))
+    compare_mode = st.sidebar.radio("Mode:", ["Satu Cabang", "Bandingkan Semua Cabang"]) == "Bandingkan Semua Cabang"
+    sel_branch = st.sidebar.selectbox("Pilih Cabang:", list(BRANCH_MAP.keys()), key="branch_select")
     b_col = BRANCH_MAP[sel_branch]
     u_cat = st.sidebar.radio("Kategori Penggunaan:", ["Office", "Gaming Standard", "Gaming Advanced"])
 
@@ -346,55 +746,41 @@ if uploaded_file:
     st.sidebar.subheader("💰 Filter Budget")
     p_min_user = st.sidebar.number_input("Min (Rp)", value=float(PRICE_THRESHOLDS[u_cat]['min']), step=500000.0)
     p_max_user = st.sidebar.number_input("Max (Rp)", value=float(PRICE_THRESHOLDS[u_cat]['max']), step=500000.0)
+    reserve_stock = st.sidebar.checkbox("Reservasi stok antar paket", value=False,
+                                        help="Hanya komponen yang ada stoknya di cabang; satu unit stok dipakai oleh satu paket saja.")
 
     if st.session_state.view == 'main':
-        st.info(f"📍 Menampilkan 9 Bundling Terbaik untuk **{u_cat}** di {sel_branch}")
-        all_res = generate_9_bundles(data, b_col, u_cat, p_min_user, p_max_user)
-        
-        if not all_res:
-            st.warning(f"Tidak ada paket {u_cat} yang ditemukan sesuai budget. Coba naikkan limit atau cek cabang lain.")
+        if compare_mode:
+            st.info(f"📍 Membandingkan {len(BRANCH_MAP)} cabang untuk **{u_cat}**")
+            by_branch = cached_all_branches(file_hash, u_cat, p_min_user, p_max_user, reserve_stock, data, compat_index)
+            st.dataframe(branch_feasibility(by_branch), hide_index=True, use_container_width=True,
+                         column_config={"Paket Termurah (Rp)": st.column_config.NumberColumn(format="%.0f")})
+            for tab, (label, res_list) in zip(st.tabs(list(by_branch)), by_branch.items()):
+                with tab:
+                    if not res_list:
+                        st.warning(f"Tidak ada paket {u_cat} di {label} sesuai budget.")
+                    else:
+                        render_bundle_cards(res_list, label, u_cat)
         else:
-            for i in range(0, len(all_res), 3):
-                cols = st.columns(3)
-                for j in range(3):
-                    idx = i + j
-                    if idx < len(all_res):
-                        res = all_res[idx]
-                        with cols[j]:
-                            missing_text = ""
-                            if res.get("missing"):
-                                missing_text = f"<div style='color:#e74c3c;font-size:11px;margin-top:6px;'>⚠ Missing: {', '.join(res['missing'])}</div>"
-                            
-                            # REVISI 5: Fix tag penutup HTML dan perataan Markdown
-                            card_html = f"""<div class="bundle-card">
-<div>
-<span class="badge-strategy {res['badge_class']}">{res['strategy']}</span>
-<div class="bundle-title">Paket {u_cat} #{idx+1}</div>
-<div class="part-count-text">📦 {len(res['parts'])} Komponen</div>
-<div class="price-text">Rp {res['total']:,.0f}</div>
-<div class="stock-info">Stok Utama: {res['parts']['Processor'][b_col]:.0f} unit</div>
-{missing_text}
-</div>
-</div>"""
-                            st.markdown(card_html, unsafe_allow_html=True)
-                            if st.button(f"Pilih & Detail Paket #{idx+1}", key=f"btn_{idx}", use_container_width=True):
-                                st.session_state.selected_bundle = res.copy()
-                                st.session_state.view = 'detail'
-                                if 'temp_parts' in st.session_state: del st.session_state.temp_parts
-                                st.rerun()
-            st.divider()
+            st.info(f"📍 Menampilkan 9 Bundling Terbaik untuk **{u_cat}** di {sel_branch}")
+            all_res = cached_bundles(file_hash, b_col, u_cat, p_min_user, p_max_user, reserve_stock, data, compat_index)
+
+            if not all_res:
+                st.warning(f"Tidak ada paket {u_cat} yang ditemukan sesuai budget. Coba naikkan limit atau cek cabang lain.")
+            else:
+                render_bundle_cards(all_res, sel_branch, u_cat)
 
     elif st.session_state.view == 'detail':
         bundle = st.session_state.selected_bundle
-        if 'temp_parts' not in st.session_state: st.session_state.temp_parts = bundle['parts'].copy()
-        upd = st.session_state.temp_parts
+        if 'temp_state' not in st.session_state: st.session_state.temp_state = new_editor_state(bundle['parts'])
+        editor = st.session_state.temp_state
+        upd = editor['parts']
 
         st.button("⬅️ Kembali ke Marketplace", on_click=lambda: setattr(st.session_state, 'view', 'main'))
         st.subheader(f"🛠️ Detail Konfigurasi: {bundle['strategy']}")
         
         c_p, c_s = st.columns([2, 1])
         with c_p:
-            available_detail = data.copy() 
             for cat in DISPLAY_ORDER:
                 cur_p = upd.get('Processor')
                 cur_m = upd.get('Motherboard')
@@ -409,6 +795,7 @@ if uploaded_file:
                     reason = "PSU sudah termasuk dalam paket Casing (PSU Included)"
                 
                 st.markdown(f"#### {cat}")
+                if cat in editor['issues']: st.warning(f"⚠ {editor['issues'][cat]}")
                 
                 if cat in upd:
                     item = upd[cat]
@@ -424,15 +811,15 @@ if uploaded_file:
                                 st.session_state[f"show_edit_{cat}"] = True
                             if not is_mandatory:
                                 if act2.button("🗑️ Hapus", key=f"del_{cat}"):
-                                    del upd[cat]
+                                    apply_part_change(editor, cat, None)
                                     st.rerun()
                     
                     if st.session_state.get(f"show_edit_{cat}", False):
-                        cat_opts = available_detail[(available_detail['Kategori'] == cat) & (available_detail[u_cat] == True)]
+                        cat_opts = compat_parts(compat_index, u_cat, cat)
                         if cat == 'Motherboard' and cur_p is not None:
-                            cat_opts = cat_opts[cat_opts.apply(lambda m: is_compatible(cur_p, m), axis=1)]
+                            cat_opts = compat_mobos(compat_index, u_cat, cur_p)
                         if cat == 'Memory RAM' and cur_m is not None:
-                            if cur_m.get('DDR_Type'): cat_opts = cat_opts[cat_opts['DDR_Type'] == cur_m.get('DDR_Type')]
+                            if cur_m.get('DDR_Type'): cat_opts = compat_rams(compat_index, u_cat, cur_m.get('DDR_Type'))
                         
                         s_o = cat_opts.sort_values('Web')
                         lbls = s_o['Nama Accurate'] + " (Rp " + s_o['Web'].map('{:,.0f}'.format) + ")"
@@ -442,7 +829,7 @@ if uploaded_file:
                         new_pick = st.selectbox(f"Pilih Pengganti {cat}:", lbls, index=ix, key=f"sel_new_{cat}")
                         if st.button("Konfirmasi Perubahan", key=f"conf_{cat}"):
                             new_it = s_o[s_o['Nama Accurate'] == new_pick.split(" (Rp ")[0]].iloc[0]
-                            upd[cat] = new_it
+                            apply_part_change(editor, cat, new_it)
                             st.session_state[f"show_edit_{cat}"] = False
                             st.rerun()
                 else:
@@ -459,7 +846,7 @@ if uploaded_file:
                 st.markdown(f"**{k}**: {v['Nama Accurate']}")
             
             st.divider()
-            current_total = sum(x['Web'] for x in upd.values())
+            current_total = editor['total']
             rakit_fee = ASSEMBLY_FEES.get(u_cat, 100000)
             rakit = st.checkbox(f"Biaya Rakit (Rp {rakit_fee:,.0f})", value=True)
             grand_total = current_total + (rakit_fee if rakit else 0)